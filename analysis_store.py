@@ -0,0 +1,711 @@
+"""
+Persisted per-session analysis snapshots, for re-analyzing a growing trade
+log without re-running every detector over the whole history.
+
+A snapshot holds the sufficient statistics behind BiasDetector.analyze_all():
+counts and sums, the running day, losing-streak and last-trade state, and,
+for the order statistics the detectors take over the whole history (median
+win and loss, the large-loss quantile, the small-move threshold, the largest
+and smallest thirds of the losses), the P/L values involved kept sorted.
+Appended trades are folded in with vectorized work on the new trades only
+(plus a sorted insert into those arrays), and analyze_all() then gives the
+same report as a full BiasDetector run over the whole history.
+
+With a rank_error, the sorted arrays are replaced by mergeable quantile
+sketches, so a snapshot stays a few tens of kilobytes however long the
+stream it covers, at the cost of approximate order statistics (no sketch
+centroid ever holds more than rank_error of the values).
+report_deviation() measures how far such a report is from the exact one:
+
+    python analysis_store.py --trades 100000 --rank-error 0.01
+"""
+import argparse
+import io
+import json
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import QuantileSketch
+from bias_detector import (BiasDetector, score_overtrading, score_loss_aversion, score_revenge_trading,
+                           build_recommendations, overtrading_description, loss_aversion_description,
+                           revenge_trading_description)
+from detector_registry import section_detectors
+
+# The sections a snapshot can reproduce; other registered section detectors need the full trade log
+SNAPSHOT_DETECTORS = ('overtrading', 'loss_aversion', 'revenge_trading')
+
+# Values the detectors take order statistics of, and the values aligned with each
+ORDER_STATISTICS = {
+    'wins': (),
+    'losses': (),
+    # |P/L| of the previous trade, with the gap (minutes) to the trade after it
+    'prev_abs_pl': ('gap_after_prev',),
+    # P/L of a losing previous trade, with |P/L| of the trade after it
+    'prev_loss_pl': ('abs_pl_after_loss',),
+}
+
+
+class SortedValues:
+    """
+    Exact order statistics of a growing set of values, kept as a sorted array.
+
+    Same queries as QuantileSketch, answered exactly (bit for bit as pandas
+    and NumPy would over the full column), at the cost of memory linear in
+    the number of values.
+    """
+
+    def __init__(self, aligned=()):
+        self.aligned = tuple(aligned)
+        self.values = np.empty(0, dtype=np.float64)
+        self.sorted_aligned = {name: np.empty(0, dtype=np.float64) for name in self.aligned}
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, new_values, *new_aligned):
+        """Merge new values in, moving each aligned array's values along with them."""
+        order = np.argsort(new_values)
+        # Where each new value lands in the merged array
+        at = np.searchsorted(self.values, new_values[order], side='right') + np.arange(len(new_values))
+        is_new = np.zeros(len(self.values) + len(new_values), dtype=bool)
+        is_new[at] = True
+
+        def merge(values, new):
+            merged = np.empty(len(is_new), dtype=np.float64)
+            merged[at] = new[order]
+            merged[~is_new] = values
+            return merged
+
+        self.values = merge(self.values, new_values)
+        self.sorted_aligned = {name: merge(self.sorted_aligned[name], new)
+                               for name, new in zip(self.aligned, new_aligned)}
+
+    def quantile(self, q):
+        """Series.quantile(q) (linear interpolation), bit for bit."""
+        virtual = (len(self.values) - 1) * q
+        lower = int(np.floor(virtual))
+        upper = min(lower + 1, len(self.values) - 1)
+        a, b, t = self.values[lower], self.values[upper], virtual - lower
+        # NumPy's lerp, which interpolates from the nearer end
+        return b - (b - a) * (1 - t) if t >= 0.5 else a + (b - a) * t
+
+    def median(self):
+        middle = len(self.values) // 2
+        if len(self.values) % 2:
+            return self.values[middle]
+        return (self.values[middle - 1] + self.values[middle]) / 2
+
+    def rank(self, x):
+        """Number of values <= x."""
+        return int(np.searchsorted(self.values, x, side='right'))
+
+    def head(self, rank):
+        """
+        Sums over the `rank` smallest values.
+
+        Returns:
+            tuple: (sum of the values, [sum of each aligned value])
+        """
+        return self.values[:rank].sum(), [self.sorted_aligned[name][:rank].sum() for name in self.aligned]
+
+    def tail(self, rank):
+        """Sum of the `rank` largest values."""
+        return self.values[len(self.values) - rank:].sum()
+
+    def max_rank_error(self):
+        return 0.0
+
+    def to_arrays(self):
+        return {'values': self.values, **{f'sorted_{name}': self.sorted_aligned[name] for name in self.aligned}}
+
+    @classmethod
+    def from_arrays(cls, arrays, aligned=()):
+        values = cls(aligned)
+        values.values = arrays['values']
+        values.sorted_aligned = {name: arrays[f'sorted_{name}'] for name in values.aligned}
+        return values
+
+
+class AnalysisSnapshot:
+    """
+    Sufficient statistics of a trade history for BiasDetector.analyze_all().
+
+    Trades must arrive in chronological order: fold() refuses a block that
+    is out of order or starts before the last trade folded, since a full
+    run would sort the log first.
+
+    Args:
+        rank_error (float): Keep order statistics in QuantileSketches with
+                            this rank error instead of exact sorted arrays
+    """
+
+    def __init__(self, rank_error=None):
+        self.rank_error = rank_error
+        # Trades offered (including skipped invalid ones) vs. trades folded
+        self.history_length = 0
+        self.trade_count = 0
+        self.total_pl = 0.0
+        self.total_abs_pl = 0.0
+        self.max_pl = None
+        self.min_pl = None
+        self.win_count = 0
+        self.win_sum = 0.0
+        self.loss_count = 0
+        self.loss_sum = 0.0
+        self.assets = set()
+
+        # Last trade folded
+        self.last_ns = None
+        self.last_pl = None
+        self.last_asset = None
+
+        # Daily counters
+        self.current_day = None
+        self.trades_today = 0
+        self.trading_days = 0
+        self.max_trades_per_day = 0
+
+        # Gaps between consecutive trades (minutes)
+        self.positive_gap_sum = 0.0
+        self.positive_gap_count = 0
+        self.rapid_trades = 0
+
+        # Behaviour after losses and wins
+        self.trades_after_loss = 0
+        self.gap_after_loss_sum = 0.0
+        self.wins_after_loss = 0
+        self.emotional_cluster = 0
+        self.rapid_same_asset = 0
+        self.trades_after_win = 0
+        self.gap_after_win_sum = 0.0
+
+        # Losing streaks
+        self.loss_streak = 0
+        self.completed_streaks = {}
+        self.trades_after_multiple_losses = 0
+        self.abs_pl_after_multiple_losses_sum = 0.0
+
+        # Human Tax, per rule as [amount, count]
+        self.human_tax = 0.0
+        self.human_tax_by_rule = {'overtrading': [0.0, 0], 'rapid_fire': [0.0, 0], 'revenge': [0.0, 0]}
+
+        self.values = {name: QuantileSketch(rank_error, aligned) if rank_error else SortedValues(aligned)
+                       for name, aligned in ORDER_STATISTICS.items()}
+
+    def fold(self, df):
+        """
+        Fold a chronological block of new trades into the snapshot.
+
+        Args:
+            df: Trade frame (Timestamp, Buy/sell, Asset, P/L), as given to BiasDetector
+
+        Returns:
+            bool: False if the block is out of chronological order or starts
+                  before the last folded trade; the snapshot is then unchanged
+        """
+        if len(df) == 0:
+            return True
+        try:
+            detector = BiasDetector(df)
+        except ValueError:
+            # Nothing valid to fold, as BiasDetector would have dropped every row
+            self.history_length += len(df)
+            return True
+        if not detector.df.index.is_monotonic_increasing:
+            return False
+        ns = detector.timestamps_ns
+        if self.last_ns is not None and ns[0] < self.last_ns:
+            return False
+
+        pl = detector.df['P/L'].to_numpy(dtype=np.float64)
+        abs_pl = np.abs(pl)
+        asset_codes = detector.df['Asset'].cat.codes.to_numpy()
+        asset_names = detector.df['Asset'].cat.categories.astype(str)
+        days = detector.days.astype(np.int64)
+        n = len(pl)
+        is_win = pl > 0
+        is_loss = pl < 0
+
+        # Previous trade of each row, continuing from the last folded trade
+        has_prev = np.ones(n, dtype=bool)
+        if self.last_ns is None:
+            has_prev[0] = False
+        prev_ns = np.concatenate(([self.last_ns if self.last_ns is not None else ns[0]], ns[:-1]))
+        gap = (ns - prev_ns) / 1e9 / 60
+        gap[~has_prev] = np.nan
+        prev_pl = np.concatenate(([self.last_pl if self.last_pl is not None else np.nan], pl[:-1]))
+        prev_loss = has_prev & (prev_pl < 0)
+        after_win = has_prev & ~prev_loss
+        same_asset = np.zeros(n, dtype=bool)
+        same_asset[1:] = asset_codes[1:] == asset_codes[:-1]
+        same_asset[0] = has_prev[0] and asset_codes[0] >= 0 and asset_names[asset_codes[0]] == self.last_asset
+        same_asset &= asset_codes >= 0
+
+        # Trade number within its day, continuing the last folded day
+        prev_day = np.concatenate(([self.current_day if self.current_day is not None else days[0] - 1], days[:-1]))
+        new_day = days != prev_day
+        positions = np.arange(n)
+        day_start = np.maximum.accumulate(np.where(new_day, positions, -1))
+        daily_trade_num = np.where(day_start >= 0, positions - day_start + 1, self.trades_today + positions + 1)
+
+        # Losing streaks, continuing the streak in progress
+        last_reset = np.maximum.accumulate(np.where(is_loss, -1, positions))
+        loss_streak = np.where(last_reset >= 0, positions - last_reset, positions + 1 + self.loss_streak)
+        ends = (loss_streak > 0) & np.append(~is_loss[1:], False)
+        if self.loss_streak > 0 and not is_loss[0]:
+            ends_before = [self.loss_streak]
+        else:
+            ends_before = []
+        for length in ends_before + loss_streak[ends].tolist():
+            self.completed_streaks[length] = self.completed_streaks.get(length, 0) + 1
+        multiple_losses = loss_streak >= 2
+
+        # Human Tax rules, on losing trades only
+        rules = {
+            'overtrading': daily_trade_num > 8,
+            'rapid_fire': gap < 1.0,
+            'revenge': (gap < 15.0) & prev_loss,
+        }
+        flagged = np.zeros(n, dtype=bool)
+        for rule, mask in rules.items():
+            mask = mask & is_loss
+            flagged |= mask
+            self.human_tax_by_rule[rule][0] += float(abs_pl[mask].sum())
+            self.human_tax_by_rule[rule][1] += int(mask.sum())
+        self.human_tax += float(abs_pl[flagged].sum())
+
+        self.history_length += len(df)
+        self.trade_count += n
+        self.total_pl += float(pl.sum())
+        self.total_abs_pl += float(abs_pl.sum())
+        self.max_pl = float(pl.max()) if self.max_pl is None else max(self.max_pl, float(pl.max()))
+        self.min_pl = float(pl.min()) if self.min_pl is None else min(self.min_pl, float(pl.min()))
+        self.win_count += int(is_win.sum())
+        self.win_sum += float(pl[is_win].sum())
+        self.loss_count += int(is_loss.sum())
+        self.loss_sum += float(pl[is_loss].sum())
+        self.assets.update(asset_names[np.unique(asset_codes[asset_codes >= 0])].tolist())
+
+        self.trading_days += int(new_day.sum())
+        self.max_trades_per_day = max(self.max_trades_per_day, int(daily_trade_num.max()))
+        self.current_day = int(days[-1])
+        self.trades_today = int(daily_trade_num[-1])
+
+        positive = gap > 0
+        self.positive_gap_sum += float(gap[positive].sum())
+        self.positive_gap_count += int(positive.sum())
+        self.rapid_trades += int((gap < 1).sum())
+
+        self.trades_after_loss += int(prev_loss.sum())
+        self.gap_after_loss_sum += float(gap[prev_loss].sum())
+        self.wins_after_loss += int((prev_loss & is_win).sum())
+        self.emotional_cluster += int((prev_loss & (gap < 15)).sum())
+        self.rapid_same_asset += int((prev_loss & same_asset & (gap < 30)).sum())
+        self.trades_after_win += int(after_win.sum())
+        self.gap_after_win_sum += float(gap[after_win].sum())
+
+        self.loss_streak = int(loss_streak[-1]) if is_loss[-1] else 0
+        self.trades_after_multiple_losses += int(multiple_losses.sum())
+        self.abs_pl_after_multiple_losses_sum += float(abs_pl[multiple_losses].sum())
+
+        self.values['wins'].add(pl[is_win])
+        self.values['losses'].add(pl[is_loss])
+        self.values['prev_abs_pl'].add(np.abs(prev_pl[has_prev]), gap[has_prev])
+        self.values['prev_loss_pl'].add(prev_pl[prev_loss], abs_pl[prev_loss])
+
+        self.last_ns = int(ns[-1])
+        self.last_pl = float(pl[-1])
+        self.last_asset = asset_names[asset_codes[-1]] if asset_codes[-1] >= 0 else None
+        return True
+
+    def analyze_all(self):
+        """
+        The report BiasDetector.analyze_all() gives for the folded trades.
+
+        Returns:
+            dict: overtrading, loss_aversion, revenge_trading, summary,
+                  recommendations and statistics
+        """
+        if self.trade_count == 0:
+            raise ValueError("No valid trading data found after processing")
+        # Metrics are NumPy scalars, as from BiasDetector's pandas reductions, so they round the same way
+        sections = {
+            'overtrading': self.detect_overtrading(),
+            'loss_aversion': self.detect_loss_aversion(),
+            'revenge_trading': self.detect_revenge_trading()
+        }
+        biases_detected = [name for name, result in [('Overtrading', sections['overtrading']),
+                                                     ('Loss Aversion', sections['loss_aversion']),
+                                                     ('Revenge Trading', sections['revenge_trading'])]
+                           if result['detected']]
+        report = {
+            **sections,
+            'summary': {
+                'total_trades': self.trade_count,
+                'total_pnl': round(np.float64(self.total_pl), 2),
+                'win_rate': round((np.int64(self.win_count) / self.trade_count) * 100, 1),
+                'biases_detected': biases_detected,
+                'bias_count': len(biases_detected)
+            },
+            'recommendations': build_recommendations(sections),
+            'statistics': self.get_statistics()
+        }
+        if self.rank_error:
+            report['approximation'] = {
+                'rank_error': self.rank_error,
+                'max_rank_error': round(max(values.max_rank_error() for values in self.values.values()), 4)
+            }
+        return report
+
+    def get_statistics(self):
+        return {
+            'total_trades': self.trade_count,
+            'winning_trades': self.win_count,
+            'losing_trades': self.loss_count,
+            'total_pnl': round(np.float64(self.total_pl), 2),
+            'avg_pnl': round(np.float64(self.total_pl) / self.trade_count, 2),
+            'largest_win': round(np.float64(self.max_pl), 2),
+            'largest_loss': round(np.float64(self.min_pl), 2),
+            'win_rate': round((np.int64(self.win_count) / self.trade_count) * 100, 1),
+            'trading_days': self.trading_days,
+            'unique_assets': len(self.assets),
+            'human_tax': round(self.human_tax, 2),
+            'human_tax_by_rule': {
+                rule: {'amount': round(amount, 2), 'count': count}
+                for rule, (amount, count) in self.human_tax_by_rule.items()
+            },
+            'prosperity_projection': round(round(self.human_tax, 2) * ((1 + 0.07) ** 10), 2)
+        }
+
+    def detect_overtrading(self):
+        avg_trades_per_day = np.int64(self.trade_count) / self.trading_days
+        avg_time_between_trades = (np.float64(self.positive_gap_sum) / self.positive_gap_count
+                                   if self.positive_gap_count else np.nan)
+        rapid_trade_pct = (np.int64(self.rapid_trades) / self.trade_count) * 100
+
+        # Trades after a previous |P/L| within 2% of the average trade size
+        avg_trade_size = np.float64(self.total_abs_pl) / self.trade_count
+        small_moves = self.values['prev_abs_pl'].rank(avg_trade_size * 0.02)
+        if small_moves > 0:
+            avg_time_after_small_move = self.values['prev_abs_pl'].head(small_moves)[1][0] / small_moves
+            frequency_increase_ratio = avg_time_between_trades / avg_time_after_small_move if avg_time_after_small_move > 0 else 1
+        else:
+            frequency_increase_ratio = 1
+
+        estimated_cost_per_trade = avg_trade_size * 0.001
+        total_estimated_costs = self.trade_count * estimated_cost_per_trade
+        total_net_return = np.float64(self.total_pl)
+        cost_to_return_ratio = abs(total_estimated_costs / total_net_return) if total_net_return != 0 else 0
+
+        result = score_overtrading(avg_trades_per_day, self.max_trades_per_day, rapid_trade_pct,
+                                   frequency_increase_ratio, cost_to_return_ratio, total_net_return)
+        return {
+            **result,
+            'metrics': {
+                'avg_trades_per_day': round(avg_trades_per_day, 2),
+                'max_trades_per_day': self.max_trades_per_day,
+                'rapid_trade_percentage': round(rapid_trade_pct, 1),
+                'avg_minutes_between_trades': round(avg_time_between_trades, 1) if not pd.isna(avg_time_between_trades) else 0,
+                'frequency_increase_after_small_moves': round(frequency_increase_ratio, 2),
+                'cost_to_return_ratio': round(cost_to_return_ratio * 100, 1) if cost_to_return_ratio > 0 else 0,
+                'total_estimated_costs': round(total_estimated_costs, 2),
+                'total_net_return': round(total_net_return, 2)
+            },
+            'description': overtrading_description(result['severity'], avg_trades_per_day, rapid_trade_pct, cost_to_return_ratio)
+        }
+
+    def detect_loss_aversion(self):
+        wins, losses = self.values['wins'], self.values['losses']
+        if len(wins) == 0 or len(losses) == 0:
+            return {
+                'detected': False,
+                'severity': 'Low',
+                'score': 0,
+                'metrics': {},
+                'description': 'Insufficient data to detect loss aversion patterns.'
+            }
+
+        avg_win = np.float64(self.win_sum) / self.win_count
+        avg_loss = abs(np.float64(self.loss_sum) / self.loss_count)
+        risk_reward_ratio = avg_win / avg_loss if avg_loss > 0 else 0
+
+        # Losses are sorted most negative first, i.e. by size, largest first
+        if len(losses) > 1:
+            third = max(1, len(losses) // 3)
+            recent_losses = -losses.head(third)[0] / third
+            earlier_losses = -losses.tail(third) / third
+            loss_escalation = recent_losses / earlier_losses if earlier_losses > 0 else 1
+        else:
+            loss_escalation = 1
+
+        # With wins and losses both present, these are the largest win and the largest loss
+        largest_win = np.float64(self.max_pl)
+        largest_loss = abs(np.float64(self.min_pl))
+        loss_to_win_ratio = largest_loss / largest_win if largest_win > 0 else 0
+
+        median_win = wins.median()
+        median_loss = abs(losses.median())
+        win_rate = (len(wins) / self.trade_count) * 100
+        cutting_winners_pattern = win_rate > 55 and risk_reward_ratio < 1.2
+
+        result = score_loss_aversion(risk_reward_ratio, loss_escalation, loss_to_win_ratio,
+                                     cutting_winners_pattern, median_win, median_loss)
+        return {
+            **result,
+            'metrics': {
+                'risk_reward_ratio': round(risk_reward_ratio, 2),
+                'avg_win': round(avg_win, 2),
+                'avg_loss': round(abs(avg_loss), 2),
+                'median_win': round(median_win, 2),
+                'median_loss': round(median_loss, 2),
+                'win_rate': round(win_rate, 1),
+                'largest_win': round(largest_win, 2),
+                'largest_loss': round(largest_loss, 2),
+                'loss_to_win_ratio': round(loss_to_win_ratio, 2),
+                'loss_escalation_factor': round(loss_escalation, 2)
+            },
+            'description': loss_aversion_description(result['severity'], risk_reward_ratio, loss_to_win_ratio, cutting_winners_pattern)
+        }
+
+    def detect_revenge_trading(self):
+        if self.trade_count < 2:
+            return {
+                'detected': False,
+                'severity': 'Low',
+                'score': 0,
+                'metrics': {},
+                'description': 'Insufficient data to detect revenge trading patterns.'
+            }
+        if self.loss_count == 0:
+            return {
+                'detected': False,
+                'severity': 'Low',
+                'score': 0,
+                'metrics': {},
+                'description': 'No loss patterns detected.'
+            }
+        if self.trades_after_loss == 0:
+            return {
+                'detected': False,
+                'severity': 'Low',
+                'score': 0,
+                'metrics': {},
+                'description': 'No consecutive loss patterns detected.'
+            }
+
+        # Trades after a loss in the worst 20% of losses
+        large_loss_threshold = self.values['losses'].quantile(0.2)
+        after_large_loss = self.values['prev_loss_pl'].rank(large_loss_threshold)
+        avg_abs_pl_after_large_loss = (self.values['prev_loss_pl'].head(after_large_loss)[1][0] / after_large_loss
+                                       if after_large_loss else 0.0)
+        avg_abs_pl_normal = np.float64(self.total_abs_pl) / self.trade_count
+        size_increase_ratio = avg_abs_pl_after_large_loss / avg_abs_pl_normal if avg_abs_pl_normal > 0 else 1
+
+        rapid_same_asset_pct = (np.int64(self.rapid_same_asset) / self.trades_after_loss) * 100
+        emotional_cluster_pct = (np.int64(self.emotional_cluster) / self.trades_after_loss) * 100
+
+        if self.trades_after_multiple_losses > 0:
+            avg_size_after_multiple = np.float64(self.abs_pl_after_multiple_losses_sum) / self.trades_after_multiple_losses
+            escalation_ratio = avg_size_after_multiple / avg_abs_pl_normal if avg_abs_pl_normal > 0 else 1
+        else:
+            escalation_ratio = 1
+
+        avg_time_after_loss = np.float64(self.gap_after_loss_sum) / self.trades_after_loss
+        avg_time_after_win = (np.float64(self.gap_after_win_sum) / self.trades_after_win
+                              if self.trades_after_win > 0 else avg_time_after_loss)
+
+        # Include the streak still in progress, as the batch detector does
+        streaks = dict(self.completed_streaks)
+        if self.loss_streak > 0:
+            streaks[self.loss_streak] = streaks.get(self.loss_streak, 0) + 1
+
+        win_rate_after_loss = (np.int64(self.wins_after_loss) / self.trades_after_loss) * 100
+
+        result = score_revenge_trading(size_increase_ratio, rapid_same_asset_pct, emotional_cluster_pct,
+                                       escalation_ratio, avg_time_after_loss, avg_time_after_win,
+                                       win_rate_after_loss)
+        return {
+            **result,
+            'metrics': {
+                'avg_minutes_after_loss': round(avg_time_after_loss, 1),
+                'avg_minutes_after_win': round(avg_time_after_win, 1),
+                'rapid_same_asset_pct': round(rapid_same_asset_pct, 1),
+                'emotional_cluster_pct': round(emotional_cluster_pct, 1),
+                'win_rate_after_loss': round(win_rate_after_loss, 1),
+                'size_increase_after_large_loss': round(size_increase_ratio, 2),
+                'risk_escalation_ratio': round(escalation_ratio, 2),
+                'trades_after_consecutive_losses': self.trades_after_multiple_losses,
+                'longest_losing_streak': max(streaks, default=0),
+                'losing_streak_histogram': dict(sorted(streaks.items()))
+            },
+            'description': revenge_trading_description(result['severity'], emotional_cluster_pct, rapid_same_asset_pct, escalation_ratio)
+        }
+
+    def to_bytes(self):
+        """Serialize as an .npz archive: the order statistics' arrays plus the scalar state as JSON."""
+        state = {key: value for key, value in vars(self).items() if key != 'values'}
+        state['assets'] = sorted(self.assets)
+        state['completed_streaks'] = {str(length): count for length, count in self.completed_streaks.items()}
+        buffer = io.BytesIO()
+        arrays = {f'{name}.{key}': array for name, values in self.values.items()
+                  for key, array in values.to_arrays().items()}
+        np.savez(buffer, state=np.frombuffer(json.dumps(state).encode(), dtype=np.uint8), **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            state = json.loads(archive['state'].tobytes())
+            snapshot = cls(state['rank_error'])
+            container = QuantileSketch if snapshot.rank_error else SortedValues
+            for name, aligned in ORDER_STATISTICS.items():
+                arrays = {key.split('.', 1)[1]: archive[key] for key in archive.files if key.startswith(f'{name}.')}
+                snapshot.values[name] = container.from_arrays(arrays, aligned)
+        state['assets'] = set(state['assets'])
+        state['completed_streaks'] = {int(length): count for length, count in state['completed_streaks'].items()}
+        vars(snapshot).update(state)
+        return snapshot
+
+
+def report_deviation(approximate, exact):
+    """
+    How far an approximate analyze_all() report is from the exact one.
+
+    Args:
+        approximate (dict): Report of a snapshot with a rank_error
+        exact (dict): Report of an exact snapshot (or BiasDetector) over the same trades
+
+    Returns:
+        dict: The largest score difference, whether the same biases are
+              detected, and per section the score difference, whether
+              detection and severity agree, and the relative error of
+              each metric that differs
+    """
+    sections = {}
+    for name in SNAPSHOT_DETECTORS:
+        approx_result, exact_result = approximate[name], exact[name]
+        metric_errors = {}
+        for metric, value in exact_result['metrics'].items():
+            estimate = approx_result['metrics'].get(metric)
+            if isinstance(value, (int, float, np.number)) and not isinstance(value, bool) and estimate != value:
+                metric_errors[metric] = round(float(abs(estimate - value) / abs(value)), 4) if value else None
+        sections[name] = {
+            'score_delta': round(float(approx_result['score'] - exact_result['score']), 1),
+            'same_detection': bool(approx_result['detected'] == exact_result['detected']),
+            'same_severity': approx_result['severity'] == exact_result['severity'],
+            'metric_errors': metric_errors
+        }
+    return {
+        'max_score_delta': max(abs(section['score_delta']) for section in sections.values()),
+        'same_biases_detected': approximate['summary']['biases_detected'] == exact['summary']['biases_detected'],
+        'sections': sections
+    }
+
+
+def snapshot_supported():
+    """Whether snapshots cover every registered section detector."""
+    return set(section_detectors()) <= set(SNAPSHOT_DETECTORS)
+
+
+class InMemoryAnalysisStore:
+    """Per-session analysis snapshots kept in process memory (serialized, so callers get their own copy)."""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """The session's saved snapshot, or None."""
+        with self._lock:
+            data = self._snapshots.get(session_id)
+        return AnalysisSnapshot.from_bytes(data) if data is not None else None
+
+    def put(self, session_id, snapshot):
+        data = snapshot.to_bytes()
+        with self._lock:
+            self._snapshots[session_id] = data
+
+    def clear(self, session_id):
+        with self._lock:
+            self._snapshots.pop(session_id, None)
+
+
+class SQLiteAnalysisStore:
+    """Per-session analysis snapshots persisted in a SQLite database."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analysis_snapshots (
+                    session_id TEXT PRIMARY KEY,
+                    history_length INTEGER NOT NULL,
+                    snapshot BLOB NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe to share across request threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT snapshot FROM analysis_snapshots WHERE session_id = ?",
+                               (session_id,)).fetchone()
+        return AnalysisSnapshot.from_bytes(row[0]) if row else None
+
+    def put(self, session_id, snapshot):
+        data = snapshot.to_bytes()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO analysis_snapshots VALUES (?, ?, ?)",
+                         (session_id, snapshot.history_length, data))
+
+    def clear(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM analysis_snapshots WHERE session_id = ?", (session_id,))
+
+
+def create_analysis_store(db_path=None):
+    """Use SQLite when a database path is configured, otherwise keep snapshots in memory."""
+    if db_path:
+        return SQLiteAnalysisStore(db_path)
+    return InMemoryAnalysisStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare approximate (sketch) analysis snapshots with exact ones on mock trades.')
+    parser.add_argument('--trades', type=int, default=100000, help='Mock trades to generate')
+    parser.add_argument('--chunk', type=int, default=1000, help='Trades folded at a time')
+    parser.add_argument('--rank-error', type=float, default=0.01, help="Sketches' target rank error")
+    parser.add_argument('--seed', type=int, default=None, help='Mock data seed')
+    args = parser.parse_args(argv)
+
+    from mock_data_generator import MockDataGenerator
+    trades = MockDataGenerator(num_trades=args.trades, seed=args.seed).generate_frame()
+    exact, approximate = AnalysisSnapshot(), AnalysisSnapshot(args.rank_error)
+    for start in range(0, len(trades), args.chunk):
+        chunk = trades.iloc[start:start + args.chunk]
+        exact.fold(chunk)
+        approximate.fold(chunk)
+
+    report = approximate.analyze_all()
+    deviation = report_deviation(report, exact.analyze_all())
+    deviation['approximation'] = report['approximation']
+    deviation['snapshot_bytes'] = {'exact': len(exact.to_bytes()), 'approximate': len(approximate.to_bytes())}
+    print(json.dumps(deviation, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
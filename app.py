@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 import pandas as pd
@@ -6,9 +6,21 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 import os
+import threading
+import time
 from bias_detector import BiasDetector
+from detector_registry import section_detectors
+from streaming_detector import StreamingBiasDetector
+from session_store import create_session_store, TRADE_FIELDS
+from session_state import SessionRegistry
+from analysis_store import AnalysisSnapshot, create_analysis_store, snapshot_supported
+from trade_ingest import (REQUIRED_COLUMNS, ARROW_MIMETYPES, NPZ_MIMETYPE,
+                          frame_from_columns, frame_from_npz, frame_from_arrow, iter_csv_chunks)
+from batch_analysis import BATCH_WORKERS, create_pool, iter_batch_results, iter_ndjson_batch_results
+from trade_digest import build_digests
 from mock_data_generator import MockDataGenerator
-from gemini_coach import GeminiCoach
+from metrics import timed, observe_stage, request_seconds, timing_header, render_metrics
+from gemini_coach import GeminiCoach, RECOMMENDATIONS_DEADLINE, INTERVENTION_DEADLINE, ANALYSIS_DEADLINE
 
 # Load environment variables
 load_dotenv()
@@ -19,124 +31,403 @@ class CustomJSONProvider(DefaultJSONProvider):
             return int(obj)
         if isinstance(obj, np.floating):
             return float(obj)
+        if isinstance(obj, np.bool_):
+            return bool(obj)
         if isinstance(obj, np.ndarray):
             return obj.tolist()
         return super().default(obj)
+    
+    def dumps(self, obj, **kwargs):
+        with timed('serialize'):
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__)
 from flask_cors import CORS
-CORS(app) # Enable CORS for all routes (allows extension to call API)
+CORS(app, expose_headers=['X-Timing']) # Enable CORS for all routes (allows extension to call API)
 app.json = CustomJSONProvider(app)
 
 # Initialize Gemini Coach
 gemini_coach = GeminiCoach()
 
+# Server-side trade history per session (SQLite if SESSION_DB_PATH is set)
+session_store = create_session_store(os.environ.get("SESSION_DB_PATH"))
+
+# Per-session analysis snapshots, so /api/analyze on a stored session only folds in new trades
+analysis_store = create_analysis_store(os.environ.get("ANALYSIS_DB_PATH"))
+# Opt-in: keep snapshot order statistics in quantile sketches with this rank error (e.g. 0.01), bounding their size
+ANALYSIS_RANK_ERROR = float(os.environ["ANALYSIS_RANK_ERROR"]) if os.environ.get("ANALYSIS_RANK_ERROR") else None
+
+# Per-session locks and realtime detectors are dropped after this many idle seconds,
+# or least recently used first beyond SESSION_STATE_MAX sessions
+SESSION_STATE_TTL = float(os.environ.get("SESSION_STATE_TTL", 3600))
+SESSION_STATE_MAX = int(os.environ.get("SESSION_STATE_MAX", 10000))
+
+# Serializes a session's snapshot fold with writes to its history, so a fold never
+# mixes trades from before and after a replace
+analysis_sessions = SessionRegistry(SESSION_STATE_MAX, SESSION_STATE_TTL)
+
+# Worker processes for /api/analyze/batch, started on first use
+batch_pool = None
+batch_pool_lock = threading.Lock()
+
+# Incremental realtime detectors, keyed by the extension's session_id.
+# Each session is scored under its own lock so traders don't wait on each other;
+# an evicted session's detector is rebuilt from its history on the next attempt.
+realtime_sessions = SessionRegistry(SESSION_STATE_MAX, SESSION_STATE_TTL)
+
+# Realtime attempts scored at once; others wait up to REALTIME_QUEUE_TIMEOUT seconds, then get a 503
+REALTIME_MAX_CONCURRENCY = int(os.environ.get("REALTIME_MAX_CONCURRENCY", 8))
+REALTIME_QUEUE_TIMEOUT = float(os.environ.get("REALTIME_QUEUE_TIMEOUT", 0.5))
+realtime_slots = threading.BoundedSemaphore(REALTIME_MAX_CONCURRENCY)
+
+# /api/analyze-csv sends logs up to this size to Gemini as-is; longer ones go as per-chunk digests
+SINGLE_CALL_TRADES = 100
+
+# Send the per-stage breakdown on every response, not just when a request asks for it with an X-Timing header
+TIMING_HEADER = os.environ.get("TIMING_HEADER", "").lower() in ("1", "true", "yes")
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_timing(response):
+    if 'request_start' in g:
+        request_seconds.observe(request.endpoint or 'unknown', time.perf_counter() - g.request_start)
+    if (TIMING_HEADER or 'X-Timing' in request.headers) and g.get('stage_timings'):
+        response.headers['X-Timing'] = timing_header(g.stage_timings)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage and request latency histograms in the Prometheus text format"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def analyze_session_snapshot(session_id):
+    """
+    Analyze a stored session from its saved snapshot, folding in trades appended since.
+
+    Returns:
+        dict: analyze_all() results, or None if the snapshot can't be used
+              (trades out of order); the caller then runs a full analysis
+    """
+    with analysis_sessions.hold(session_id):
+        with timed('snapshot_load'):
+            snapshot = analysis_store.get(session_id)
+            history_length = session_store.count(session_id)
+            # A shorter history than the snapshot covers means the session was replaced
+            if (snapshot is None or history_length < snapshot.history_length
+                    or snapshot.rank_error != ANALYSIS_RANK_ERROR):
+                snapshot = AnalysisSnapshot(ANALYSIS_RANK_ERROR)
+        if history_length > snapshot.history_length:
+            with timed('session_load'):
+                trades = session_store.get_trades(session_id, start=snapshot.history_length)
+            with timed('snapshot_fold'):
+                folded = snapshot.fold(pd.DataFrame(trades))
+            if not folded:
+                analysis_store.clear(session_id)
+                return None
+            with timed('snapshot_save'):
+                analysis_store.put(session_id, snapshot)
+    return snapshot.analyze_all()
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
+    """
+    Analyze a trade log for biases.
+    Input (any of):
+        { "trades": [...] }                       # list of trade objects
+        { "columns": { "Timestamp": [...], ... }, "timestamp_unit": "ms" }
+        { "session_id": "..." }                   # trades stored via /api/sessions
+        Arrow IPC or .npz body with the same four columns (?timestamp_unit=ms)
+    Optional: "rolling": { "window": "7D", "step": "1D" } (or ?window=&step= for binary bodies)
+    adds per-window scores and Human Tax under "rolling" for trend charts.
+    A stored session without "rolling" is analyzed from its saved snapshot, so
+    only trades appended since the last analysis are processed.
+    """
     try:
-        data = request.json
-        trades = data.get('trades', [])
-        
-        if not trades:
-            return jsonify({'error': 'No trading data provided'}), 400
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(trades)
-        
-        # Ensure required columns exist
-        required_cols = ['Timestamp', 'Buy/sell', 'Asset', 'P/L']
-        missing_cols = [col for col in required_cols if col not in df.columns]
-        if missing_cols:
-            return jsonify({'error': f'Missing required columns: {missing_cols}'}), 400
+        results = None
+        # Columnar fast path: typed arrays go straight into the detector without parsing
+        if request.mimetype in ARROW_MIMETYPES or request.mimetype == NPZ_MIMETYPE:
+            timestamp_unit = request.args.get('timestamp_unit', 'ms')
+            loader = frame_from_npz if request.mimetype == NPZ_MIMETYPE else frame_from_arrow
+            try:
+                with timed('dataframe_build'):
+                    df = loader(request.get_data(), timestamp_unit)
+                    detector = BiasDetector(df)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        else:
+            with timed('json_parse'):
+                data = request.json
+            session_id = data.get('session_id') if not data.get('trades') and 'columns' not in data else None
+            wants_rolling = data.get('rolling') or 'window' in request.args
+            if session_id and not wants_rolling and snapshot_supported() and session_store.count(session_id):
+                try:
+                    results = analyze_session_snapshot(session_id)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+            if results is not None:
+                detector = None
+            elif 'columns' in data:
+                try:
+                    with timed('dataframe_build'):
+                        df = frame_from_columns(data['columns'], data.get('timestamp_unit', 'ms'))
+                        detector = BiasDetector(df)
+                except ValueError as e:
+                    return jsonify({'error': str(e)}), 400
+            else:
+                trades = data.get('trades', [])
+                if not trades and data.get('session_id'):
+                    with timed('session_load'):
+                        trades = session_store.get_trades(data['session_id'])
+                
+                if not trades:
+                    return jsonify({'error': 'No trading data provided'}), 400
+                
+                with timed('dataframe_build'):
+                    # Convert to DataFrame
+                    df = pd.DataFrame(trades)
+                    
+                    # Ensure required columns exist
+                    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+                    if missing_cols:
+                        return jsonify({'error': f'Missing required columns: {missing_cols}'}), 400
+                    
+                    # Initialize bias detector
+                    detector = BiasDetector(df)
         
-        # Initialize bias detector
-        detector = BiasDetector(df)
+        if results is None:
+            # Run every detector once; summary, recommendations and statistics reuse the cached results
+            results = detector.analyze_all()
+            for stage, seconds in detector.timings.items():
+                observe_stage(stage, seconds)
         
-        # Detect all biases first to pass to Gemini
-        overtrading = detector.detect_overtrading()
-        loss_aversion = detector.detect_loss_aversion()
-        revenge_trading = detector.detect_revenge_trading()
-        summary = detector.generate_summary()
+        options = request.get_json(silent=True) or {}
+        rolling = options.get('rolling') or ({'window': request.args['window'], 'step': request.args.get('step', '1D')}
+                                             if 'window' in request.args else None)
+        if rolling:
+            try:
+                with timed('rolling'):
+                    trend = detector.rolling(rolling.get('window', '7D'), rolling.get('step', '1D'))
+            except ValueError as e:
+                return jsonify({'error': f'Invalid rolling window: {e}'}), 400
+            trend['start'] = trend['start'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+            trend['end'] = trend['end'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+            results['rolling'] = trend.to_dict('records')
         
         # Determine recommendations source
         if gemini_coach.model:
             # Prepare analysis data for Gemini
-            bias_analysis = {
-                'overtrading': overtrading,
-                'loss_aversion': loss_aversion,
-                'revenge_trading': revenge_trading,
-                'summary': summary
-            }
-            try:
-                recommendations = gemini_coach.generate_recommendations(bias_analysis)
-                if not recommendations: # Fallback if Gemini returns empty list
-                     print("⚠️ Gemini returned no recommendations. Using fallback.")
-                     recommendations = detector.generate_recommendations()
-            except Exception as e:
-                print(f"❌ Gemini generation failed, falling back: {e}")
-                recommendations = detector.generate_recommendations()
+            bias_analysis = {name: results[name] for name in section_detectors()}
+            bias_analysis['summary'] = results['summary']
+            # Wait a bounded time for Gemini; the deterministic recommendations stay if it's slow or down
+            job_id = gemini_coach.start_recommendations(bias_analysis)
+            with timed('gemini_wait'):
+                status, recommendations = gemini_coach.wait(job_id, RECOMMENDATIONS_DEADLINE) if job_id else ('skipped', None)
+            if status == 'done' and recommendations:
+                results['recommendations'] = recommendations
+            elif status == 'pending':
+                print("⏱️ Gemini recommendations not ready in time. Using fallback.")
+                results['recommendations_job'] = job_id
+            elif status == 'done': # Fallback if Gemini returns empty list
+                print("⚠️ Gemini returned no recommendations. Using fallback.")
+            else:
+                print(f"❌ Gemini generation {status}, falling back: {recommendations}")
         else:
             print("ℹ️ Gemini not configured (no API key). Using standard recommendations.")
-            recommendations = detector.generate_recommendations()
-
-        results = {
-            'overtrading': overtrading,
-            'loss_aversion': loss_aversion,
-            'revenge_trading': revenge_trading,
-            'summary': summary,
-            'recommendations': recommendations,
-            'statistics': detector.get_statistics()
-        }
         
         return jsonify(results)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """
+    Analyze many accounts in parallel with the local detectors (no Gemini calls).
+    Input (either):
+        { "accounts": [{ "account_id": "...", "trades": [...] }, ...] }
+        NDJSON body (application/x-ndjson), one account object per line; read lazily
+    Accounts may send "columns" (+ "timestamp_unit") instead of "trades".
+    Output: NDJSON, one line per account in completion order, each with its account_id
+    and either the /api/analyze results or an "error". A malformed NDJSON line
+    gives { "line": n, "error": "..." } instead.
+    Optional ?max_pending=N caps how many accounts are queued on the workers at once.
+    """
+    global batch_pool
+    
+    ndjson = request.mimetype == 'application/x-ndjson'
+    if not ndjson:
+        data = request.get_json(silent=True) or {}
+        accounts = data.get('accounts')
+        if not isinstance(accounts, list) or not accounts:
+            return jsonify({'error': 'No accounts provided'}), 400
+    
+    with batch_pool_lock:
+        if batch_pool is None:
+            batch_pool = create_pool(BATCH_WORKERS)
+    
+    max_pending = request.args.get('max_pending', type=int)
+    if ndjson:
+        # Stream accounts off the request body as the workers free up
+        results = iter_ndjson_batch_results(request.stream, executor=batch_pool, max_workers=BATCH_WORKERS,
+                                            max_pending=max_pending)
+    else:
+        results = iter_batch_results(accounts, executor=batch_pool, max_workers=BATCH_WORKERS, max_pending=max_pending)
+    return Response(stream_with_context(line + '\n' for line in results), mimetype='application/x-ndjson')
+
 @app.route('/api/analyze-csv', methods=['POST'])
 def analyze_csv():
     """
-    Full CSV analysis via Gemini (replaces local bias detection for reports).
-    Input: { "trades": [...] }
+    Full 13-bias report for the extension popup.
+    Input: { "trades": [...] } or { "session_id": "..." } to analyze a stored session
+    Optional: "llm_scores": true to have Gemini score the biases instead of the local detectors
+    
+    The local report (biases, primary_bias, discipline_score, human_tax_estimate)
+    comes back immediately with a static coaching_insight; when Gemini is
+    configured, "insight_job" is a background job (/api/coach/jobs/<id>) whose
+    result is Gemini's narrative insight.
     """
     print("🚀 Received request at /api/analyze-csv")
     try:
         data = request.json
         trades = data.get('trades', [])
+        if not trades and data.get('session_id'):
+            with timed('session_load'):
+                trades = session_store.get_trades(data['session_id'])
         
         if not trades:
             return jsonify({'error': 'No trading data provided'}), 400
-            
-        # Limit to last 100 trades to fit in context window and keep costs down
-        # Sort by timestamp? Assuming they come sorted or we sort them.
-        # But for "behavior", recency matters most.
-        sample_size = 100
-        if len(trades) > sample_size:
-            # Take the last N trades
-            trades_sample = trades[-sample_size:]
-        else:
-            trades_sample = trades
-            
-        print(f"📊 Analyzing CSV with Gemini ({len(trades_sample)} trades)...")
-        analysis = gemini_coach.analyze_trade_data(trades_sample)
         
-        return jsonify(analysis)
+        if data.get('llm_scores'):
+            return analyze_csv_with_gemini(trades)
+        
+        try:
+            with timed('dataframe_build'):
+                df = pd.DataFrame(trades)
+                missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+                if missing_cols:
+                    return jsonify({'error': f'Missing required columns: {missing_cols}'}), 400
+                detector = BiasDetector(df)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid trading data: {e}'}), 400
+        
+        report = detector.detect_behavioral_biases()
+        for stage, seconds in detector.timings.items():
+            observe_stage(stage, seconds)
+        report = {**report, 'coaching_insight': gemini_coach.fallback_insight(report)}
+        
+        # Gemini only adds the narrative; the report never waits for it
+        if gemini_coach.api_key:
+            insight_job = gemini_coach.start_insight(report, detector.df)
+            if insight_job:
+                report['insight_job'] = insight_job
+        
+        return jsonify(report)
         
     except Exception as e:
         print(f"❌ Error in /api/analyze-csv: {e}")
         return jsonify({'error': str(e)}), 500
 
+def analyze_csv_with_gemini(trades):
+    """/api/analyze-csv with Gemini scoring the 13 biases (single call or map-reduce over digests)"""
+    if not gemini_coach.api_key:
+        return jsonify({"error": "Gemini API key not configured"})
+    
+    if len(trades) <= SINGLE_CALL_TRADES:
+        print(f"📊 Analyzing CSV with Gemini ({len(trades)} trades)...")
+        job_id = gemini_coach.start_analysis(trades)
+    else:
+        # Too long to send trade by trade: digest the whole history locally, then map-reduce over the chunks
+        try:
+            with timed('digest_build'):
+                digests = build_digests(trades)
+        except (ValueError, KeyError) as e:
+            return jsonify({'error': f'Invalid trading data: {e}'}), 400
+        print(f"📊 Analyzing CSV with Gemini ({len(trades)} trades in {len(digests['chunks'])} chunks)...")
+        job_id = gemini_coach.start_digest_analysis(digests)
+    if job_id is None:
+        return jsonify({'error': 'Gemini is temporarily unavailable, please try again shortly'}), 503
+    
+    # Long analyses keep running in the background; the client polls /api/coach/jobs/<job_id>
+    with timed('gemini_wait'):
+        status, analysis = gemini_coach.wait(job_id, ANALYSIS_DEADLINE)
+    if status == 'pending':
+        return jsonify({'status': 'pending', 'job_id': job_id}), 202
+    if status == 'failed':
+        return jsonify({'error': analysis})
+    
+    return jsonify(analysis)
+
+@app.route('/api/upload-csv', methods=['POST'])
+def upload_csv():
+    """
+    Analyze a CSV export of any size without holding it in memory.
+    Input: multipart form with a 'file' field, or the raw CSV as the request body.
+    Rows must be in chronological order. Column headers may use the same
+    aliases as the web UI (Action, Symbol, PnL, Profit).
+    """
+    try:
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        
+        # Each chunk is folded into the incremental detector and then discarded
+        detector = StreamingBiasDetector()
+        try:
+            with timed('csv_ingest'):
+                for chunk in iter_csv_chunks(stream):
+                    detector.add_columns(chunk['Timestamp'], chunk['Asset'], chunk['P/L'])
+        except (ValueError, pd.errors.EmptyDataError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if detector.trade_count == 0:
+            return jsonify({'error': 'No valid trading data found after processing'}), 400
+        
+        results = detector.analyze_all()
+        if detector.out_of_order_trades:
+            results['warnings'] = [f'{detector.out_of_order_trades} trades were out of chronological order; '
+                                   'sort the file by Timestamp for accurate results']
+        return jsonify(results)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/mock-data', methods=['GET'])
 def mock_data():
-    """Generate mock trading data for testing"""
-    generator = MockDataGenerator()
+    """Generate mock trading data for testing (?seed=N for a reproducible log)"""
+    generator = MockDataGenerator(seed=request.args.get('seed', type=int))
     mock_trades = generator.generate()
     return jsonify({'trades': mock_trades})
 
+def score_realtime_attempt(data, session_id, history, history_length):
+    """Fold new history into the session's incremental detector and score the attempt in `data`."""
+    if not session_id:
+        return fold_and_score(StreamingBiasDetector(), data, session_id, history)
+    
+    with realtime_sessions.hold(session_id) as session:
+        # Reuse the session's incremental detector and only fold in trades it hasn't seen yet.
+        # A shorter history means it was cleared, so start over.
+        if session.state is None or session.state.history_length > history_length:
+            session.state = StreamingBiasDetector()
+        return fold_and_score(session.state, data, session_id, history)
+
+def fold_and_score(detector, data, session_id, history):
+    with timed('realtime_update'):
+        if history:
+            detector.add_trades(history[detector.history_length:])
+        else:
+            detector.add_trades(session_store.get_trades(session_id, start=detector.history_length))
+    
+    # Score the CURRENT trade attempt as if it were appended to the history
+    attempt_time = data.get('timestamp') or datetime.now()
+    with timed('score_attempt'):
+        return detector.score_attempt(attempt_time, data.get('asset', 'Unknown'), data.get('action', 'buy'))
+
 @app.route('/api/realtime', methods=['POST'])
 def realtime_intervention():
     """
@@ -145,38 +436,36 @@ def realtime_intervention():
         "action": "buy",
         "asset": "BTC",
         "price": 50000,
-        "history": [...] # Recent trades
+        "session_id": "...", # Optional, enables incremental scoring across calls
+        "history": [...] # Recent trades; omit to use the session's stored trades
     }
     """
     try:
-        data = request.json
-        # Check logic here...
-        # For MVP, we can just check the last few trades in 'history'
-        
+        with timed('json_parse'):
+            data = request.json
+        session_id = data.get('session_id')
         history = data.get('history', [])
-        if not history:
-             return jsonify({'bias_detected': False, 'message': 'No history provided for analysis'}), 200
-
-        # Create DataFrame from history
-        df = pd.DataFrame(history)
-        
-        # Append the CURRENT trade attempt to the DataFrame to analyze its impact
-        # We need to normalize the current trade to match the DataFrame structure
-        current_trade = {
-            'Timestamp': datetime.now().isoformat(),
-            'Buy/sell': data.get('action', 'buy'),
-            'Asset': data.get('asset', 'Unknown'),
-            'P/L': 0 # Dummy P/L for the current open attempt
-        }
-        df_current = pd.DataFrame([current_trade])
-        df = pd.concat([df, df_current], ignore_index=True)
-
-        detector = BiasDetector(df)
-        
-        # Check for immediate red flags
-        # We specifically want to know if the *latest* trade (the attempt) triggers these
-        revenge = detector.detect_revenge_trading()
-        overtrading = detector.detect_overtrading()
+        
+        if history:
+            history_length = len(history)
+        elif session_id:
+            # No history in the request: score against the stored session
+            history_length = session_store.count(session_id)
+        else:
+            history_length = 0
+        if history_length == 0:
+            return jsonify({'bias_detected': False, 'message': 'No history provided for analysis'}), 200
+
+        # Shed load instead of queueing without bound when every scoring slot is busy
+        if not realtime_slots.acquire(timeout=REALTIME_QUEUE_TIMEOUT):
+            return jsonify({'error': 'Server busy, please retry'}), 503, {'Retry-After': '1'}
+        try:
+            scores = score_realtime_attempt(data, session_id, history, history_length)
+        finally:
+            realtime_slots.release()
+        
+        revenge = scores['revenge_trading']
+        overtrading = scores['overtrading']
         
         bias_detected = False
         bias_type = ""
@@ -192,8 +481,24 @@ def realtime_intervention():
             severity = 6 if overtrading['severity'] == 'High' else 4
             
         if bias_detected:
-            # Generate affective message via Gemini
-            message = gemini_coach.generate_intervention(bias_type, severity, data)
+            # The decision never waits on Gemini. Tiers: pre-generated message bank, cached Gemini
+            # message, then a live call (on a miss, or sampled) the client polls via intervention_job
+            # while showing the static fallback. Repeat clicks share one queued call.
+            message = (gemini_coach.bank_intervention(bias_type, severity, data)
+                       or gemini_coach.cached_intervention(bias_type, severity, data))
+            status = 'done' if message else 'skipped'
+            intervention_job = None
+            if not message or gemini_coach.sample_live_intervention():
+                intervention_job = gemini_coach.start_intervention(bias_type, severity, data, user_id=session_id)
+                if intervention_job and not message:
+                    with timed('gemini_wait'):
+                        status, result = gemini_coach.wait(intervention_job, INTERVENTION_DEADLINE)
+                    if status == 'done':
+                        message = result
+                elif intervention_job:
+                    status = 'pending'
+            if not message:
+                message = gemini_coach.fallback_intervention(bias_type)
             
             # Calculate Human Tax Impact
             human_tax_impact = 0.0
@@ -209,7 +514,8 @@ def realtime_intervention():
                 'bias_type': bias_type,
                 'severity': severity,
                 'intervention_message': message,
-                'human_tax_impact': human_tax_impact
+                'human_tax_impact': human_tax_impact,
+                **({'intervention_job': intervention_job} if status == 'pending' else {})
             })
         else:
             return jsonify({'bias_detected': False, 'human_tax_impact': 0.0})
@@ -217,5 +523,81 @@ def realtime_intervention():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/coach/jobs/<job_id>', methods=['GET'])
+def coach_job(job_id):
+    """
+    Poll a background Gemini job started by /api/analyze, /api/analyze-csv or /api/realtime.
+    Returns { "status": "pending" | "done" | "failed", "result": ... }
+    """
+    status, result = gemini_coach.poll(job_id)
+    if status == 'unknown':
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify({'status': status, 'result': result})
+
+@app.route('/api/coach/cache', methods=['GET'])
+def coach_cache_stats():
+    """Hit/miss counters for the Gemini response cache"""
+    return jsonify(gemini_coach.cache.stats())
+
+@app.route('/api/coach/queue', methods=['GET'])
+def coach_queue_stats():
+    """Gemini jobs queued or running, and the limit beyond which new calls fall back"""
+    return jsonify(gemini_coach.queue_stats())
+
+@app.route('/api/sessions/<session_id>/trades', methods=['GET'])
+def get_session_trades(session_id):
+    """Return the trades stored for a session, oldest first"""
+    return jsonify({'session_id': session_id, 'trades': session_store.get_trades(session_id)})
+
+@app.route('/api/sessions/<session_id>/trades', methods=['POST', 'PUT'])
+def store_session_trades(session_id):
+    """
+    Store trades server-side so clients can reference them by session_id.
+    POST appends to the session's history, PUT replaces it.
+    Input: { "trades": [...] } or a single trade object
+    Optional on POST: "expected_count", the number of trades the client believes
+    are already stored; on a mismatch nothing is appended and a 409 with the
+    actual trade_count tells the client to resync with a PUT.
+    """
+    try:
+        data = request.json
+        trades = data.get('trades', [data]) if isinstance(data, dict) else data
+        expected_count = data.get('expected_count') if isinstance(data, dict) and 'trades' in data else None
+        if expected_count is not None and (not isinstance(expected_count, int) or isinstance(expected_count, bool)):
+            return jsonify({'error': 'expected_count must be an integer'}), 400
+        if not trades:
+            return jsonify({'error': 'No trading data provided'}), 400
+        
+        for trade in trades:
+            missing_cols = [col for col in TRADE_FIELDS if col not in trade]
+            if missing_cols:
+                return jsonify({'error': f'Missing required columns: {missing_cols}'}), 400
+        
+        with analysis_sessions.hold(session_id):
+            if request.method == 'POST' and expected_count is not None:
+                stored = session_store.count(session_id)
+                if stored != expected_count:
+                    return jsonify({'error': 'Session history out of sync', 'session_id': session_id,
+                                    'trade_count': stored}), 409
+            if request.method == 'PUT':
+                session_store.clear(session_id)
+                analysis_store.clear(session_id)
+                realtime_sessions.discard_state(session_id)
+            trade_count = session_store.append(session_id, trades)
+        return jsonify({'session_id': session_id, 'trade_count': trade_count})
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def clear_session(session_id):
+    """Delete a session's stored trades and realtime state"""
+    with analysis_sessions.hold(session_id):
+        session_store.clear(session_id)
+        analysis_store.clear(session_id)
+    realtime_sessions.discard_state(session_id)
+    return jsonify({'session_id': session_id, 'trade_count': 0})
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    # Development server only; see README for running under a WSGI server
+    app.run(debug=os.environ.get("FLASK_DEBUG", "").lower() in ("1", "true", "yes"), host='0.0.0.0', port=5001)
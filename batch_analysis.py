@@ -0,0 +1,192 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+
+import detector_registry
+from bias_detector import BiasDetector
+from trade_ingest import REQUIRED_COLUMNS, frame_from_columns
+
+# Worker processes used by /api/analyze/batch
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def _json_default(obj):
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def analyze_account(account_id, trades=None, columns=None, timestamp_unit='ms'):
+    """
+    Run the local bias detectors over one account's trade log.
+
+    Args:
+        account_id: Identifier echoed back in the result
+        trades (list): Trade dictionaries, as accepted by /api/analyze
+        columns (dict): Column arrays instead of `trades` (see trade_ingest.frame_from_columns)
+        timestamp_unit (str): Unit of numeric timestamps in `columns`
+
+    Returns:
+        dict: {'account_id', ...analyze_all() results} or {'account_id', 'error'}
+    """
+    try:
+        if columns is not None:
+            detector = BiasDetector(frame_from_columns(columns, timestamp_unit))
+        else:
+            if not trades:
+                return {'account_id': account_id, 'error': 'No trading data provided'}
+            df = pd.DataFrame(trades)
+            missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+            if missing_cols:
+                return {'account_id': account_id, 'error': f'Missing required columns: {missing_cols}'}
+            detector = BiasDetector(df)
+        return {'account_id': account_id, **detector.analyze_all()}
+    except Exception as e:
+        return {'account_id': account_id, 'error': str(e)}
+
+
+def _analyze_account_json(account):
+    # Serialize in the worker so the parent only forwards finished NDJSON lines
+    result = analyze_account(
+        account.get('account_id'),
+        trades=account.get('trades'),
+        columns=account.get('columns'),
+        timestamp_unit=account.get('timestamp_unit', 'ms')
+    )
+    return json.dumps(result, default=_json_default)
+
+
+def _init_worker():
+    # Each worker process is already one unit of parallelism; its detectors run inline
+    # rather than on a thread pool, so N workers use N cores instead of N x DETECTOR_WORKERS threads
+    detector_registry.DETECTOR_WORKERS = 1
+
+
+def create_pool(max_workers=None):
+    """
+    Process pool for batch analysis.
+
+    Uses the 'spawn' start method so workers don't inherit the parent's
+    threads and locks (the web server runs Gemini and request threads).
+    Workers run their detectors single-threaded.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers or BATCH_WORKERS,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker
+    )
+
+
+def iter_parallel(fn, items, executor=None, max_workers=None, max_pending=None):
+    """
+    Apply a picklable `fn` to each item on a process pool, yielding results as they finish.
+
+    `items` is consumed lazily and at most `max_pending` items are in
+    flight at once, so a slow consumer or a huge input never piles up work
+    in memory. Results arrive in completion order, not input order.
+
+    Args:
+        fn (callable): Module-level function taking one item
+        items (iterable): Work items
+        executor (ProcessPoolExecutor): Pool to use; a temporary one is created if omitted
+        max_workers (int): Worker processes in the pool (default BATCH_WORKERS)
+        max_pending (int): Items submitted but not yet yielded (default 2x workers)
+
+    Yields:
+        fn(item) for each item
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = create_pool(max_workers)
+    max_pending = max_pending or 2 * (max_workers or BATCH_WORKERS)
+
+    pending = set()
+    try:
+        for item in items:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(fn, item))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_batch_results(accounts, executor=None, max_workers=None, max_pending=None):
+    """
+    Analyze many accounts in parallel, yielding each result as soon as it finishes.
+
+    Args:
+        accounts (iterable): Dicts with 'account_id' and 'trades' (or 'columns' and optional 'timestamp_unit')
+        executor, max_workers, max_pending: See iter_parallel()
+
+    Yields:
+        str: One JSON-encoded result per account (see analyze_account)
+    """
+    return iter_parallel(_analyze_account_json, accounts, executor, max_workers, max_pending)
+
+
+def _parse_accounts(lines, errors):
+    # Lines that aren't a JSON object are set aside in `errors` instead of raising mid-stream
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            account = json.loads(line)
+        except ValueError as e:
+            errors.append({'line': number, 'error': f'Invalid JSON: {e}'})
+            continue
+        if not isinstance(account, dict):
+            errors.append({'line': number, 'error': 'Expected one account object per line'})
+            continue
+        yield account
+
+
+def iter_ndjson_batch_results(lines, executor=None, max_workers=None, max_pending=None):
+    """
+    iter_batch_results() over NDJSON lines, one account object per line, parsed lazily.
+
+    A malformed line yields {"line": n, "error": ...} among the results
+    instead of ending the stream.
+
+    Yields:
+        str: One JSON-encoded result per line
+    """
+    errors = []
+    for result in iter_batch_results(_parse_accounts(lines, errors), executor, max_workers, max_pending):
+        while errors:
+            yield json.dumps(errors.pop(0))
+        yield result
+    for error in errors:
+        yield json.dumps(error)
+
+
+def analyze_batch(accounts, max_workers=None, max_pending=None):
+    """
+    Analyze many accounts in parallel.
+
+    Returns:
+        dict: account_id to analyze_account() result
+    """
+    results = {}
+    for line in iter_batch_results(accounts, max_workers=max_workers, max_pending=max_pending):
+        result = json.loads(line)
+        results[result['account_id']] = result
+    return results
@@ -0,0 +1,185 @@
+"""
+Benchmark BiasDetector and the Flask request paths on synthetic trade logs.
+
+    python benchmark.py                              # 1k / 100k / 1M trades
+    python benchmark.py --sizes 1000 10000000        # up to 10M
+    python benchmark.py --save-baseline              # store results as the baseline
+    python benchmark.py --baseline benchmark_baseline.json --tolerance 1.25
+
+Logs come from MockDataGenerator with a fixed seed, so runs are
+comparable. Every timing is the best of --repeat runs with the detector's
+memoized results cleared first. Results are written to --output as JSON.
+When a baseline exists, each timing is compared with it, and the script
+exits with status 1 if any timing is more than --tolerance times slower
+(ignoring slowdowns under --min-delta-ms).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bias_detector import BiasDetector
+from mock_data_generator import MockDataGenerator
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DETECTOR_METHODS = ['detect_overtrading', 'detect_loss_aversion', 'detect_revenge_trading',
+                    'calculate_human_tax', 'get_statistics', 'analyze_all']
+
+
+def make_generator(num_trades, seed=42):
+    """Reproducible mock trade log generator."""
+    return MockDataGenerator(num_trades=num_trades, seed=seed)
+
+
+def best_of(fn, repeat, setup=None):
+    """Best wall-clock time of `repeat` calls to fn(), running setup() untimed before each."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_detector(df, repeat):
+    timings = {'init': best_of(lambda: BiasDetector(df), repeat)}
+    detector = BiasDetector(df)
+    for name in DETECTOR_METHODS:
+        method = getattr(detector, name)
+        timings[name] = best_of(method, repeat, setup=detector._results.clear)
+    return timings
+
+
+def bench_endpoints(trades, repeat):
+    """Time the /api/analyze and /api/realtime request paths through Flask's test client."""
+    import app as app_module
+    # Measure the local paths only; never call Gemini from a benchmark
+    app_module.gemini_coach.model = None
+    app_module.gemini_coach.api_key = None
+    client = app_module.app.test_client()
+
+    def post(path, payload):
+        response = client.post(path, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+
+    timings = {'api_analyze': best_of(lambda: post('/api/analyze', {'trades': trades}), repeat)}
+
+    # Realtime with the history in the request (scored from scratch on every call)
+    attempt = {'action': 'buy', 'asset': 'BTC', 'timestamp': trades[-1]['Timestamp']}
+    timings['api_realtime_history'] = best_of(
+        lambda: post('/api/realtime', {**attempt, 'history': trades}), repeat)
+
+    # Realtime against a stored session: the first call folds in the history, later calls are incremental
+    session_id = f'benchmark-{len(trades)}'
+    app_module.session_store.clear(session_id)
+    app_module.session_store.append(session_id, trades)
+
+    def reset_session():
+        app_module.realtime_sessions.discard_state(session_id)
+
+    timings['api_realtime_session_cold'] = best_of(
+        lambda: post('/api/realtime', {**attempt, 'session_id': session_id}), repeat, setup=reset_session)
+    timings['api_realtime_session_warm'] = best_of(
+        lambda: post('/api/realtime', {**attempt, 'session_id': session_id}), max(repeat, 5))
+    app_module.session_store.clear(session_id)
+    reset_session()
+    return timings
+
+
+def compare(results, baseline, tolerance, min_delta=0.002):
+    """
+    Compare timings with a baseline.
+
+    A timing regresses when it is more than `tolerance` times the baseline
+    and at least `min_delta` seconds slower, so sub-millisecond jitter
+    doesn't fail a run.
+
+    Returns:
+        list: (size, name, baseline seconds, current seconds, ratio) for every regression
+    """
+    regressions = []
+    for size, timings in results['results'].items():
+        for name, seconds in timings.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            ratio = seconds / base
+            regressed = ratio > tolerance and seconds - base >= min_delta
+            flag = '❌' if regressed else '✅'
+            print(f"{flag} {size:>9} {name:<28} {base * 1000:10.2f} ms -> {seconds * 1000:10.2f} ms ({ratio:.2f}x)")
+            if regressed:
+                regressions.append((size, name, base, seconds, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark BiasDetector and the Flask endpoints.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Trade log sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per timing (best is kept)')
+    parser.add_argument('--http-max-size', type=int, default=100000,
+                        help='Largest log sent through the Flask endpoints (JSON bodies get large)')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the results')
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help='Baseline to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='Allowed slowdown factor vs the baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='Ignore slowdowns smaller than this many milliseconds')
+    args = parser.parse_args(argv)
+
+    results = {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat
+        },
+        'results': {}
+    }
+
+    for size in args.sizes:
+        print(f"📊 Generating {size:,} trades...", file=sys.stderr)
+        generator = make_generator(size)
+        # Fewer runs for the big logs keeps a full run in minutes, not hours
+        repeat = args.repeat if size <= 100000 else 1
+        timings = bench_detector(generator.generate_frame(), repeat)
+        if size <= args.http_max_size:
+            timings.update(bench_endpoints(generator.generate(), repeat))
+        results['results'][str(size)] = timings
+        for name, seconds in timings.items():
+            print(f"   {name:<28} {seconds * 1000:10.2f} ms", file=sys.stderr)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {args.output}", file=sys.stderr)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms / 1000)
+        if regressions:
+            print(f"❌ {len(regressions)} timings regressed by more than {args.tolerance}x", file=sys.stderr)
+            return 1
+        print("✅ No regressions against the baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
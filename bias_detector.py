@@ -5,32 +5,546 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from collections import defaultdict
+from functools import wraps
+import time
+
+from detector_registry import (register_feature, register_detector, resolve_features, build_features,
+                               run_concurrently, section_detectors, behavioral_detectors, DETECTORS)
+
+NS_PER_DAY = 24 * 60 * 60 * 10**9
+
+# The 13 behavioral biases in the full report, in the order the Gemini analysis lists them
+BEHAVIORAL_BIASES = ['Loss Aversion', 'Confirmation Bias', 'Revenge Trading', 'Herd Mentality',
+                     'Sunk Cost Fallacy', 'Overconfidence', 'Availability Bias', 'Recency Bias',
+                     'Anchoring Bias', "Gambler's Fallacy", 'Mental Accounting', 'Disposition Effect',
+                     'Clean Trades']
+
+# Crowded tickers for Herd Mentality
+POPULAR_TICKERS = {'TSLA', 'NVDA', 'AAPL'}
+
+
+def _memoized(method):
+    """
+    Cache a BiasDetector method's result until the underlying data changes.
+    
+    The time each result took to compute is kept in self.timings (seconds,
+    including any other methods it computed first).
+    """
+    @wraps(method)
+    def wrapper(self):
+        key = method.__name__
+        if key not in self._results:
+            start = time.perf_counter()
+            self._results[key] = method(self)
+            self.timings[key] = time.perf_counter() - start
+        return self._results[key]
+    return wrapper
+
+
+def _loss_streaks(is_loss):
+    """
+    Length of the losing streak each trade belongs to, counted up to and including it.
+    
+    Run-length encoded with cumulative maxima: every non-loss resets the
+    counter, so a trade's streak is its distance from the last reset.
+    """
+    is_loss = np.asarray(is_loss, dtype=bool)
+    positions = np.arange(1, len(is_loss) + 1)
+    last_reset = np.maximum.accumulate(np.where(is_loss, 0, positions))
+    return positions - last_reset
+
+
+def _streak_lengths(streaks):
+    """Lengths of the completed losing streaks in a _loss_streaks() array."""
+    streaks = np.asarray(streaks)
+    run_ends = (streaks > 0) & (np.append(streaks[1:], 0) == 0)
+    return streaks[run_ends]
+
+
+def _window_sums(values, lo, hi):
+    """Sum of `values[lo:hi]` for every (lo, hi) pair, via one prefix sum."""
+    prefix = np.concatenate(([0], np.cumsum(values, dtype=np.float64)))
+    return prefix[hi] - prefix[lo]
+
+
+def _window_max(values, lo, hi):
+    """Max of `values[lo:hi]` for every non-empty (lo, hi) pair, in one reduceat call."""
+    values = np.append(np.asarray(values, dtype=np.float64), -np.inf)
+    bounds = np.empty(2 * len(lo), dtype=np.int64)
+    bounds[0::2] = lo
+    bounds[1::2] = hi
+    return np.maximum.reduceat(values, bounds)[0::2]
+
+
+def _day_starts(day):
+    """Row positions where each day's run starts in a time-sorted log, or None if days aren't contiguous."""
+    if not (np.diff(day) >= 0).all():
+        return None
+    return np.flatnonzero(np.diff(day, prepend=day[0] - 1))
+
+
+def _ratio(numerator, denominator, default=0.0):
+    return float(numerator / denominator) if denominator else default
+
+
+def _scaled(value, full_at):
+    """0 at value 0, 100 at `full_at` and beyond."""
+    return float(np.clip(value / full_at * 100, 0, 100))
+
+
+# Per-trade features, built once per detector for every detector that declares them.
+# CORE_FEATURES are always built: statistics, Human Tax and rolling() read them too.
+
+@register_feature('Is_Loss')
+def _is_loss(detector, f):
+    return detector.df['P/L'] < 0
+
+
+@register_feature('Is_Win')
+def _is_win(detector, f):
+    return detector.df['P/L'] > 0
+
+
+@register_feature('Time_Since_Prev')
+def _time_since_prev(detector, f):
+    """Minutes since the previous trade (NaN for the first)."""
+    time_since_prev = np.empty(len(detector.df))
+    time_since_prev[0] = np.nan
+    time_since_prev[1:] = np.diff(detector.timestamps_ns) / 1e9 / 60
+    return time_since_prev
+
+
+@register_feature('Prev_PL')
+def _prev_pl(detector, f):
+    return detector.df['P/L'].shift(1)
+
+
+@register_feature('Has_Prev', requires=('Prev_PL',))
+def _has_prev(detector, f):
+    return f['Prev_PL'].notna()
+
+
+@register_feature('Prev_Is_Loss', requires=('Has_Prev', 'Prev_PL'))
+def _prev_is_loss(detector, f):
+    return f['Has_Prev'] & (f['Prev_PL'] < 0)
+
+
+@register_feature('Same_Asset_As_Prev')
+def _same_asset_as_prev(detector, f):
+    asset_codes = detector.df['Asset'].cat.codes.to_numpy()
+    same_asset = np.zeros(len(asset_codes), dtype=bool)
+    same_asset[1:] = (asset_codes[1:] == asset_codes[:-1]) & (asset_codes[1:] >= 0)
+    return same_asset
+
+
+@register_feature('Abs_PL')
+def _abs_pl(detector, f):
+    return detector.df['P/L'].abs()
+
+
+@register_feature('Loss_Streak', requires=('Is_Loss',))
+def _loss_streak(detector, f):
+    return _loss_streaks(f['Is_Loss'].to_numpy())
+
+
+@register_feature('Daily_Trade_Num')
+def _daily_trade_num(detector, f):
+    """1 for the first trade of each day, 2 for the second..."""
+    day = detector.days
+    day_start = _day_starts(day)
+    if day_start is not None:
+        # Days are contiguous runs: number trades by distance from the run start
+        positions = np.arange(len(day))
+        return positions - day_start[np.searchsorted(day_start, positions, side='right') - 1] + 1
+    return pd.Series(day).groupby(day).cumcount().to_numpy() + 1
+
+
+CORE_FEATURES = ('Is_Loss', 'Is_Win', 'Time_Since_Prev', 'Prev_PL', 'Has_Prev', 'Prev_Is_Loss',
+                 'Same_Asset_As_Prev', 'Abs_PL', 'Loss_Streak', 'Daily_Trade_Num')
+
+
+@register_feature('Is_Buy')
+def _is_buy(detector, f):
+    """Buy side (False for every trade when the log has no Buy/sell column)."""
+    if not detector.has_sides:
+        return np.zeros(len(detector.df), dtype=bool)
+    sides = detector.df['Buy/sell']
+    codes = sides.cat.codes.to_numpy()
+    is_buy_category = np.asarray(sides.cat.categories.astype(str).str.lower().str.startswith('b'))
+    return (codes >= 0) & is_buy_category[codes]
+
+
+@register_feature('Side_Flip', requires=('Is_Buy',))
+def _side_flip(detector, f):
+    is_buy = np.asarray(f['Is_Buy'])
+    return np.concatenate(([False], is_buy[1:] != is_buy[:-1]))
+
+
+@register_feature('Prev_Asset_PL')
+def _prev_asset_pl(detector, f):
+    """P/L of the previous trade in the same asset (NaN for an asset's first trade)."""
+    return detector.df['P/L'].groupby(detector.df['Asset'].cat.codes.to_numpy()).shift(1).to_numpy()
+
+
+@register_feature('Win_Streak', requires=('Is_Win',))
+def _win_streak(detector, f):
+    return _loss_streaks(f['Is_Win'].to_numpy())
+
+
+@register_feature('Prev_Streak', requires=('Win_Streak', 'Loss_Streak'))
+def _prev_streak(detector, f):
+    """Length of the winning or losing streak the trade follows."""
+    streak = np.maximum(f['Win_Streak'], np.asarray(f['Loss_Streak']))
+    return np.concatenate(([0], streak[:-1]))
+
+
+@register_feature('Asset_Day_Trades')
+def _asset_day_trades(detector, f):
+    """Trades in the same asset on the same day."""
+    asset_codes = detector.df['Asset'].cat.codes.to_numpy()
+    return pd.Series(asset_codes).groupby([asset_codes, detector.days]).transform('size').to_numpy()
+
+
+@register_feature('Day_PnL_Before')
+def _day_pnl_before(detector, f):
+    """P/L realized earlier the same day."""
+    pl = detector.df['P/L'].to_numpy()
+    return pd.Series(pl).groupby(detector.days).cumsum().to_numpy() - pl
+
+
+def score_overtrading(avg_trades_per_day, max_trades_per_day, rapid_trade_pct,
+                      frequency_increase_ratio, cost_to_return_ratio, total_net_return):
+    """
+    Score overtrading from its aggregate metrics.
+    
+    Shared by BiasDetector and the streaming detector so both apply the
+    same thresholds.
+    
+    Returns:
+        dict: detected, severity and score (0-100)
+    """
+    # Score calculation based on harmful patterns
+    score = 0
+    
+    # Pattern 1: Excessively high trades per day (threshold: >10/day average or >25/day max for manual traders)
+    if avg_trades_per_day > 10:
+        score += min(25, (avg_trades_per_day / 10) * 10)
+    if max_trades_per_day > 25:
+        score += min(20, (max_trades_per_day / 25) * 10)
+    
+    # Pattern 2: Rapid-fire trades (>20% within 1 minute)
+    if rapid_trade_pct > 20:
+        score += min(25, (rapid_trade_pct / 20) * 10)
+    elif rapid_trade_pct > 10:
+        score += min(15, (rapid_trade_pct / 10) * 5)
+    
+    # Pattern 3: Increasing frequency after small moves (ratio > 3.0 indicates faster trading)
+    if frequency_increase_ratio > 3.0:
+        score += min(10, (frequency_increase_ratio / 3.0) * 6)
+    
+    # Pattern 4: High transaction costs relative to returns (>80% of net return)
+    if cost_to_return_ratio > 0.8 and total_net_return > 0:
+        score += min(10, (cost_to_return_ratio / 0.8) * 6)
+    elif cost_to_return_ratio > 1.5:
+        score += 15  # Costs greatly exceed returns
+    
+    severity = 'Low' if score < 50 else 'Moderate' if score < 80 else 'High'
+    
+    return {
+        'detected': score > 50,
+        'severity': severity,
+        'score': min(100, round(score, 1))
+    }
+
+
+def score_loss_aversion(risk_reward_ratio, loss_escalation, loss_to_win_ratio,
+                        cutting_winners_pattern, median_win, median_loss):
+    """
+    Score loss aversion from its aggregate metrics.
+    
+    Returns:
+        dict: detected, severity and score (0-100)
+    """
+    # Score calculation based on harmful patterns
+    score = 0
+    
+    # Pattern 1: Small gains, large losses (poor risk-reward)
+    if risk_reward_ratio < 0.7:
+        score += 35  # Very poor ratio
+    elif risk_reward_ratio < 1.0:
+        score += 25
+    elif risk_reward_ratio < 1.3:
+        score += 15
+    
+    # Pattern 2: Losses escalating (holding losers longer)
+    if loss_escalation > 1.5:
+        score += 25
+    elif loss_escalation > 1.2:
+        score += 15
+    
+    # Pattern 3: Large losses relative to wins (breaching thresholds)
+    if loss_to_win_ratio > 3.0:
+        score += 30
+    elif loss_to_win_ratio > 2.0:
+        score += 20
+    
+    # Pattern 4: Cutting winners short (high win rate, low avg win)
+    if cutting_winners_pattern:
+        score += 20
+    
+    # Additional: Median analysis - if median loss >> median win
+    if median_loss > median_win * 2:
+        score += 15
+    
+    severity = 'Low' if score < 30 else 'Moderate' if score < 60 else 'High'
+    
+    return {
+        'detected': score > 25,
+        'severity': severity,
+        'score': min(100, round(score, 1))
+    }
+
+
+def score_revenge_trading(size_increase_ratio, rapid_same_asset_pct, emotional_cluster_pct,
+                          escalation_ratio, avg_time_after_loss, avg_time_after_win,
+                          win_rate_after_loss):
+    """
+    Score revenge trading from its aggregate metrics.
+    
+    Returns:
+        dict: detected, severity and score (0-100)
+    """
+    # Score calculation based on harmful patterns
+    score = 0
+    
+    # Pattern 1: Sharp increase in trade size after large loss (>50% increase)
+    if size_increase_ratio > 1.5:
+        score += 30
+    elif size_increase_ratio > 1.3:
+        score += 20
+    
+    # Pattern 2: Rapid re-entry into same asset (>30% of trades)
+    if rapid_same_asset_pct > 40:
+        score += 25
+    elif rapid_same_asset_pct > 25:
+        score += 15
+    
+    # Pattern 3: Emotional clustering (>50% within 15 minutes)
+    if emotional_cluster_pct > 50:
+        score += 30
+    elif emotional_cluster_pct > 30:
+        score += 20
+    
+    # Pattern 4: Escalating risk after consecutive losses
+    if escalation_ratio > 1.4:
+        score += 25
+    elif escalation_ratio > 1.2:
+        score += 15
+    
+    # Additional: Much faster trading after losses
+    if avg_time_after_loss < avg_time_after_win * 0.4:
+        score += 15
+    
+    # Poor win rate after losses suggests emotional trading
+    if win_rate_after_loss < 35:
+        score += 15
+    
+    severity = 'Low' if score < 30 else 'Moderate' if score < 60 else 'High'
+    
+    return {
+        'detected': score > 25,
+        'severity': severity,
+        'score': min(100, round(score, 1))
+    }
+
+
+def overtrading_recommendations(overtrading):
+    avg_trades = overtrading['metrics']['avg_trades_per_day']
+    return [
+        {
+            'bias': 'Overtrading',
+            'recommendation': f'Set a daily trade limit of {max(5, int(avg_trades * 0.5))} trades per day',
+            'priority': 'High' if overtrading['severity'] == 'High' else 'Medium'
+        },
+        {
+            'bias': 'Overtrading',
+            'recommendation': 'Implement a mandatory 30-minute cooldown period between trades',
+            'priority': 'Medium'
+        }
+    ]
+
+
+def loss_aversion_recommendations(loss_aversion):
+    rr_ratio = loss_aversion['metrics']['risk_reward_ratio']
+    return [
+        {
+            'bias': 'Loss Aversion',
+            'recommendation': f'Set stop-loss orders at 2% and take-profit at {max(3, int(rr_ratio * 2))}% to improve risk-reward ratio',
+            'priority': 'High' if loss_aversion['severity'] == 'High' else 'Medium'
+        },
+        {
+            'bias': 'Loss Aversion',
+            'recommendation': 'Use trailing stop-losses to let winners run while protecting gains',
+            'priority': 'Medium'
+        }
+    ]
+
+
+def revenge_trading_recommendations(revenge_trading):
+    return [
+        {
+            'bias': 'Revenge Trading',
+            'recommendation': 'Implement a mandatory 2-hour break after any losing trade',
+            'priority': 'High' if revenge_trading['severity'] == 'High' else 'Medium'
+        },
+        {
+            'bias': 'Revenge Trading',
+            'recommendation': 'Reduce position size by 50% for the next 3 trades after a loss',
+            'priority': 'Medium'
+        }
+    ]
+
+
+def build_recommendations(results):
+    """
+    Generate personalized recommendations from detector results.
+    
+    Args:
+        results (dict): {detector name: result}, e.g. the analyze_all() sections;
+                        each detected result adds its detector's recommendations
+    
+    Returns:
+        list: Recommendation dictionaries with bias, recommendation and priority
+    """
+    recommendations = []
+    for name, result in results.items():
+        recommend = DETECTORS[name]['recommend'] if name in DETECTORS else None
+        if recommend and result.get('detected'):
+            recommendations.extend(recommend(result))
+    
+    # General recommendations
+    if not recommendations:
+        recommendations.append({
+            'bias': 'General',
+            'recommendation': 'Maintain a trading journal to track emotions and decisions',
+            'priority': 'Low'
+        })
+        recommendations.append({
+            'bias': 'General',
+            'recommendation': 'Review your trading plan weekly and stick to predefined rules',
+            'priority': 'Low'
+        })
+    
+    return recommendations
+
 
 class BiasDetector:
-    def __init__(self, df):
+    def __init__(self, df, copy=False):
         """
         Initialize the Bias Detector with trading data.
         
+        The caller's frame is never modified: the detector keeps its own
+        frame of the trade columns, sharing their arrays until a column
+        has to be converted, and derived values live in self.features.
+        
         Args:
             df: DataFrame with columns: Timestamp, Buy/sell, Asset, P/L
+            copy: Deep-copy the trade columns first. Only needed if the caller
+                  will modify the frame's arrays in place while the detector
+                  is still in use.
         """
-        self.df = df.copy()
-        self.df['Timestamp'] = pd.to_datetime(self.df['Timestamp'])
-        self.df['P/L'] = pd.to_numeric(self.df['P/L'], errors='coerce')
+        columns = [column for column in ('Timestamp', 'Buy/sell', 'Asset', 'P/L') if column in df]
+        self.df = pd.DataFrame({column: df[column] for column in columns}, copy=copy)
+        # Already-typed columns (columnar ingestion) skip parsing, cleaning and sorting
+        if not pd.api.types.is_datetime64_any_dtype(self.df['Timestamp']):
+            self.df['Timestamp'] = pd.to_datetime(self.df['Timestamp'])
+        if not pd.api.types.is_float_dtype(self.df['P/L']):
+            self.df['P/L'] = pd.to_numeric(self.df['P/L'], errors='coerce')
         
         # Remove rows with invalid data
-        self.df = self.df.dropna(subset=['Timestamp', 'P/L'])
+        if self.df['Timestamp'].isna().any() or self.df['P/L'].isna().any():
+            self.df = self.df.dropna(subset=['Timestamp', 'P/L'])
         
         if len(self.df) == 0:
             raise ValueError("No valid trading data found after processing")
         
-        self.df = self.df.sort_values('Timestamp')
-        self.df['Date'] = self.df['Timestamp'].dt.date
+        if not self.df['Timestamp'].is_monotonic_increasing:
+            self.df = self.df.sort_values('Timestamp')
+        
+        # Compact internal schema: int64 epoch nanoseconds, int32 day numbers and
+        # categorical assets/sides, so daily grouping and asset comparisons run on integers
+        timestamps = self.df['Timestamp']
+        wall_clock = timestamps
+        if timestamps.dt.tz is not None:
+            # Days follow the trader's local calendar, gaps the actual elapsed time
+            wall_clock = timestamps.dt.tz_localize(None)
+            timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+        self.timestamps_ns = timestamps.to_numpy('datetime64[ns]').view(np.int64)
+        self.days = (wall_clock.to_numpy('datetime64[ns]').view(np.int64) // NS_PER_DAY).astype(np.int32)
+        for column in ('Asset', 'Buy/sell'):
+            if column in self.df and not isinstance(self.df[column].dtype, pd.CategoricalDtype):
+                self.df[column] = self.df[column].astype('category')
+        self.has_sides = 'Buy/sell' in self.df
+        
+        self._build_features()
+    
+    def _build_features(self):
+        """
+        Derive the per-trade features shared by all detectors in a single pass.
+        
+        CORE_FEATURES are built here; features only some registered detectors
+        declare are added by run_detectors() the first time one of those
+        detectors runs. The resulting frame is aligned with self.df and is
+        treated as read-only: detectors select from it with boolean masks
+        instead of adding scratch columns to self.df. Rebuilding the features
+        also drops any memoized results (and their timings), since they were
+        computed from the previous data.
+        """
+        self._results = {}
+        self.timings = {}
+        
+        day = self.days
+        day_start = _day_starts(day)
+        if day_start is not None:
+            self.trades_per_day = pd.Series(np.diff(np.append(day_start, len(day))), index=day[day_start])
+        else:
+            self.trades_per_day = pd.Series(day).groupby(day).size()
+        
+        built = build_features(self, CORE_FEATURES, {})
+        self.features = pd.DataFrame(built, index=self.df.index, copy=False)
+    
+    def _ensure_features(self, detector_names):
+        """Build the features the detectors declare that aren't in self.features yet, in one pass."""
+        missing = resolve_features(detector_names, self.features.columns)
+        if missing:
+            built = build_features(self, missing, self.features)
+            self.features = self.features.assign(**built)
+    
+    def run_detectors(self, names=None):
+        """
+        Run registered detectors, concurrently, memoizing their results.
+        
+        The union of the features they need is built first, once; detectors
+        that already ran are not run again. Each detector's time is kept in
+        self.timings as 'detect_<name>'.
         
-        # Calculate additional metrics
-        self.df['Is_Loss'] = self.df['P/L'] < 0
-        self.df['Is_Win'] = self.df['P/L'] > 0
+        Args:
+            names (list): Detector names (default: every registered detector)
         
+        Returns:
+            dict: {name: result} in the order given
+        """
+        names = list(DETECTORS) if names is None else list(names)
+        pending = [name for name in names if f'detect_{name}' not in self._results]
+        if pending:
+            self._ensure_features(pending)
+            for name, (result, seconds) in run_concurrently(self, pending).items():
+                self._results[f'detect_{name}'] = result
+                self.timings[f'detect_{name}'] = seconds
+        return {name: self._results[f'detect_{name}'] for name in names}
+    
+    @register_detector('overtrading', features=('Time_Since_Prev', 'Abs_PL', 'Prev_PL', 'Has_Prev'),
+                       bias='Overtrading', section=True, recommend=overtrading_recommendations)
     def detect_overtrading(self):
         """
         Detect overtrading bias based on harmful patterns:
@@ -39,12 +553,13 @@ class BiasDetector:
         - Increasing trade frequency after small gains or minor losses
         - High transaction costs relative to net returns
         """
-        trades_per_day = self.df.groupby('Date').size()
+        f = self.features
+        trades_per_day = self.trades_per_day
         avg_trades_per_day = trades_per_day.mean()
         max_trades_per_day = trades_per_day.max()
         
         # Calculate trading frequency
-        time_diffs = self.df['Timestamp'].diff().dt.total_seconds() / 60  # minutes
+        time_diffs = f['Time_Since_Prev']
         avg_time_between_trades = time_diffs[time_diffs > 0].mean()
         
         # Detect rapid-fire trading (trades within very short intervals - 1 minute)
@@ -53,17 +568,11 @@ class BiasDetector:
         
         # Pattern: Increasing trade frequency after small gains or minor losses
         # Check if trade frequency increases after small P/L moves
-        self.df['Prev_PL'] = self.df['P/L'].shift(1)
-        self.df['Time_Since_Prev'] = time_diffs
-        
         # Small gains/losses: between -2% and +2% of average trade size
-        avg_trade_size = abs(self.df['P/L']).mean()
+        avg_trade_size = f['Abs_PL'].mean()
         small_move_threshold = avg_trade_size * 0.02
         
-        small_moves = self.df[
-            (self.df['Prev_PL'].abs() <= small_move_threshold) & 
-            (self.df['Prev_PL'].notna())
-        ]
+        small_moves = f[(f['Prev_PL'].abs() <= small_move_threshold) & f['Has_Prev']]
         
         if len(small_moves) > 0:
             avg_time_after_small_move = small_moves['Time_Since_Prev'].mean()
@@ -74,42 +583,17 @@ class BiasDetector:
         
         # High transaction costs relative to net returns
         # Estimate transaction costs (assuming ~0.1% per trade, adjust based on platform)
-        estimated_cost_per_trade = abs(self.df['P/L']).mean() * 0.001  # Conservative estimate
+        estimated_cost_per_trade = avg_trade_size * 0.001  # Conservative estimate
         total_estimated_costs = len(self.df) * estimated_cost_per_trade
         total_net_return = self.df['P/L'].sum()
         cost_to_return_ratio = abs(total_estimated_costs / total_net_return) if total_net_return != 0 else 0
         
-        # Score calculation based on harmful patterns
-        score = 0
-        
-        # Pattern 1: Excessively high trades per day (threshold: >10/day average or >25/day max for manual traders)
-        if avg_trades_per_day > 10:
-            score += min(25, (avg_trades_per_day / 10) * 10)
-        if max_trades_per_day > 25:
-            score += min(20, (max_trades_per_day / 25) * 10)
-        
-        # Pattern 2: Rapid-fire trades (>20% within 1 minute)
-        if rapid_trade_pct > 20:
-            score += min(25, (rapid_trade_pct / 20) * 10)
-        elif rapid_trade_pct > 10:
-            score += min(15, (rapid_trade_pct / 10) * 5)
-        
-        # Pattern 3: Increasing frequency after small moves (ratio > 3.0 indicates faster trading)
-        if frequency_increase_ratio > 3.0:
-            score += min(10, (frequency_increase_ratio / 3.0) * 6)
-        
-        # Pattern 4: High transaction costs relative to returns (>80% of net return)
-        if cost_to_return_ratio > 0.8 and total_net_return > 0:
-            score += min(10, (cost_to_return_ratio / 0.8) * 6)
-        elif cost_to_return_ratio > 1.5:
-            score += 15  # Costs greatly exceed returns
-        
-        severity = 'Low' if score < 50 else 'Moderate' if score < 80 else 'High'
+        result = score_overtrading(avg_trades_per_day, max_trades_per_day, rapid_trade_pct,
+                                   frequency_increase_ratio, cost_to_return_ratio, total_net_return)
+        severity = result['severity']
         
         return {
-            'detected': score > 50,
-            'severity': severity,
-            'score': min(100, round(score, 1)),
+            **result,
             'metrics': {
                 'avg_trades_per_day': round(avg_trades_per_day, 2),
                 'max_trades_per_day': int(max_trades_per_day),
@@ -120,9 +604,11 @@ class BiasDetector:
                 'total_estimated_costs': round(total_estimated_costs, 2),
                 'total_net_return': round(total_net_return, 2)
             },
-            'description': self._get_overtrading_description(severity, avg_trades_per_day, rapid_trade_pct, cost_to_return_ratio)
+            'description': overtrading_description(severity, avg_trades_per_day, rapid_trade_pct, cost_to_return_ratio)
         }
     
+    @register_detector('loss_aversion', features=('Is_Win', 'Is_Loss'), bias='Loss Aversion',
+                       section=True, behavioral=True, recommend=loss_aversion_recommendations)
     def detect_loss_aversion(self):
         """
         Detect loss aversion bias based on harmful patterns:
@@ -131,10 +617,11 @@ class BiasDetector:
         - Refusal to close losing trades even after breaching a predefined risk threshold
         - Frequently moving stop-loss levels further away to avoid realizing a loss
         """
-        wins = self.df[self.df['Is_Win']]
-        losses = self.df[self.df['Is_Loss']]
+        # Select the P/L column only, not whole rows
+        win_pl = self.df['P/L'][self.features['Is_Win']]
+        loss_pl = self.df['P/L'][self.features['Is_Loss']]
         
-        if len(wins) == 0 or len(losses) == 0:
+        if len(win_pl) == 0 or len(loss_pl) == 0:
             return {
                 'detected': False,
                 'severity': 'Low',
@@ -143,8 +630,8 @@ class BiasDetector:
                 'description': 'Insufficient data to detect loss aversion patterns.'
             }
         
-        avg_win = wins['P/L'].mean()
-        avg_loss = abs(losses['P/L'].mean())
+        avg_win = win_pl.mean()
+        avg_loss = abs(loss_pl.mean())
         
         # Pattern 1: Small average gains but large average losses
         # Risk-reward ratio (should be > 1.5 for healthy trading)
@@ -153,8 +640,8 @@ class BiasDetector:
         # Pattern 2: Holding losing positions longer than winning positions
         # Estimate holding time based on trade sequence and P/L patterns
         # If we see larger losses developing over time, suggests holding losers
-        loss_sizes = losses['P/L'].abs().sort_values(ascending=False)
-        win_sizes = wins['P/L'].sort_values(ascending=False)
+        loss_sizes = loss_pl.abs().sort_values(ascending=False)
+        win_sizes = win_pl.sort_values(ascending=False)
         
         # Check if losses are getting larger (indicating holding losers)
         if len(loss_sizes) > 1:
@@ -166,56 +653,25 @@ class BiasDetector:
             loss_escalation = 1
         
         # Pattern 3: Large losses relative to wins (breaching risk thresholds)
-        largest_win = wins['P/L'].max()
-        largest_loss = abs(losses['P/L'].min())
+        largest_win = win_pl.max()
+        largest_loss = abs(loss_pl.min())
         loss_to_win_ratio = largest_loss / largest_win if largest_win > 0 else 0
         
         # Pattern 4: Distribution analysis - many small wins, few large losses
         # This suggests cutting winners short but letting losers run
-        median_win = wins['P/L'].median()
-        median_loss = abs(losses['P/L'].median())
-        win_rate = (len(wins) / len(self.df)) * 100
+        median_win = win_pl.median()
+        median_loss = abs(loss_pl.median())
+        win_rate = (len(win_pl) / len(self.df)) * 100
         
         # Check for pattern: high win rate but poor risk-reward (cutting winners)
         cutting_winners_pattern = win_rate > 55 and risk_reward_ratio < 1.2
         
-        # Score calculation based on harmful patterns
-        score = 0
-        
-        # Pattern 1: Small gains, large losses (poor risk-reward)
-        if risk_reward_ratio < 0.7:
-            score += 35  # Very poor ratio
-        elif risk_reward_ratio < 1.0:
-            score += 25
-        elif risk_reward_ratio < 1.3:
-            score += 15
-        
-        # Pattern 2: Losses escalating (holding losers longer)
-        if loss_escalation > 1.5:
-            score += 25
-        elif loss_escalation > 1.2:
-            score += 15
-        
-        # Pattern 3: Large losses relative to wins (breaching thresholds)
-        if loss_to_win_ratio > 3.0:
-            score += 30
-        elif loss_to_win_ratio > 2.0:
-            score += 20
-        
-        # Pattern 4: Cutting winners short (high win rate, low avg win)
-        if cutting_winners_pattern:
-            score += 20
-        
-        # Additional: Median analysis - if median loss >> median win
-        if median_loss > median_win * 2:
-            score += 15
-        
-        severity = 'Low' if score < 30 else 'Moderate' if score < 60 else 'High'
+        result = score_loss_aversion(risk_reward_ratio, loss_escalation, loss_to_win_ratio,
+                                     cutting_winners_pattern, median_win, median_loss)
+        severity = result['severity']
         
         return {
-            'detected': score > 25,
-            'severity': severity,
-            'score': min(100, round(score, 1)),
+            **result,
             'metrics': {
                 'risk_reward_ratio': round(risk_reward_ratio, 2),
                 'avg_win': round(avg_win, 2),
@@ -228,9 +684,13 @@ class BiasDetector:
                 'loss_to_win_ratio': round(loss_to_win_ratio, 2),
                 'loss_escalation_factor': round(loss_escalation, 2)
             },
-            'description': self._get_loss_aversion_description(severity, risk_reward_ratio, loss_to_win_ratio, cutting_winners_pattern)
+            'description': loss_aversion_description(severity, risk_reward_ratio, loss_to_win_ratio, cutting_winners_pattern)
         }
     
+    @register_detector('revenge_trading',
+                       features=('Is_Loss', 'Is_Win', 'Prev_Is_Loss', 'Prev_PL', 'Has_Prev', 'Same_Asset_As_Prev',
+                                 'Abs_PL', 'Time_Since_Prev', 'Loss_Streak'),
+                       bias='Revenge Trading', section=True, behavioral=True, recommend=revenge_trading_recommendations)
     def detect_revenge_trading(self):
         """
         Detect revenge trading bias based on harmful patterns:
@@ -248,15 +708,11 @@ class BiasDetector:
                 'description': 'Insufficient data to detect revenge trading patterns.'
             }
         
-        # Calculate time between trades
-        self.df['Time_Since_Prev'] = self.df['Timestamp'].diff().dt.total_seconds() / 60  # minutes
-        self.df['Prev_Is_Loss'] = self.df['Is_Loss'].shift(1)
-        self.df['Prev_PL'] = self.df['P/L'].shift(1)
-        self.df['Prev_Asset'] = self.df['Asset'].shift(1)
+        f = self.features
         
         # Pattern 1: Identify large losses (top 20% of losses)
-        losses = self.df[self.df['Is_Loss']]
-        if len(losses) == 0:
+        loss_pl = self.df['P/L'][f['Is_Loss']]
+        if len(loss_pl) == 0:
             return {
                 'detected': False,
                 'severity': 'Low',
@@ -265,15 +721,17 @@ class BiasDetector:
                 'description': 'No loss patterns detected.'
             }
         
-        large_loss_threshold = losses['P/L'].quantile(0.2)  # Bottom 20% (most negative)
-        self.df['Prev_Is_Large_Loss'] = (self.df['Prev_PL'] <= large_loss_threshold) & (self.df['Prev_Is_Loss'] == True)
+        large_loss_threshold = loss_pl.quantile(0.2)  # Bottom 20% (most negative)
+        prev_is_large_loss = f['Prev_Is_Loss'] & (f['Prev_PL'] <= large_loss_threshold)
         
-        # Trades after losses
-        after_loss = self.df[self.df['Prev_Is_Loss'] == True]
-        after_large_loss = self.df[self.df['Prev_Is_Large_Loss'] == True]
-        after_win = self.df[self.df['Prev_Is_Loss'] == False]
+        # Trades after losses, as masks: selecting whole feature rows would copy every column
+        after_loss = f['Prev_Is_Loss']
+        after_win = f['Has_Prev'] & ~after_loss
+        after_loss_count = int(after_loss.sum())
+        abs_pl = f['Abs_PL']
+        time_since_prev = f['Time_Since_Prev']
         
-        if len(after_loss) == 0:
+        if after_loss_count == 0:
             return {
                 'detected': False,
                 'severity': 'Low',
@@ -283,87 +741,48 @@ class BiasDetector:
             }
         
         # Pattern 1: Sharp increase in trade size after large loss
-        avg_abs_pl_after_large_loss = abs(after_large_loss['P/L']).mean() if len(after_large_loss) > 0 else 0
-        avg_abs_pl_normal = abs(self.df['P/L']).mean()
+        avg_abs_pl_after_large_loss = abs_pl[prev_is_large_loss].mean() if prev_is_large_loss.any() else 0
+        avg_abs_pl_normal = abs_pl.mean()
         size_increase_ratio = avg_abs_pl_after_large_loss / avg_abs_pl_normal if avg_abs_pl_normal > 0 else 1
         
         # Pattern 2: Rapid re-entry into same asset after losing trade
-        same_asset_after_loss = after_loss[after_loss['Asset'] == after_loss['Prev_Asset']]
-        same_asset_rapid = same_asset_after_loss[same_asset_after_loss['Time_Since_Prev'] < 30]  # Within 30 minutes
-        rapid_same_asset_pct = (len(same_asset_rapid) / len(after_loss)) * 100 if len(after_loss) > 0 else 0
+        same_asset_rapid = after_loss & f['Same_Asset_As_Prev'] & (time_since_prev < 30)  # Within 30 minutes
+        rapid_same_asset_pct = (same_asset_rapid.sum() / after_loss_count) * 100
         
         # Pattern 3: Emotional clustering within minutes of significant negative P/L
         # Trades within 15 minutes after a loss
-        emotional_cluster = after_loss[after_loss['Time_Since_Prev'] < 15]
-        emotional_cluster_pct = (len(emotional_cluster) / len(after_loss)) * 100 if len(after_loss) > 0 else 0
+        emotional_cluster = after_loss & (time_since_prev < 15)
+        emotional_cluster_pct = (emotional_cluster.sum() / after_loss_count) * 100
         
         # Pattern 4: Escalating risk after consecutive losses
-        # Track consecutive losses
-        self.df['Consecutive_Losses'] = 0
-        consecutive_count = 0
-        for idx, row in self.df.iterrows():
-            if row['Is_Loss']:
-                consecutive_count += 1
-            else:
-                consecutive_count = 0
-            self.df.at[idx, 'Consecutive_Losses'] = consecutive_count
-        
         # Check if trade size increases with consecutive losses
-        trades_after_multiple_losses = self.df[self.df['Consecutive_Losses'] >= 2]
-        if len(trades_after_multiple_losses) > 0:
-            avg_size_after_multiple = abs(trades_after_multiple_losses['P/L']).mean()
+        after_multiple_losses = f['Loss_Streak'] >= 2
+        if after_multiple_losses.any():
+            avg_size_after_multiple = abs_pl[after_multiple_losses].mean()
             escalation_ratio = avg_size_after_multiple / avg_abs_pl_normal if avg_abs_pl_normal > 0 else 1
         else:
             escalation_ratio = 1
         
         # Average time between trades after losses vs after wins
-        avg_time_after_loss = after_loss['Time_Since_Prev'].mean()
-        avg_time_after_win = after_win['Time_Since_Prev'].mean() if len(after_win) > 0 else avg_time_after_loss
-        
-        # Win rate after losses
-        win_rate_after_loss = (after_loss['Is_Win'].sum() / len(after_loss)) * 100 if len(after_loss) > 0 else 0
-        
-        # Score calculation based on harmful patterns
-        score = 0
-        
-        # Pattern 1: Sharp increase in trade size after large loss (>50% increase)
-        if size_increase_ratio > 1.5:
-            score += 30
-        elif size_increase_ratio > 1.3:
-            score += 20
-        
-        # Pattern 2: Rapid re-entry into same asset (>30% of trades)
-        if rapid_same_asset_pct > 40:
-            score += 25
-        elif rapid_same_asset_pct > 25:
-            score += 15
-        
-        # Pattern 3: Emotional clustering (>50% within 15 minutes)
-        if emotional_cluster_pct > 50:
-            score += 30
-        elif emotional_cluster_pct > 30:
-            score += 20
-        
-        # Pattern 4: Escalating risk after consecutive losses
-        if escalation_ratio > 1.4:
-            score += 25
-        elif escalation_ratio > 1.2:
-            score += 15
+        avg_time_after_loss = time_since_prev[after_loss].mean()
+        avg_time_after_win = time_since_prev[after_win].mean() if after_win.any() else avg_time_after_loss
         
-        # Additional: Much faster trading after losses
-        if avg_time_after_loss < avg_time_after_win * 0.4:
-            score += 15
+        # Losing streak distribution
+        streak_lengths = _streak_lengths(f['Loss_Streak'].to_numpy())
+        longest_losing_streak = int(streak_lengths.max()) if len(streak_lengths) > 0 else 0
+        streak_counts = np.bincount(streak_lengths)
+        losing_streak_histogram = {int(length): int(count) for length, count in enumerate(streak_counts) if count > 0}
         
-        # Poor win rate after losses suggests emotional trading
-        if win_rate_after_loss < 35:
-            score += 15
+        # Win rate after losses
+        win_rate_after_loss = (f['Is_Win'][after_loss].sum() / after_loss_count) * 100
         
-        severity = 'Low' if score < 30 else 'Moderate' if score < 60 else 'High'
+        result = score_revenge_trading(size_increase_ratio, rapid_same_asset_pct, emotional_cluster_pct,
+                                       escalation_ratio, avg_time_after_loss, avg_time_after_win,
+                                       win_rate_after_loss)
+        severity = result['severity']
         
         return {
-            'detected': score > 25,
-            'severity': severity,
-            'score': min(100, round(score, 1)),
+            **result,
             'metrics': {
                 'avg_minutes_after_loss': round(avg_time_after_loss, 1) if not pd.isna(avg_time_after_loss) else 0,
                 'avg_minutes_after_win': round(avg_time_after_win, 1) if not pd.isna(avg_time_after_win) else 0,
@@ -372,24 +791,37 @@ class BiasDetector:
                 'win_rate_after_loss': round(win_rate_after_loss, 1),
                 'size_increase_after_large_loss': round(size_increase_ratio, 2),
                 'risk_escalation_ratio': round(escalation_ratio, 2),
-                'trades_after_consecutive_losses': len(trades_after_multiple_losses)
+                'trades_after_consecutive_losses': int(after_multiple_losses.sum()),
+                'longest_losing_streak': longest_losing_streak,
+                'losing_streak_histogram': losing_streak_histogram
             },
-            'description': self._get_revenge_trading_description(severity, emotional_cluster_pct, rapid_same_asset_pct, escalation_ratio)
+            'description': revenge_trading_description(severity, emotional_cluster_pct, rapid_same_asset_pct, escalation_ratio)
+        }
+    
+    def analyze_all(self):
+        """
+        Run every analysis once and return all report sections together.
+        
+        Returns:
+            dict: one section per section detector (overtrading, loss_aversion,
+                  revenge_trading), summary, recommendations and statistics
+        """
+        return {
+            **self.run_detectors(section_detectors()),
+            'summary': self.generate_summary(),
+            'recommendations': self.generate_recommendations(),
+            'statistics': self.get_statistics()
         }
     
+    @_memoized
     def generate_summary(self):
         """Generate overall summary of detected biases"""
         total_trades = len(self.df)
         total_pl = self.df['P/L'].sum()
-        win_rate = (self.df['Is_Win'].sum() / total_trades) * 100
+        win_rate = (self.features['Is_Win'].sum() / total_trades) * 100
         
-        biases_detected = []
-        if self.detect_overtrading()['detected']:
-            biases_detected.append('Overtrading')
-        if self.detect_loss_aversion()['detected']:
-            biases_detected.append('Loss Aversion')
-        if self.detect_revenge_trading()['detected']:
-            biases_detected.append('Revenge Trading')
+        biases_detected = [DETECTORS[name]['bias'] for name, result in self.run_detectors(section_detectors()).items()
+                           if result['detected']]
         
         return {
             'total_trades': total_trades,
@@ -399,132 +831,421 @@ class BiasDetector:
             'bias_count': len(biases_detected)
         }
     
+    @_memoized
     def generate_recommendations(self):
         """Generate personalized recommendations based on detected biases"""
-        recommendations = []
-        
-        overtrading = self.detect_overtrading()
-        loss_aversion = self.detect_loss_aversion()
-        revenge_trading = self.detect_revenge_trading()
-        
-        if overtrading['detected']:
-            avg_trades = overtrading['metrics']['avg_trades_per_day']
-            recommendations.append({
-                'bias': 'Overtrading',
-                'recommendation': f'Set a daily trade limit of {max(5, int(avg_trades * 0.5))} trades per day',
-                'priority': 'High' if overtrading['severity'] == 'High' else 'Medium'
-            })
-            recommendations.append({
-                'bias': 'Overtrading',
-                'recommendation': 'Implement a mandatory 30-minute cooldown period between trades',
-                'priority': 'Medium'
-            })
-        
-        if loss_aversion['detected']:
-            rr_ratio = loss_aversion['metrics']['risk_reward_ratio']
-            recommendations.append({
-                'bias': 'Loss Aversion',
-                'recommendation': f'Set stop-loss orders at 2% and take-profit at {max(3, int(rr_ratio * 2))}% to improve risk-reward ratio',
-                'priority': 'High' if loss_aversion['severity'] == 'High' else 'Medium'
-            })
-            recommendations.append({
-                'bias': 'Loss Aversion',
-                'recommendation': 'Use trailing stop-losses to let winners run while protecting gains',
-                'priority': 'Medium'
-            })
-        
-        if revenge_trading['detected']:
-            recommendations.append({
-                'bias': 'Revenge Trading',
-                'recommendation': 'Implement a mandatory 2-hour break after any losing trade',
-                'priority': 'High' if revenge_trading['severity'] == 'High' else 'Medium'
-            })
-            recommendations.append({
-                'bias': 'Revenge Trading',
-                'recommendation': 'Reduce position size by 50% for the next 3 trades after a loss',
-                'priority': 'Medium'
-            })
-        
-        # General recommendations
-        if not recommendations:
-            recommendations.append({
-                'bias': 'General',
-                'recommendation': 'Maintain a trading journal to track emotions and decisions',
-                'priority': 'Low'
-            })
-            recommendations.append({
-                'bias': 'General',
-                'recommendation': 'Review your trading plan weekly and stick to predefined rules',
-                'priority': 'Low'
-            })
-        
-        return recommendations
+        return build_recommendations(self.run_detectors(section_detectors()))
     
+    @_memoized
     def get_statistics(self):
         """Get comprehensive trading statistics"""
         return {
             'total_trades': len(self.df),
-            'winning_trades': int(self.df['Is_Win'].sum()),
-            'losing_trades': int(self.df['Is_Loss'].sum()),
+            'winning_trades': int(self.features['Is_Win'].sum()),
+            'losing_trades': int(self.features['Is_Loss'].sum()),
             'total_pnl': round(self.df['P/L'].sum(), 2),
             'avg_pnl': round(self.df['P/L'].mean(), 2),
             'largest_win': round(self.df['P/L'].max(), 2),
             'largest_loss': round(self.df['P/L'].min(), 2),
-            'win_rate': round((self.df['Is_Win'].sum() / len(self.df)) * 100, 1),
-            'trading_days': len(self.df['Date'].unique()),
+            'win_rate': round((self.features['Is_Win'].sum() / len(self.df)) * 100, 1),
+            'trading_days': len(self.trades_per_day),
             'unique_assets': int(self.df['Asset'].nunique()),
             'human_tax': self.calculate_human_tax(),
+            'human_tax_by_rule': self.calculate_human_tax_breakdown()['by_rule'],
             'prosperity_projection': self.calculate_prosperity_projection()
         }
 
+    @_memoized
     def calculate_human_tax(self):
         """
         Calculate 'Human Tax': Total losses from likely biased trades.
         Biased trades:
-        1. Overtrading: Trades beyond 5 per day.
+        1. Overtrading: Trades beyond 8 per day.
         2. Rapid Fire: Trades within 1 minute of previous.
         3. Revenge Trading: Trades within 15 minutes of a loss.
         """
-        human_tax = 0.0
-        
-        # Prepare data
-        df = self.df.copy()
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        df = df.sort_values('Timestamp')
-        df['Date'] = df['Timestamp'].dt.date
-        
-        # Calculate time diffs and previous outcomes
-        df['TimeDiff'] = df['Timestamp'].diff().dt.total_seconds() / 60.0
-        df['PrevPL'] = df['P/L'].shift(1)
-        df['PrevIsLoss'] = df['PrevPL'] < 0
-        
-        # Daily trade count
-        trade_counts = df.groupby('Date').cumcount() + 1
-        df['DailyTradeNum'] = trade_counts.values # Assign back correctly
-
-        for index, row in df.iterrows():
-            if row['P/L'] >= 0:
-                continue # Only count losses
-            
-            is_biased = False
-            
+        return self.calculate_human_tax_breakdown()['total']
+
+    def _human_tax_rules(self):
+        """Boolean masks of the trades each Human Tax rule flags, wins included."""
+        f = self.features
+        return {
             # 1. Overtrading (> 8 trades/day) - Adjusted to be slightly more lenient than 5
-            if row['DailyTradeNum'] > 8:
-                is_biased = True
-                
+            'overtrading': f['Daily_Trade_Num'] > 8,
             # 2. Rapid Fire (< 1 min)
-            if pd.notna(row['TimeDiff']) and row['TimeDiff'] < 1.0:
-                is_biased = True
-                
+            'rapid_fire': f['Time_Since_Prev'] < 1.0,
             # 3. Revenge Trading (< 15 mins after loss)
-            if pd.notna(row['TimeDiff']) and row['TimeDiff'] < 15.0 and row['PrevIsLoss']:
-                is_biased = True
-                
-            if is_biased:
-                human_tax += abs(row['P/L'])
-                
-        return round(human_tax, 2)
+            'revenge': (f['Time_Since_Prev'] < 15.0) & f['Prev_Is_Loss'],
+        }
 
+    @_memoized
+    def calculate_human_tax_breakdown(self):
+        """
+        Attribute the Human Tax to the rules that flagged each losing trade.
+        
+        All three rules are evaluated as boolean masks over the feature frame
+        in one vectorized pass. A trade matching several rules counts once
+        towards the total but appears under every rule it matched, so the
+        per-rule amounts can add up to more than the total.
+        
+        Returns:
+            dict: total, by_rule ({rule: {'amount', 'count'}}), flagged_count
+                  and flagged_trades (index labels of the taxed trades)
+        """
+        f = self.features
+        is_loss = self.features['Is_Loss']
+        rules = self._human_tax_rules()
+        
+        # Only losses are taxed
+        by_rule = {}
+        flagged = pd.Series(False, index=f.index)
+        for rule, mask in rules.items():
+            mask = mask & is_loss
+            flagged |= mask
+            by_rule[rule] = {
+                'amount': round(float(f['Abs_PL'][mask].sum()), 2),
+                'count': int(mask.sum())
+            }
+        
+        return {
+            'total': round(float(f['Abs_PL'][flagged].sum()), 2),
+            'by_rule': by_rule,
+            'flagged_count': int(flagged.sum()),
+            'flagged_trades': f.index[flagged.to_numpy()].tolist()
+        }
+
+    # Behavioral bias scorers for the full report. Loss aversion and revenge
+    # trading reuse their detectors; the rest are scored from the trade log's
+    # own signals, since it holds no prices, position sizes or news. |P/L|
+    # stands in for position size, as in the revenge trading detector, and a
+    # trade's "previous outcome" is the P/L of the trade before it (on the
+    # same asset where noted). Each score is 0-100.
+    
+    @register_detector('confirmation_bias', bias='Confirmation Bias', behavioral=True)
+    def detect_confirmation_bias(self):
+        """Most of the trading goes to an asset that keeps losing."""
+        pl = self.df['P/L'].to_numpy()
+        asset_codes = self.df['Asset'].cat.codes.to_numpy()
+        known = asset_codes >= 0
+        n_assets = len(self.df['Asset'].cat.categories)
+        if not n_assets:
+            return {'score': 0.0, 'metrics': {'top_asset_share': 0.0, 'top_asset_net_pnl': 0.0}}
+        trades_per_asset = np.bincount(asset_codes[known], minlength=n_assets)
+        pnl_per_asset = np.bincount(asset_codes[known], weights=pl[known], minlength=n_assets)
+        top = int(trades_per_asset.argmax())
+        top_share = _ratio(trades_per_asset[top], len(pl))
+        return {
+            'score': top_share * 100 if pnl_per_asset[top] < 0 else top_share * 40,
+            'metrics': {'top_asset_share': round(top_share * 100, 1),
+                        'top_asset_net_pnl': round(float(pnl_per_asset[top]), 2)}
+        }
+    
+    @register_detector('herd_mentality', bias='Herd Mentality', behavioral=True)
+    def detect_herd_mentality(self):
+        """Share of trades in the crowded tickers."""
+        assets = self.df['Asset'].cat.categories
+        popular_codes = [i for i, asset in enumerate(assets) if str(asset).upper() in POPULAR_TICKERS]
+        popular_share = float(np.isin(self.df['Asset'].cat.codes.to_numpy(), popular_codes).mean())
+        return {'score': _scaled(popular_share, 0.8), 'metrics': {'popular_ticker_pct': round(popular_share * 100, 1)}}
+    
+    @register_detector('sunk_cost_fallacy', features=('Is_Buy', 'Prev_Asset_PL'), bias='Sunk Cost Fallacy',
+                       behavioral=True)
+    def detect_sunk_cost_fallacy(self):
+        """Buying more of an asset right after it lost (averaging down), beyond the usual buy rate."""
+        is_buy = self.features['Is_Buy'].to_numpy()
+        prev_asset_loss = self.features['Prev_Asset_PL'].to_numpy() < 0
+        averaging_down_rate = _ratio((prev_asset_loss & is_buy).sum(), prev_asset_loss.sum())
+        return {
+            'score': _scaled(averaging_down_rate - is_buy.mean(), 0.3) if self.has_sides else 0.0,
+            'metrics': {'buys_after_asset_loss_pct': round(averaging_down_rate * 100, 1),
+                        'buy_pct': round(float(is_buy.mean()) * 100, 1)}
+        }
+    
+    @register_detector('overconfidence', features=('Abs_PL', 'Win_Streak'), bias='Overconfidence', behavioral=True)
+    def detect_overconfidence(self):
+        """Size after 3+ wins in a row vs overall."""
+        abs_pl = self.features['Abs_PL'].to_numpy()
+        win_streak = self.features['Win_Streak'].to_numpy()
+        after_win_streak = np.concatenate(([0], win_streak[:-1])) >= 3
+        size_ratio = _ratio(abs_pl[after_win_streak].mean(), abs_pl.mean(), 1.0) if after_win_streak.any() else 1.0
+        return {'score': _scaled(size_ratio - 1, 0.5), 'metrics': {'size_after_win_streak_ratio': round(size_ratio, 2)}}
+    
+    @register_detector('availability_bias', features=('Asset_Day_Trades',), bias='Availability Bias', behavioral=True)
+    def detect_availability_bias(self):
+        """Bursts of trading in one asset on one day (attention spikes)."""
+        asset_codes = self.df['Asset'].cat.codes.to_numpy()
+        asset_day_trades = self.features['Asset_Day_Trades'].to_numpy()
+        # Mean trades per active day of each asset: every trade contributes 1 / its day's count
+        active_days = pd.Series(1 / asset_day_trades).groupby(asset_codes).sum()
+        mean_daily = pd.Series(asset_codes).groupby(asset_codes).size() / active_days
+        spike = (asset_day_trades >= 3) & (asset_day_trades >= 3 * mean_daily.reindex(asset_codes).to_numpy())
+        return {'score': _scaled(spike.mean(), 0.3), 'metrics': {'attention_spike_pct': round(float(spike.mean()) * 100, 1)}}
+    
+    @register_detector('recency_bias', features=('Abs_PL',), bias='Recency Bias', behavioral=True)
+    def detect_recency_bias(self):
+        """Size follows the outcome of the last 3 trades."""
+        abs_pl = self.features['Abs_PL'].to_numpy()
+        last3 = pd.Series(np.sign(self.df['P/L'].to_numpy())).rolling(3).sum().shift(1).to_numpy()
+        valid = ~np.isnan(last3)
+        correlation = 0.0
+        if valid.sum() >= 10 and last3[valid].std() > 0 and abs_pl[valid].std() > 0:
+            correlation = float(np.corrcoef(last3[valid], abs_pl[valid])[0, 1])
+        # Correlations below ~2 standard errors are noise
+        return {
+            'score': _scaled(abs(correlation) - 2 / np.sqrt(max(valid.sum(), 1)), 0.4),
+            'metrics': {'size_vs_last3_correlation': round(correlation, 2)}
+        }
+    
+    @register_detector('anchoring_bias', features=('Abs_PL', 'Prev_Asset_PL'), bias='Anchoring Bias', behavioral=True)
+    def detect_anchoring_bias(self):
+        """Closing at exactly the asset's previous P/L level (fixed targets regardless of conditions)."""
+        abs_pl = self.features['Abs_PL'].to_numpy()
+        prev_asset_pl = self.features['Prev_Asset_PL'].to_numpy()
+        same_level = (np.round(abs_pl, 2) == np.round(np.abs(prev_asset_pl), 2)) & (abs_pl > 0)
+        same_level_rate = _ratio(same_level.sum(), (~np.isnan(prev_asset_pl)).sum())
+        return {'score': _scaled(same_level_rate, 0.2), 'metrics': {'repeated_pnl_level_pct': round(same_level_rate * 100, 1)}}
+    
+    @register_detector('gamblers_fallacy', features=('Side_Flip', 'Prev_Streak', 'Has_Prev'), bias="Gambler's Fallacy",
+                       behavioral=True)
+    def detect_gamblers_fallacy(self):
+        """Flipping side after a streak, betting on a reversal."""
+        flips = self.features['Side_Flip'].to_numpy()
+        after_streak = (self.features['Prev_Streak'].to_numpy() >= 3) & self.features['Has_Prev'].to_numpy()
+        flip_after_streak = _ratio(flips[after_streak].sum(), after_streak.sum())
+        flip_overall = _ratio(flips[1:].sum(), len(flips) - 1)
+        return {
+            'score': _scaled(flip_after_streak - flip_overall, 0.3) if self.has_sides and after_streak.any() else 0.0,
+            'metrics': {'side_flip_after_streak_pct': round(flip_after_streak * 100, 1),
+                        'side_flip_pct': round(flip_overall * 100, 1)}
+        }
+    
+    @register_detector('mental_accounting', features=('Abs_PL', 'Day_PnL_Before', 'Daily_Trade_Num'),
+                       bias='Mental Accounting', behavioral=True)
+    def detect_mental_accounting(self):
+        """Bigger size while the day is already in profit ("house money")."""
+        abs_pl = self.features['Abs_PL'].to_numpy()
+        house_money = (self.features['Day_PnL_Before'].to_numpy() > 0) & (self.features['Daily_Trade_Num'].to_numpy() > 1)
+        other = ~house_money
+        size_ratio = _ratio(abs_pl[house_money].mean(), abs_pl[other].mean(), 1.0) \
+            if house_money.any() and other.any() else 1.0
+        return {'score': _scaled(size_ratio - 1, 0.5), 'metrics': {'size_with_house_money_ratio': round(size_ratio, 2)}}
+    
+    @register_detector('disposition_effect', features=('Is_Win', 'Is_Loss'), bias='Disposition Effect', behavioral=True)
+    def detect_disposition_effect(self):
+        """Winners closed small while the hit rate is high."""
+        pl = self.df['P/L'].to_numpy()
+        is_win = self.features['Is_Win'].to_numpy()
+        is_loss = self.features['Is_Loss'].to_numpy()
+        avg_win = pl[is_win].mean() if is_win.any() else 0.0
+        avg_loss = -pl[is_loss].mean() if is_loss.any() else 0.0
+        win_loss_size = _ratio(avg_win, avg_loss, 1.0)
+        win_rate = is_win.mean() * 100
+        score = 0.0
+        if win_loss_size < 1 and win_rate > 50:
+            score = min(100.0, (1 - win_loss_size) * 100 + (win_rate - 50) * 2)
+        return {'score': score, 'metrics': {'avg_win_to_avg_loss': round(win_loss_size, 2)}}
+    
+    @register_detector('clean_trades', features=('Daily_Trade_Num', 'Time_Since_Prev', 'Prev_Is_Loss'),
+                       bias='Clean Trades', behavioral=True)
+    def detect_clean_trades(self):
+        """Share of trades not flagged by any Human Tax rule."""
+        flagged = np.zeros(len(self.df), dtype=bool)
+        for mask in self._human_tax_rules().values():
+            flagged |= mask.to_numpy()
+        return {'score': (1 - flagged.mean()) * 100, 'metrics': {'flagged_trade_pct': round(float(flagged.mean()) * 100, 1)}}
+    
+    @_memoized
+    def detect_behavioral_biases(self):
+        """
+        Score all 13 behavioral biases of the full report locally.
+        
+        Every registered behavioral detector runs concurrently over one
+        shared feature pass (see run_detectors()).
+        
+        Returns:
+            dict: biases ({name: score}), primary_bias, discipline_score,
+                  human_tax_estimate and the raw metrics behind each score
+        """
+        # Report order: the 13 biases as Gemini lists them, then any other registered ones
+        order = {bias: i for i, bias in enumerate(BEHAVIORAL_BIASES)}
+        names = sorted(behavioral_detectors(), key=lambda name: order.get(DETECTORS[name]['bias'], len(order)))
+        results = self.run_detectors(names)
+        biases = {DETECTORS[name]['bias']: round(float(result['score']), 1) for name, result in results.items()}
+        metrics = {}
+        for name, result in results.items():
+            # The classic detectors' metrics are in their own analyze_all() sections
+            if not DETECTORS[name]['section']:
+                metrics.update(result['metrics'])
+        
+        harmful = {name: score for name, score in biases.items() if name != 'Clean Trades'}
+        primary = max(harmful, key=harmful.get)
+        
+        return {
+            'biases': biases,
+            'primary_bias': primary if harmful[primary] > 0 else 'None',
+            'discipline_score': round(results['clean_trades']['score']) if 'clean_trades' in results else 100,
+            'human_tax_estimate': self.calculate_human_tax(),
+            'metrics': metrics
+        }
+
+    def rolling(self, window='7D', step='1D'):
+        """
+        Score every bias and the Human Tax over sliding time windows.
+        
+        Each window holds the trades in [end - window, end), with window ends
+        `step` apart from the first step boundary after the first trade until
+        past the last one. Scores match a BiasDetector built on just that
+        window's trades, but all windows come from one pass over the shared
+        features: additive metrics (counts, sums, means) are differences of
+        prefix sums, and only the order statistics (median win/loss, the 20%
+        large-loss quantile, top/bottom thirds of losses, the small-move
+        threshold) and the net return look at the window's own values.
+        
+        Args:
+            window (str or Timedelta): Window length, e.g. '7D' or '12h'
+            step (str or Timedelta): Distance between window ends
+            
+        Returns:
+            DataFrame: One row per window with start, end, trades, the
+                       overtrading / loss_aversion / revenge_trading scores
+                       and human_tax
+        """
+        window, step = pd.Timedelta(window), pd.Timedelta(step)
+        if window <= pd.Timedelta(0) or step <= pd.Timedelta(0):
+            raise ValueError("window and step must be positive")
+        
+        f = self.features
+        ts = self.df['Timestamp'].to_numpy()
+        first_end = self.df['Timestamp'].iloc[0].floor(step) + step
+        ends = pd.date_range(first_end, self.df['Timestamp'].iloc[-1] + step, freq=step)
+        ends = ends[ends - step <= self.df['Timestamp'].iloc[-1]]
+        starts = ends - window
+        lo = np.searchsorted(ts, starts.to_numpy(), side='left')
+        hi = np.searchsorted(ts, ends.to_numpy(), side='left')
+        n = hi - lo
+        # Features that look at the previous trade only count from the window's second trade on
+        lo1 = np.minimum(lo + 1, hi)
+        
+        pl = self.df['P/L'].to_numpy()
+        abs_pl = f['Abs_PL'].to_numpy()
+        is_loss = self.features['Is_Loss'].to_numpy()
+        is_win = self.features['Is_Win'].to_numpy()
+        gap = f['Time_Since_Prev'].fillna(np.inf).to_numpy()
+        prev_pl = f['Prev_PL'].to_numpy()
+        prev_loss = f['Prev_Is_Loss'].to_numpy()
+        after_win = f['Has_Prev'].to_numpy() & ~prev_loss
+        day_num = f['Daily_Trade_Num'].to_numpy()
+        new_day = day_num == 1
+        # Index one past the last trade of each trade's day
+        day_end = np.searchsorted(np.flatnonzero(new_day), np.arange(len(pl)), side='right')
+        day_end = np.append(np.flatnonzero(new_day), len(pl))[day_end]
+        
+        def sums(values, start=lo):
+            return _window_sums(values, start, hi)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Overtrading
+            days = np.where(n > 0, 1 + sums(new_day, lo1), 0)
+            avg_trades_per_day = n / days
+            # The window's first day may be cut off; later days are whole (or end at the window end)
+            first_day_end = np.minimum(np.take(day_end, lo, mode='clip'), hi)
+            later_days_max = np.where(first_day_end < hi, _window_max(day_num, first_day_end, np.maximum(hi, first_day_end)), 0)
+            max_trades_per_day = np.maximum(first_day_end - lo, later_days_max)
+            positive_gap = gap > 0
+            avg_gap = sums(np.where(positive_gap & np.isfinite(gap), gap, 0), lo1) / sums(positive_gap & np.isfinite(gap), lo1)
+            rapid_trade_pct = sums(gap < 1, lo1) / n * 100
+            avg_trade_size = sums(abs_pl) / n
+            total_estimated_costs = n * avg_trade_size * 0.001
+            
+            # Loss aversion
+            wins, losses = sums(is_win), sums(is_loss)
+            avg_win = sums(np.where(is_win, pl, 0)) / wins
+            avg_loss = np.abs(sums(np.where(is_loss, pl, 0)) / losses)
+            risk_reward_ratio = np.where(avg_loss > 0, avg_win / avg_loss, 0)
+            largest_win = _window_max(pl, lo, np.maximum(hi, lo))
+            largest_loss = _window_max(-pl, lo, np.maximum(hi, lo))
+            win_rate = wins / n * 100
+            
+            # Revenge trading
+            after_loss = sums(prev_loss, lo1)
+            avg_time_after_loss = sums(np.where(prev_loss, gap, 0), lo1) / after_loss
+            after_win_count = sums(after_win, lo1)
+            avg_time_after_win = np.where(after_win_count > 0,
+                                          sums(np.where(after_win, gap, 0), lo1) / after_win_count,
+                                          avg_time_after_loss)
+            rapid_same_asset_pct = sums(prev_loss & f['Same_Asset_As_Prev'].to_numpy() & (gap < 30), lo1) / after_loss * 100
+            emotional_cluster_pct = sums(prev_loss & (gap < 15), lo1) / after_loss * 100
+            win_rate_after_loss = sums(prev_loss & is_win, lo1) / after_loss * 100
+            # A streak of 2+ inside the window needs its previous loss inside the window too
+            multiple_losses = f['Loss_Streak'].to_numpy() >= 2
+            multiple_count = sums(multiple_losses, lo1)
+            escalation_ratio = np.where((multiple_count > 0) & (avg_trade_size > 0),
+                                        sums(np.where(multiple_losses, abs_pl, 0), lo1) / multiple_count / avg_trade_size, 1)
+            
+            # Human Tax: a trade is over the daily limit once it is the 9th of its day within the window
+            taxed = np.where(is_loss, abs_pl, 0)
+            rapid_or_revenge = (gap < 1.0) | ((gap < 15.0) & prev_loss)
+            flagged = np.where((day_num > 8) | rapid_or_revenge, taxed, 0)
+            cut_limit = np.maximum(np.minimum(lo + 8, first_day_end), lo1)
+            human_tax = (_window_sums(np.where(rapid_or_revenge, taxed, 0), lo1, cut_limit)
+                         + _window_sums(taxed, cut_limit, np.maximum(first_day_end, cut_limit))
+                         + _window_sums(flagged, first_day_end, hi))
+        
+        rows = []
+        for k in range(len(ends)):
+            a, b = lo[k], hi[k]
+            row = {'start': starts[k], 'end': ends[k], 'trades': int(n[k]),
+                   'overtrading': 0, 'loss_aversion': 0, 'revenge_trading': 0,
+                   'human_tax': round(float(human_tax[k]), 2) if n[k] else 0.0}
+            if n[k] == 0:
+                rows.append(row)
+                continue
+            
+            # Summed directly: a net return that is zero up to rounding noise decides the cost ratio
+            total_net_return = pl[a:b].sum()
+            cost_to_return_ratio = abs(total_estimated_costs[k] / total_net_return) if total_net_return != 0 else 0
+            small_move_threshold = avg_trade_size[k] * 0.02
+            small_moves = np.abs(prev_pl[a + 1:b]) <= small_move_threshold
+            avg_time_after_small_move = gap[a + 1:b][small_moves].mean() if small_moves.any() else np.nan
+            if small_moves.any():
+                frequency_increase_ratio = avg_gap[k] / avg_time_after_small_move if avg_time_after_small_move > 0 else 1
+            else:
+                frequency_increase_ratio = 1
+            row['overtrading'] = score_overtrading(avg_trades_per_day[k], max_trades_per_day[k], rapid_trade_pct[k],
+                                                   frequency_increase_ratio, cost_to_return_ratio,
+                                                   total_net_return)['score']
+            
+            window_losses = pl[a:b][is_loss[a:b]]
+            if wins[k] and losses[k]:
+                loss_sizes = np.sort(np.abs(window_losses))
+                if len(loss_sizes) > 1:
+                    third = max(1, len(loss_sizes) // 3)
+                    earlier = loss_sizes[:third].mean()
+                    loss_escalation = loss_sizes[-third:].mean() / earlier if earlier > 0 else 1
+                else:
+                    loss_escalation = 1
+                loss_to_win_ratio = largest_loss[k] / largest_win[k] if largest_win[k] > 0 else 0
+                median_win = np.median(pl[a:b][is_win[a:b]])
+                median_loss = abs(np.median(window_losses))
+                cutting_winners_pattern = win_rate[k] > 55 and risk_reward_ratio[k] < 1.2
+                row['loss_aversion'] = score_loss_aversion(risk_reward_ratio[k], loss_escalation, loss_to_win_ratio,
+                                                           cutting_winners_pattern, median_win, median_loss)['score']
+            
+            if n[k] >= 2 and losses[k] and after_loss[k]:
+                large_loss_threshold = np.quantile(window_losses, 0.2)
+                after_large_loss = prev_loss[a + 1:b] & (prev_pl[a + 1:b] <= large_loss_threshold)
+                avg_abs_pl_after_large_loss = abs_pl[a + 1:b][after_large_loss].mean() if after_large_loss.any() else 0
+                size_increase_ratio = avg_abs_pl_after_large_loss / avg_trade_size[k] if avg_trade_size[k] > 0 else 1
+                row['revenge_trading'] = score_revenge_trading(size_increase_ratio, rapid_same_asset_pct[k],
+                                                               emotional_cluster_pct[k], escalation_ratio[k],
+                                                               avg_time_after_loss[k], avg_time_after_win[k],
+                                                               win_rate_after_loss[k])['score']
+            rows.append(row)
+        
+        return pd.DataFrame(rows, columns=['start', 'end', 'trades', 'overtrading', 'loss_aversion',
+                                           'revenge_trading', 'human_tax'])
+
+    @_memoized
     def calculate_prosperity_projection(self):
         """
         Project 10-year growth of the Human Tax at 7% annual return.
@@ -534,37 +1255,40 @@ class BiasDetector:
         years = 10
         projection = tax * ((1 + rate) ** years)
         return round(projection, 2)
-    
-    def _get_overtrading_description(self, severity, avg_trades, rapid_pct, cost_ratio):
-        if severity == 'High':
-            return f"You're averaging {avg_trades:.1f} trades per day with {rapid_pct:.1f}% occurring within 1 minute. Transaction costs represent {cost_ratio:.1f}% of your net returns. This suggests impulsive, strategy-less trading."
-        elif severity == 'Moderate':
-            return f"Your trading frequency ({avg_trades:.1f} trades/day) is elevated (>10/day) with {rapid_pct:.1f}% rapid-fire trades. Consider filtering for only A+ setups."
-        else:
-            return "Your trading frequency appears reasonable (<10/day), but continue to monitor for impulsive trades."
-    
-    def _get_loss_aversion_description(self, severity, rr_ratio, loss_win_ratio, cutting_winners):
-        if severity == 'High':
-            desc = f"Your risk-reward ratio ({rr_ratio:.2f}) shows small average gains but large average losses. "
-            if loss_win_ratio > 2:
-                desc += f"Your largest loss is {loss_win_ratio:.1f}x your largest win, indicating you're holding losing positions too long. "
-            if cutting_winners:
-                desc += "High win rate with low average wins suggests cutting winners short."
-            return desc
-        elif severity == 'Moderate':
-            return f"Your risk-reward ratio ({rr_ratio:.2f}) could be improved. Consider letting winners run longer and cutting losses faster when they breach your risk threshold."
-        else:
-            return "Your risk-reward management appears balanced."
-    
-    def _get_revenge_trading_description(self, severity, emotional_pct, rapid_same_asset, escalation):
-        if severity == 'High':
-            desc = f"You're clustering {emotional_pct:.1f}% of trades within 15 minutes after losses. "
-            if rapid_same_asset > 30:
-                desc += f"{rapid_same_asset:.1f}% involve rapid re-entry into the same asset. "
-            if escalation > 1.3:
-                desc += f"Trade sizes increase {((escalation-1)*100):.0f}% after consecutive losses, showing escalating risk exposure."
-            return desc + "This suggests emotionally driven attempts to 'win back' money."
-        elif severity == 'Moderate':
-            return f"You show some tendency to trade quickly after losses ({emotional_pct:.1f}% within 15 minutes). Take breaks after losses to avoid emotional decisions."
-        else:
-            return "You're managing emotions well after losses. Continue this discipline."
+
+
+def overtrading_description(severity, avg_trades, rapid_pct, cost_ratio):
+    if severity == 'High':
+        return f"You're averaging {avg_trades:.1f} trades per day with {rapid_pct:.1f}% occurring within 1 minute. Transaction costs represent {cost_ratio:.1f}% of your net returns. This suggests impulsive, strategy-less trading."
+    elif severity == 'Moderate':
+        return f"Your trading frequency ({avg_trades:.1f} trades/day) is elevated (>10/day) with {rapid_pct:.1f}% rapid-fire trades. Consider filtering for only A+ setups."
+    else:
+        return "Your trading frequency appears reasonable (<10/day), but continue to monitor for impulsive trades."
+
+
+def loss_aversion_description(severity, rr_ratio, loss_win_ratio, cutting_winners):
+    if severity == 'High':
+        desc = f"Your risk-reward ratio ({rr_ratio:.2f}) shows small average gains but large average losses. "
+        if loss_win_ratio > 2:
+            desc += f"Your largest loss is {loss_win_ratio:.1f}x your largest win, indicating you're holding losing positions too long. "
+        if cutting_winners:
+            desc += "High win rate with low average wins suggests cutting winners short."
+        return desc
+    elif severity == 'Moderate':
+        return f"Your risk-reward ratio ({rr_ratio:.2f}) could be improved. Consider letting winners run longer and cutting losses faster when they breach your risk threshold."
+    else:
+        return "Your risk-reward management appears balanced."
+
+
+def revenge_trading_description(severity, emotional_pct, rapid_same_asset, escalation):
+    if severity == 'High':
+        desc = f"You're clustering {emotional_pct:.1f}% of trades within 15 minutes after losses. "
+        if rapid_same_asset > 30:
+            desc += f"{rapid_same_asset:.1f}% involve rapid re-entry into the same asset. "
+        if escalation > 1.3:
+            desc += f"Trade sizes increase {((escalation-1)*100):.0f}% after consecutive losses, showing escalating risk exposure."
+        return desc + "This suggests emotionally driven attempts to 'win back' money."
+    elif severity == 'Moderate':
+        return f"You show some tendency to trade quickly after losses ({emotional_pct:.1f}% within 15 minutes). Take breaks after losses to avoid emotional decisions."
+    else:
+        return "You're managing emotions well after losses. Continue this discipline."
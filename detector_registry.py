@@ -0,0 +1,181 @@
+"""
+Registry of bias detector plugins.
+
+A feature is a named per-trade column derived from the trade log (time since
+the previous trade, previous P/L, trades so far that day...). A detector is a
+function of a BiasDetector that reads the features it declares and returns a
+result dict with at least 'score' (0-100) and 'metrics'.
+
+BiasDetector computes the union of the features its detectors need once,
+then runs the detectors concurrently on a shared thread pool (NumPy and
+pandas release the GIL in their kernels), so adding a detector adds its own
+work but never another pass to derive the inputs it shares with others.
+
+    from detector_registry import register_feature, register_detector
+
+    @register_feature('Is_Weekend')
+    def weekend(detector, f):
+        return detector.df['Timestamp'].dt.dayofweek.to_numpy() >= 5
+
+    @register_detector('weekend_trading', features=('Is_Weekend',), bias='Weekend Trading')
+    def detect_weekend_trading(detector):
+        share = detector.features['Is_Weekend'].mean()
+        return {'score': round(float(share) * 100, 1), 'metrics': {'weekend_pct': round(float(share) * 100, 1)}}
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+DETECTOR_WORKERS = int(os.environ.get("DETECTOR_WORKERS", min(8, os.cpu_count() or 1)))
+
+# name -> {'fn', 'requires'}, in registration order
+FEATURES = {}
+
+# name -> {'fn', 'features', 'bias', 'section', 'behavioral', 'recommend'}, in registration order
+DETECTORS = {}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def register_feature(name, requires=()):
+    """
+    Register a per-trade feature.
+
+    The decorated function is called as fn(detector, f), where f maps each
+    name in `requires` to its already-built column, and returns an array
+    (or Series) aligned with detector.df.
+    """
+    def decorator(fn):
+        unknown = [feature for feature in requires if feature not in FEATURES]
+        if unknown:
+            raise ValueError(f"Feature {name!r} requires unregistered features: {unknown}")
+        FEATURES[name] = {'fn': fn, 'requires': tuple(requires)}
+        return fn
+    return decorator
+
+
+def register_detector(name, features=(), bias=None, section=False, behavioral=False, recommend=None):
+    """
+    Register a detector.
+
+    Args:
+        name (str): Result key, e.g. 'overtrading'
+        features (tuple): Features the detector reads from detector.features
+        bias (str): Display name, e.g. 'Overtrading'
+        section (bool): A top-level analyze_all() section with detected,
+                        severity and description; counts towards the summary
+        behavioral (bool): Scored in the full 13-bias report
+        recommend: fn(result) -> list of recommendation dicts, for build_recommendations()
+
+    Returns:
+        A decorator. The decorated function takes the detector; what it
+        returns can be used as a BiasDetector method, which runs the
+        detector through BiasDetector.run_detectors() so its result is
+        memoized with the others.
+    """
+    def decorator(fn):
+        unknown = [feature for feature in features if feature not in FEATURES]
+        if unknown:
+            raise ValueError(f"Detector {name!r} requires unregistered features: {unknown}")
+        DETECTORS[name] = {
+            'fn': fn,
+            'features': tuple(features),
+            'bias': bias or name.replace('_', ' ').title(),
+            'section': section,
+            'behavioral': behavioral,
+            'recommend': recommend
+        }
+
+        @wraps(fn)
+        def method(detector):
+            return detector.run_detectors([name])[name]
+        return method
+    return decorator
+
+
+def section_detectors():
+    """Names of the detectors that are analyze_all() sections."""
+    return [name for name, entry in DETECTORS.items() if entry['section']]
+
+
+def behavioral_detectors():
+    """Names of the detectors in the full 13-bias report."""
+    return [name for name, entry in DETECTORS.items() if entry['behavioral']]
+
+
+def resolve_features(detector_names, available=()):
+    """
+    Features the detectors need that aren't in `available`, dependencies first.
+
+    Returns:
+        list: Feature names in build order
+    """
+    order = []
+    seen = set(available)
+
+    def visit(feature):
+        if feature in seen:
+            return
+        seen.add(feature)
+        for dependency in FEATURES[feature]['requires']:
+            visit(dependency)
+        order.append(feature)
+
+    for name in detector_names:
+        for feature in DETECTORS[name]['features']:
+            visit(feature)
+    return order
+
+
+def build_features(detector, names, existing):
+    """
+    Build the named features in order.
+
+    Args:
+        existing: Mapping of already-built features (e.g. detector.features)
+
+    Returns:
+        dict: {name: column} for the newly built features
+    """
+    built = {}
+    for name in names:
+        entry = FEATURES[name]
+        inputs = {dependency: built[dependency] if dependency in built else existing[dependency]
+                  for dependency in entry['requires']}
+        built[name] = entry['fn'](detector, inputs)
+    return built
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=DETECTOR_WORKERS, thread_name_prefix='detector')
+        return _pool
+
+
+def _timed_call(fn, detector):
+    start = time.perf_counter()
+    result = fn(detector)
+    return result, time.perf_counter() - start
+
+
+def run_concurrently(detector, names):
+    """
+    Run the named detectors on the shared pool.
+
+    A single detector (or a pool of one worker) runs inline, so a detector
+    may call another detector's method without waiting on a pool slot.
+    Detectors only read detector.df and detector.features, which are not
+    modified while they run.
+
+    Returns:
+        dict: {name: (result, seconds)}
+    """
+    if len(names) == 1 or DETECTOR_WORKERS <= 1:
+        return {name: _timed_call(DETECTORS[name]['fn'], detector) for name in names}
+    futures = {name: _executor().submit(_timed_call, DETECTORS[name]['fn'], detector) for name in names}
+    return {name: future.result() for name, future in futures.items()}
@@ -194,18 +194,20 @@ class TradingViewObserver {
 
     async sendToBackend(tradeData) {
         try {
-            // We need to fetch history first to send a complete context?
-            // For now, let's send just this trade and let backend handle history retrieval if connected to DB,
-            // or we mock history on the client side if we store it.
-            // app.js handles history. Here we are in content script.
-            // We can retrieve history from chrome.storage.local
-
-            const storage = await chrome.storage.local.get(['tradeHistory', 'session_human_tax']);
+            const storage = await chrome.storage.local.get(['tradeHistory', 'session_human_tax', 'session_id']);
             const history = storage.tradeHistory || [];
 
+            // Stable per-install session ID lets the backend score incrementally
+            let sessionId = storage.session_id;
+            if (!sessionId) {
+                sessionId = crypto.randomUUID();
+                await chrome.storage.local.set({ session_id: sessionId });
+            }
+
+            // The backend keeps this session's trade history, so only the attempt is sent
             const payload = {
                 ...tradeData,
-                history: history
+                session_id: sessionId
             };
 
             const response = await fetch('http://127.0.0.1:5001/api/realtime', {
@@ -220,6 +222,9 @@ class TradingViewObserver {
 
             if (result.bias_detected) {
                 this.showIntervention(result);
+                if (result.intervention_job) {
+                    this.pollInterventionMessage(result.intervention_job);
+                }
             }
 
             // Handle Human Tax Impact
@@ -242,20 +247,49 @@ class TradingViewObserver {
                 });
             }
 
-            // Save this new trade to local history
-            history.push({
+            // Save this new trade to local history (for the popup) and append it to the server-side session
+            const trade = {
                 'Timestamp': tradeData.timestamp,
                 'Buy/sell': tradeData.action,
                 'Asset': tradeData.asset,
                 'P/L': 0 // Paper trading fill doesn't have P/L yet
-            });
+            };
+            history.push(trade);
             await chrome.storage.local.set({ tradeHistory: history });
+            await this.appendToSession(sessionId, trade, history);
 
         } catch (error) {
             console.error('🏦 ZenTrade: Error sending trade to backend:', error);
         }
     }
 
+    async appendToSession(sessionId, trade, history) {
+        // The append says how many trades the server should already hold. Its copy is lost on
+        // restart (in-memory store), so on a mismatch (409) the whole local log is re-uploaded
+        const base = `http://127.0.0.1:5001/api/sessions/${encodeURIComponent(sessionId)}`;
+        try {
+            const response = await fetch(`${base}/trades`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ trades: [trade], expected_count: history.length - 1 })
+            });
+            if (response.status === 409 || response.status === 404) {
+                console.log(`🏦 ZenTrade: Resyncing ${history.length} trades to the server session`);
+                await fetch(`${base}/trades`, {
+                    method: 'PUT',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({ trades: history })
+                });
+            }
+        } catch (error) {
+            console.error('🏦 ZenTrade: Error saving trade to the server session:', error);
+        }
+    }
+
     showIntervention(result) {
         // Create a custom overlay
         const overlay = document.createElement('div');
@@ -279,7 +313,7 @@ class TradingViewObserver {
             <div style="background: rgba(255,255,255,0.2); padding: 5px 10px; border-radius: 6px; font-size: 12px; margin-bottom: 10px; display: inline-block;">
                 ${result.bias_type} Detected (Severity: ${result.severity}/10)
             </div>
-            <p style="margin: 0; font-size: 14px; line-height: 1.4;">
+            <p id="zen-message" style="margin: 0; font-size: 14px; line-height: 1.4;">
                 ${result.intervention_message}
             </p>
             <button id="zen-dismiss" style="margin-top: 15px; background: white; color: #ff4757; border: none; padding: 8px 16px; border-radius: 6px; font-weight: bold; cursor: pointer; width: 100%;">
@@ -295,6 +329,24 @@ class TradingViewObserver {
 
         // Auto remove after 10 seconds? No, intervention requires action.
     }
+
+    async pollInterventionMessage(jobId) {
+        // The decision arrives immediately with a static message; swap in the coach's message once it's ready
+        for (let attempt = 0; attempt < 10; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            try {
+                const job = await (await fetch(`http://127.0.0.1:5001/api/coach/jobs/${jobId}`)).json();
+                if (job.status === 'pending') continue;
+                const messageEl = document.getElementById('zen-message');
+                if (job.status === 'done' && job.result && messageEl) {
+                    messageEl.textContent = job.result;
+                }
+                return;
+            } catch (error) {
+                return;
+            }
+        }
+    }
 }
 
 // Initialize only if on TradingView
@@ -40,6 +40,16 @@ document.getElementById('uploadCSV').addEventListener('click', () => {
 document.getElementById('clearHistory').addEventListener('click', () => {
     chrome.storage.local.set({ tradeHistory: [] });
     // UI update handled by storage listener
+
+    // Drop the server-side copies too: the live session and the uploaded CSV's session
+    chrome.storage.local.get(['session_id'], (result) => {
+        if (result.session_id) {
+            for (const sessionId of [result.session_id, `${result.session_id}-csv`]) {
+                fetch(`http://127.0.0.1:5001/api/sessions/${encodeURIComponent(sessionId)}`, { method: 'DELETE' })
+                    .catch(error => console.error('Error clearing server session:', error));
+            }
+        }
+    });
 });
 
 document.getElementById('fileInput').addEventListener('change', (e) => {
@@ -119,23 +129,76 @@ function parseCSV(csv) {
     return trades;
 }
 
+async function getUploadSessionId() {
+    const storage = await chrome.storage.local.get(['session_id']);
+    let sessionId = storage.session_id;
+    if (!sessionId) {
+        sessionId = crypto.randomUUID();
+        await chrome.storage.local.set({ session_id: sessionId });
+    }
+    // Keep uploaded CSVs separate from the live trades captured by the content script
+    return `${sessionId}-csv`;
+}
+
+// The local report is shown right away; swap in Gemini's narrative insight once it is ready
+async function pollInsight(report, recs) {
+    for (let attempt = 0; attempt < 30; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        try {
+            const job = await (await fetch(`http://127.0.0.1:5001/api/coach/jobs/${report.insight_job}`)).json();
+            if (job.status === 'pending') continue;
+            if (job.status === 'done' && job.result) {
+                recs[0].recommendation = job.result;
+                displayRecommendations(recs);
+                chrome.storage.local.set({ geminiAnalysis: { ...report, coaching_insight: job.result } });
+            }
+        } catch (error) {
+            console.error('Insight polling failed:', error);
+        }
+        return;
+    }
+}
+
 async function fetchRecommendations(trades) {
     const contentDiv = document.getElementById('recommendationsContent');
     const container = document.getElementById('recommendations');
 
     container.style.display = 'block';
-    contentDiv.innerHTML = '<p style="color: #787b86;">Asking Gemini for advice...</p>';
+    contentDiv.innerHTML = '<p style="color: #787b86;">Analyzing your trades...</p>';
 
     try {
         console.log('Fetching recommendations for', trades.length, 'trades...');
+        // Upload the CSV once into its own server-side session, then analyze it by reference
+        const sessionId = await getUploadSessionId();
+        const sessionUrl = `http://127.0.0.1:5001/api/sessions/${encodeURIComponent(sessionId)}/trades`;
+        const uploadResponse = await fetch(sessionUrl, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ trades: trades })
+        });
+        const upload = await uploadResponse.json();
+        if (upload.error) {
+            contentDiv.innerHTML = `<p style="color: #ff4757;">Upload Error: ${upload.error}</p>`;
+            return;
+        }
+
         // Correct endpoint is /api/analyze-csv
         const response = await fetch('http://127.0.0.1:5001/api/analyze-csv', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ trades: trades })
+            body: JSON.stringify({ session_id: sessionId })
         });
 
-        const data = await response.json();
+        let data = await response.json();
+
+        // Long analyses finish in the background; poll until the job is done
+        while (response.status === 202 && data.status === 'pending') {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            const job = await (await fetch(`http://127.0.0.1:5001/api/coach/jobs/${data.job_id}`)).json();
+            if (job.status === 'pending') continue;
+            data = job.status === 'done' ? job.result : { error: job.result || job.error };
+            break;
+        }
 
         if (data.error) {
             console.error('Gemini API Error:', data.error);
@@ -155,6 +218,9 @@ async function fetchRecommendations(trades) {
                 recommendation: data.coaching_insight
             }];
             displayRecommendations(recs);
+            if (data.insight_job) {
+                pollInsight(data, recs);
+            }
         } else if (data.recommendations && data.recommendations.length > 0) {
             displayRecommendations(data.recommendations);
         } else {
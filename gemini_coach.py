@@ -1,16 +1,291 @@
 import os
 import google.generativeai as genai
 import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from message_bank import MessageBank
+from metrics import observe_stage
+from response_cache import ResponseCache, cache_key
+
+# Seconds a request handler waits for Gemini before answering with the local fallback
+RECOMMENDATIONS_DEADLINE = float(os.environ.get("GEMINI_RECOMMENDATIONS_DEADLINE", 8))
+# The realtime path answers immediately by default; the Gemini message follows as a background job
+INTERVENTION_DEADLINE = float(os.environ.get("GEMINI_INTERVENTION_DEADLINE", 0))
+ANALYSIS_DEADLINE = float(os.environ.get("GEMINI_ANALYSIS_DEADLINE", 20))
+
+# Hard limit on a single Gemini call (REST or SDK), so abandoned calls don't hold a worker for minutes
+REQUEST_TIMEOUT = float(os.environ.get("GEMINI_REQUEST_TIMEOUT", 60))
+
+# Finished background results are kept this long for polling
+JOB_TTL = 600
+
+# Gemini jobs queued or running at once; beyond this, new calls are shed and callers use their fallback
+MAX_PENDING = int(os.environ.get("GEMINI_MAX_PENDING", 32))
+
+# Coaching responses for identical (bucketed) inputs are reused for this long
+CACHE_TTL = float(os.environ.get("GEMINI_CACHE_TTL", 24 * 3600))
+
+# Concurrent Gemini calls for the chunks of one map-reduce analysis
+ANALYSIS_MAP_WORKERS = int(os.environ.get("GEMINI_ANALYSIS_MAP_WORKERS", 4))
+
+# The 13 behavioral biases the full-log analysis scores, with the hint given to the model
+ANALYSIS_BIASES = {
+    'Loss Aversion': 'Holding losers too long',
+    'Confirmation Bias': 'Only trading one asset despite losses',
+    'Revenge Trading': 'Increasing size after a loss',
+    'Herd Mentality': 'Trading only popular tickers: TSLA, NVDA, AAPL',
+    'Sunk Cost Fallacy': 'Averaging down on a failing trade',
+    'Overconfidence': 'Spiking risk after a win streak',
+    'Availability Bias': "Trading what's in the news",
+    'Recency Bias': 'Overweighting the last 3 trades',
+    'Anchoring Bias': 'Fixating on a previous price level',
+    "Gambler's Fallacy": 'Predicting a reversal just because of a streak',
+    'Mental Accounting': "Taking high risk with 'house money'",
+    'Disposition Effect': 'Selling winners too early',
+    'Clean Trades': 'Trades that follow discipline'
+}
+
+
+def _bias_list():
+    """ANALYSIS_BIASES as the numbered list used in prompts"""
+    return '\n'.join(f"        {i}. {name} ({hint})" for i, (name, hint) in enumerate(ANALYSIS_BIASES.items(), 1))
+
+
+# Share of interventions served from the message bank that still get a live Gemini message
+INTERVENTION_SAMPLE_RATE = float(os.environ.get("GEMINI_INTERVENTION_SAMPLE_RATE", 0))
+
+
+class GeminiError(Exception):
+    """A Gemini call failed; the message is safe to show to the user"""
+
+
+class CircuitBreaker:
+    """
+    Skip calls to a dependency while its recent failure rate is too high.
+    
+    Tracks the outcome of the last `window` calls. Once at least `min_calls`
+    are recorded and the failure rate reaches `failure_rate`, the breaker
+    opens and allow() returns False for `cooldown` seconds. After that a
+    single trial call is let through: success closes the breaker again,
+    failure re-opens it.
+    
+    allow() hands out a ticket that the caller passes back to record(), so
+    outcomes of calls admitted before the breaker last opened (still in
+    flight when it did) are dropped instead of being taken for the trial.
+    """
+    
+    def __init__(self, failure_rate=0.5, window=20, min_calls=5, cooldown=30.0):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._trial_in_flight = False
+        # Bumped whenever the breaker opens
+        self._generation = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at < self.cooldown:
+                return 'open'
+            return 'half-open'
+    
+    def allow(self):
+        """
+        Whether a call may go ahead.
+        
+        Returns:
+            A (generation, is_trial) ticket to pass to record(), or False
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return (self._generation, False)
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return (self._generation, True)
+    
+    def record(self, success, ticket):
+        with self._lock:
+            generation, is_trial = ticket
+            if is_trial:
+                # Outcome of the half-open trial call
+                self._trial_in_flight = False
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return
+            if self._opened_at is not None or generation != self._generation:
+                # Admitted before the breaker opened; the outcome no longer says anything
+                return
+            
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                self._opened_at = time.monotonic()
+                self._generation += 1
+                print(f"⚠️ Gemini circuit breaker opened ({failures}/{len(self._outcomes)} recent calls failed)")
+
 
 class GeminiCoach:
-    def __init__(self):
+    def __init__(self, max_workers=4):
         self.api_key = os.environ.get("GEMINI_API_KEY")
+        # Overridable so tests can point the REST client at a local stub server
+        self.api_base = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
         if self.api_key:
             genai.configure(api_key=self.api_key)
             # Use gemini-2.5-flash (other models quota exceeded)
             self.model = genai.GenerativeModel('gemini-2.5-flash')
         else:
             self.model = None
+        
+        # Set GEMINI_CACHE_DB_PATH to keep cached responses across restarts
+        self.cache = ResponseCache(ttl=CACHE_TTL, db_path=os.environ.get("GEMINI_CACHE_DB_PATH"))
+        # Pre-generated realtime messages (see message_bank.py); empty if the file doesn't exist
+        self.message_bank = MessageBank.load(os.environ.get("INTERVENTION_BANK_PATH", "intervention_bank.json"))
+        self.breaker = CircuitBreaker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gemini')
+        # Separate pool for map-reduce chunk calls, so an analysis job never waits on its own pool
+        self._map_executor = ThreadPoolExecutor(max_workers=ANALYSIS_MAP_WORKERS, thread_name_prefix='gemini-map')
+        # SDK calls run here so they can be abandoned after REQUEST_TIMEOUT (see _generate_text)
+        self._sdk_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gemini-sdk')
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+        # Unfinished jobs by coalescing key, and how many jobs are queued or running
+        self._coalesced = {}
+        self._pending = 0
+    
+    def _submit(self, request_fn, *args, coalesce_key=None):
+        """
+        Run a Gemini request in the background, guarded by the circuit breaker.
+        
+        Args:
+            coalesce_key: While a job submitted with the same key is unfinished,
+                          its ID is returned instead of starting a duplicate call
+        
+        Returns:
+            str: Job ID for wait()/poll(), or None if the breaker is open or
+                 MAX_PENDING jobs are already queued
+        """
+        stage = 'gemini' + request_fn.__name__.replace('_request', '')
+        
+        def run(ticket):
+            start = time.perf_counter()
+            try:
+                result = request_fn(*args)
+            except Exception:
+                self.breaker.record(False, ticket)
+                raise
+            finally:
+                observe_stage(stage, time.perf_counter() - start)
+            self.breaker.record(True, ticket)
+            return result
+        
+        job_id = uuid.uuid4().hex
+        with self._jobs_lock:
+            if coalesce_key is not None and coalesce_key in self._coalesced:
+                return self._coalesced[coalesce_key]
+            if self._pending >= MAX_PENDING:
+                print(f"⏭️ {self._pending} Gemini calls already queued, skipping LLM call.")
+                return None
+            ticket = self.breaker.allow()
+            if not ticket:
+                print("⏭️ Gemini circuit breaker open, skipping LLM call.")
+                return None
+            now = time.monotonic()
+            for stale in [j for j, (_, created) in self._jobs.items() if now - created > JOB_TTL]:
+                del self._jobs[stale]
+            future = self._executor.submit(run, ticket)
+            self._jobs[job_id] = (future, now)
+            self._pending += 1
+            if coalesce_key is not None:
+                self._coalesced[coalesce_key] = job_id
+        future.add_done_callback(lambda _: self._finish(job_id, coalesce_key))
+        return job_id
+    
+    def _finish(self, job_id, coalesce_key):
+        with self._jobs_lock:
+            self._pending -= 1
+            if coalesce_key is not None and self._coalesced.get(coalesce_key) == job_id:
+                del self._coalesced[coalesce_key]
+    
+    def queue_stats(self):
+        """Gemini jobs queued or running, and the limit beyond which calls are shed"""
+        with self._jobs_lock:
+            return {'pending': self._pending, 'max_pending': MAX_PENDING, 'coalescing': len(self._coalesced)}
+    
+    def wait(self, job_id, timeout):
+        """
+        Wait up to `timeout` seconds for a background job.
+        
+        Returns:
+            tuple: (status, result) where status is 'done', 'pending', 'failed' or 'unknown'
+        """
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return 'unknown', None
+        future = job[0]
+        try:
+            return 'done', future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return 'pending', None
+        except Exception as e:
+            return 'failed', str(e)
+    
+    def poll(self, job_id):
+        """Non-blocking wait()"""
+        return self.wait(job_id, timeout=0)
+    
+    def start_recommendations(self, bias_analysis):
+        """Background generate_recommendations(); see _submit()"""
+        if not self.model:
+            return None
+        return self._submit(self._request_recommendations, bias_analysis)
+    
+    def start_intervention(self, bias_type, severity, trade_data, user_id=None):
+        """
+        Background generate_intervention(); see _submit()
+        
+        With a `user_id`, a burst of attempts from the same trader for the
+        same bias shares one Gemini call instead of queueing duplicates.
+        """
+        if not self.model:
+            return None
+        coalesce_key = ('intervention', user_id, bias_type) if user_id else None
+        return self._submit(self._request_intervention, bias_type, severity, trade_data,
+                            coalesce_key=coalesce_key)
+    
+    def cached_intervention(self, bias_type, severity, trade_data):
+        """A previously generated intervention message for these inputs, or None"""
+        if not self.model:
+            return None
+        return self.cache.get(self._intervention_key(bias_type, severity, trade_data))
+    
+    def bank_intervention(self, bias_type, severity, trade_data):
+        """A pre-generated message for this attempt from the message bank, or None"""
+        return self.message_bank.lookup(bias_type, severity, trade_data.get('asset'), trade_data.get('timestamp'))
+    
+    def sample_live_intervention(self):
+        """Whether an attempt the bank already covers should also get a live Gemini message"""
+        return bool(self.model) and random.random() < INTERVENTION_SAMPLE_RATE
+    
+    def start_analysis(self, trade_data_sample):
+        """Background analyze_trade_data(); see _submit()"""
+        if not self.api_key:
+            return None
+        return self._submit(self._request_analysis, trade_data_sample)
 
     def generate_recommendations(self, bias_analysis):
         """
@@ -24,31 +299,36 @@ class GeminiCoach:
         """
         if not self.model:
             return []
+        
+        try:
+            return self._request_recommendations(bias_analysis)
+        except Exception as e:
+            print(f"❌ Error generating recommendations with Gemini: {e}")
+            return []
 
+    def _request_recommendations(self, bias_analysis):
+        """generate_recommendations() without the fallback; raises on failure"""
         # Extract relevant information for the prompt
         summary = bias_analysis.get('summary', {})
-        overtrading = bias_analysis.get('overtrading', {})
-        loss_aversion = bias_analysis.get('loss_aversion', {})
-        revenge_trading = bias_analysis.get('revenge_trading', {})
+        detectors = {name: result for name, result in bias_analysis.items() if name != 'summary'}
         
         # specific metrics to include in prompt
         metrics_summary = {
             "win_rate": summary.get('win_rate'),
             "total_trades": summary.get('total_trades'),
             "biases_detected": summary.get('biases_detected', []),
-            "overtrading_detected": overtrading.get('detected'),
-            "loss_aversion_detected": loss_aversion.get('detected'),
-            "revenge_trading_detected": revenge_trading.get('detected')
+            **{f"{name}_detected": result.get('detected') for name, result in detectors.items()}
         }
         
-        if overtrading.get('detected'):
-            metrics_summary['overtrading_metrics'] = overtrading.get('metrics')
-            
-        if loss_aversion.get('detected'):
-            metrics_summary['loss_aversion_metrics'] = loss_aversion.get('metrics')
-            
-        if revenge_trading.get('detected'):
-            metrics_summary['revenge_trading_metrics'] = revenge_trading.get('metrics')
+        for name, result in detectors.items():
+            if result.get('detected'):
+                metrics_summary[f'{name}_metrics'] = result.get('metrics')
+
+        key = cache_key('recommendations', metrics_summary)
+        cached = self.cache.get(key)
+        if cached is not None:
+            print("♻️ Using cached Gemini recommendations.")
+            return cached
 
         prompt = f"""
         You are an expert trading psychology coach. Analyze the following trading behavior data and provide personalized, actionable recommendations to improve the trader's performance and mindset.
@@ -70,23 +350,19 @@ class GeminiCoach:
         Return ONLY the JSON.
         """
         
-        try:
-            print("✨ Requesting recommendations from Gemini...")
-            response = self.model.generate_content(prompt)
-            # Clean up the response to ensure it's valid JSON
-            text = response.text.strip()
-            if text.startswith('```json'):
-                text = text[7:]
-            if text.endswith('```'):
-                text = text[:-3]
-            
-            recommendations = json.loads(text.strip())
-            print(f"✅ Gemini returned {len(recommendations)} recommendations.")
-            return recommendations
-            
-        except Exception as e:
-            print(f"❌ Error generating recommendations with Gemini: {e}")
-            return []
+        print("✨ Requesting recommendations from Gemini...")
+        text = self._generate_text(prompt)
+        # Clean up the response to ensure it's valid JSON
+        text = text.strip()
+        if text.startswith('```json'):
+            text = text[7:]
+        if text.endswith('```'):
+            text = text[:-3]
+        
+        recommendations = json.loads(text.strip())
+        print(f"✅ Gemini returned {len(recommendations)} recommendations.")
+        self.cache.set(key, recommendations)
+        return recommendations
 
     def generate_intervention(self, bias_type, severity, trade_data):
         """
@@ -100,9 +376,45 @@ class GeminiCoach:
         Returns:
             str: The intervention message
         """
+        banked = self.bank_intervention(bias_type, severity, trade_data)
+        if banked and not self.sample_live_intervention():
+            return banked
+        if not self.model:
+            return self.fallback_intervention(bias_type)
+        
+        try:
+            return self._request_intervention(bias_type, severity, trade_data)
+        except Exception as e:
+            print(f"❌ Error generating intervention: {e}")
+            return banked or self.fallback_intervention(bias_type)
+
+    def fallback_intervention(self, bias_type):
+        """Static intervention message used when Gemini is not configured, fails or is too slow"""
         if not self.model:
             return "⚠️ Bias detected. Please pause and review your strategy."
+        return f"⚠️ High risk of {bias_type} detected. Pause and reset."
 
+    def _intervention_key(self, bias_type, severity, trade_data):
+        # Price, timestamp and history vary on every call, so the key only uses what drives the message
+        return cache_key('intervention', {
+            'bias_type': bias_type,
+            'severity': severity,
+            'asset': trade_data.get('asset'),
+            'action': trade_data.get('action')
+        })
+
+    def _request_intervention(self, bias_type, severity, trade_data):
+        """generate_intervention() without the message bank or fallback; raises on failure"""
+        key = self._intervention_key(bias_type, severity, trade_data)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        message = self.compose_intervention(bias_type, severity, trade_data)
+        self.cache.set(key, message)
+        return message
+
+    def compose_intervention(self, bias_type, severity, trade_data):
+        """A fresh intervention message from Gemini, bypassing the cache; raises on failure"""
         prompt = f"""
         You are the ZenTrade Protocol AI, a high-performance behavioral risk coach.
         
@@ -120,18 +432,13 @@ class GeminiCoach:
         Draft the intervention message now.
         """
         
-        try:
-            print(f"✨ Requesting intervention for {bias_type}...")
-            response = self.model.generate_content(prompt)
-            message = response.text.strip()
-            # Remove quotes if present
-            if message.startswith('"') and message.endswith('"'):
-                message = message[1:-1]
-            return message
-            
-        except Exception as e:
-            print(f"❌ Error generating intervention: {e}")
-            return f"⚠️ High risk of {bias_type} detected. Pause and reset."
+        print(f"✨ Requesting intervention for {bias_type}...")
+        message = self._generate_text(prompt).strip()
+        # Remove quotes if present
+        if message.startswith('"') and message.endswith('"'):
+            message = message[1:-1]
+        return message
+
     def analyze_trade_data(self, trade_data_sample):
         """
         Analyze a trading log for behavioral biases using Gemini REST API.
@@ -142,32 +449,28 @@ class GeminiCoach:
         Returns:
             dict: Analysis results with bias scores and insights
         """
-        import requests
-        
         if not self.api_key:
             return {"error": "Gemini API key not configured"}
+        
+        try:
+            return self._request_analysis(trade_data_sample)
+        except GeminiError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            print(f"❌ Error analyzing trades with Gemini: {e}")
+            return {"error": str(e)}
 
+    def _request_analysis(self, trade_data_sample):
+        """analyze_trade_data() without the error dict; raises on failure"""
         prompt = f"""
         Analyze this trading log for 13 specific behavioral biases. 
         Return a JSON object where each key is the bias name and the value is a score from 0-100 based on frequency and severity.
 
         Biases to analyze:
-        1. Loss Aversion (Holding losers too long)
-        2. Confirmation Bias (Only trading one asset despite losses)
-        3. Revenge Trading (Increasing size after a loss)
-        4. Herd Mentality (Trading only popular tickers: TSLA, NVDA, AAPL)
-        5. Sunk Cost Fallacy (Averaging down on a failing trade)
-        6. Overconfidence (Spiking risk after a win streak)
-        7. Availability Bias (Trading what's in the news)
-        8. Recency Bias (Overweighting the last 3 trades)
-        9. Anchoring Bias (Fixating on a previous price level)
-        10. Gambler's Fallacy (Predicting a reversal just because of a streak)
-        11. Mental Accounting (Taking high risk with 'house money')
-        12. Disposition Effect (Selling winners too early)
-        13. Clean Trades (Trades that follow discipline)
+{_bias_list()}
 
         Data to analyze:
-        {json.dumps(trade_data_sample, indent=2)}
+        {json.dumps(trade_data_sample, separators=(',', ':'))}
 
         Response Format:
         {{
@@ -181,58 +484,252 @@ class GeminiCoach:
         Return ONLY the JSON.
         """
         
-        try:
-            print(f"✨ Requesting comprehensive bias analysis for {len(trade_data_sample)} trades...")
+        print(f"✨ Requesting comprehensive bias analysis for {len(trade_data_sample)} trades...")
+        analysis = self._generate_json(prompt)
+        print("✅ Gemini analysis complete.")
+        return analysis
+
+    def start_insight(self, report, trades):
+        """Background generate_insight(); see _submit()"""
+        if not self.api_key:
+            return None
+        return self._submit(self._request_insight, report, trades)
+
+    def generate_insight(self, report, trades):
+        """
+        Write the narrative coaching insight for a locally scored 13-bias report.
+        
+        Args:
+            report (dict): BiasDetector.detect_behavioral_biases() output
+            trades: The scored trades (list or DataFrame), digested for context
             
-            # Use gemini-2.0-flash (valid model, quota exceeded)
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={self.api_key}"
+        Returns:
+            str: The coaching insight
+        """
+        if not self.api_key:
+            return self.fallback_insight(report)
+        
+        try:
+            return self._request_insight(report, trades)
+        except Exception as e:
+            print(f"❌ Error generating coaching insight: {e}")
+            return self.fallback_insight(report)
+
+    def fallback_insight(self, report):
+        """Static coaching insight from the local report, used until (or instead of) Gemini's"""
+        primary = report['primary_bias']
+        if primary == 'None':
+            return f"No strong bias patterns found. Discipline score: {report['discipline_score']}/100 - keep following your plan."
+        return (f"Your strongest pattern is {primary} ({report['biases'][primary]:.0f}/100). "
+                f"Discipline score: {report['discipline_score']}/100, with an estimated ${report['human_tax_estimate']:,.2f} "
+                f"lost to impulsive trades. Review the trades behind {primary} before your next session.")
+
+    def _request_insight(self, report, trades):
+        """generate_insight() without the fallback; raises on failure"""
+        # Digesting a long history takes a moment, so it happens here in the background job
+        from trade_digest import build_digests
+        digests = build_digests(trades)
+        overall = digests['overall']
+        context = {
+            'biases': report['biases'],
+            'primary_bias': report['primary_bias'],
+            'discipline_score': report['discipline_score'],
+            'human_tax_estimate': report['human_tax_estimate'],
+            'metrics': report['metrics'],
+            'summary': {k: overall[k] for k in ('trades', 'start', 'end', 'win_rate', 'total_pnl')}
+        }
+        key = cache_key('insight', context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        prompt = f"""
+        You are an expert trading psychology coach. A trader's whole history was scored locally for 13 behavioral biases (0-100; "Clean Trades" is the share of disciplined trades).
+        
+        Report: {json.dumps(context, separators=(',', ':'))}
+        Per-period detector scores: {json.dumps([[c['start'][:10], c['end'][:10], c['trades'], {k: v['score'] for k, v in c['detectors'].items()}] for c in digests['chunks']], separators=(',', ':'))}
+        Most recent trades [timestamp, side, asset, P/L]: {json.dumps(digests['recent_trades'], separators=(',', ':'))}
+        
+        Write a coaching insight of 2-4 sentences: name the primary bias and the evidence for it, and give one specific, actionable change. Do not restate every score.
+        
+        Response Format:
+        {{"coaching_insight": "string"}}
+        
+        Return ONLY the JSON.
+        """
+        print("✨ Requesting coaching insight from Gemini...")
+        insight = self._generate_json(prompt, max_output_tokens=512)['coaching_insight']
+        self.cache.set(key, insight)
+        return insight
+
+    def start_digest_analysis(self, digests):
+        """Background analyze_digests(); see _submit()"""
+        if not self.api_key:
+            return None
+        return self._submit(self._request_digest_analysis, digests)
+
+    def analyze_digests(self, digests):
+        """
+        Analyze a whole trade history from its chunk digests (map-reduce).
+        
+        Each chunk digest is scored for the 13 biases in its own concurrent
+        Gemini call (map). The scores are merged locally, weighted by trades
+        per chunk, and one final call writes the report from the merged
+        scores and each period's evidence (reduce).
+        
+        Args:
+            digests (dict): trade_digest.build_digests() output
             
-            payload = {
-                "contents": [
-                    {
-                        "parts": [
-                            {"text": prompt}
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": 0.5, # Lower temperature for more deterministic JSON
-                    "maxOutputTokens": 2048
+        Returns:
+            dict: Same report format as analyze_trade_data(), plus 'periods'
+                  (per-chunk scores) and 'coverage'
+        """
+        if not self.api_key:
+            return {"error": "Gemini API key not configured"}
+        
+        try:
+            return self._request_digest_analysis(digests)
+        except GeminiError as e:
+            return {"error": str(e)}
+        except Exception as e:
+            print(f"❌ Error analyzing trade digests with Gemini: {e}")
+            return {"error": str(e)}
+
+    def _request_digest_analysis(self, digests):
+        """analyze_digests() without the error dict; raises on failure"""
+        chunks = digests['chunks']
+        print(f"✨ Requesting map-reduce bias analysis of {digests['overall']['trades']} trades in {len(chunks)} chunks...")
+        futures = [self._map_executor.submit(self._request_chunk_scores, i, len(chunks), chunk)
+                   for i, chunk in enumerate(chunks)]
+        periods = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                scores = future.result()
+            except Exception as e:
+                # A failed chunk leaves a gap in coverage rather than failing the whole report
+                print(f"❌ Chunk {chunk['start']} - {chunk['end']} failed: {e}")
+                continue
+            periods.append({'start': chunk['start'], 'end': chunk['end'], 'trades': chunk['trades'],
+                            'biases': scores.get('biases', {}), 'evidence': scores.get('evidence', '')})
+        if not periods:
+            raise GeminiError("Gemini could not analyze any part of the trade history")
+        
+        # Reduce: trade-weighted mean of each bias score across the analyzed periods
+        merged = {}
+        for name in ANALYSIS_BIASES:
+            weighted = [(p['biases'][name], p['trades']) for p in periods
+                        if isinstance(p['biases'].get(name), (int, float))]
+            if weighted:
+                merged[name] = round(sum(score * n for score, n in weighted) / sum(n for _, n in weighted), 1)
+        
+        report = self._request_report(digests, merged, periods)
+        report['biases'] = merged
+        report['periods'] = periods
+        report['coverage'] = {
+            'trades': digests['overall']['trades'],
+            'trades_analyzed': sum(p['trades'] for p in periods),
+            'chunks': len(chunks),
+            'chunks_analyzed': len(periods)
+        }
+        print("✅ Gemini map-reduce analysis complete.")
+        return report
+
+    def _request_chunk_scores(self, index, count, chunk):
+        """Map step: score one chunk digest for the 13 biases (cached by digest)"""
+        key = cache_key('analysis_chunk', chunk)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        prompt = f"""
+        You are a trading psychology analyst. Below is a statistical digest of period {index + 1} of {count} of one trader's history ({chunk['trades']} trades), computed from every trade in the period.
+        "detectors" holds rule-based scores (0-100) and metrics for overtrading, loss aversion and revenge trading; "assets" holds the most traded assets; "trades_by_hour" counts trades per hour of day (UTC).
+        
+        Score these 13 behavioral biases from 0-100 for this period, based on frequency and severity:
+{_bias_list()}
+
+        Digest:
+        {json.dumps(chunk, separators=(',', ':'))}
+
+        Response Format:
+        {{"biases": {{"Loss Aversion": 85, ...}}, "evidence": "one sentence naming the strongest pattern in this period"}}
+        
+        Return ONLY the JSON.
+        """
+        scores = self._generate_json(prompt, max_output_tokens=1024)
+        self.cache.set(key, scores)
+        return scores
+
+    def _request_report(self, digests, merged, periods):
+        """Reduce step: final report from the merged scores; falls back to a local summary if Gemini fails"""
+        overall = digests['overall']
+        summary = {k: overall[k] for k in ('trades', 'start', 'end', 'win_rate', 'total_pnl', 'human_tax')}
+        prompt = f"""
+        You are an expert trading psychology coach. A trader's whole history was analyzed period by period.
+        
+        Overall statistics: {json.dumps(summary, separators=(',', ':'))}
+        Rule-based detector scores: {json.dumps({k: v['score'] for k, v in overall['detectors'].items()}, separators=(',', ':'))}
+        Bias scores merged across periods (0-100): {json.dumps(merged, separators=(',', ':'))}
+        Evidence per period: {json.dumps([[p['start'][:10], p['end'][:10], p['evidence']] for p in periods], separators=(',', ':'))}
+        Most recent trades [timestamp, side, asset, P/L]: {json.dumps(digests['recent_trades'], separators=(',', ':'))}
+        
+        Response Format:
+        {{
+          "primary_bias": "string",
+          "discipline_score": number,
+          "human_tax_estimate": number,
+          "coaching_insight": "string"
+        }}
+        
+        Return ONLY the JSON.
+        """
+        try:
+            return self._generate_json(prompt, max_output_tokens=1024)
+        except Exception as e:
+            print(f"❌ Report step failed, summarizing locally: {e}")
+            biases = {k: v for k, v in merged.items() if k != 'Clean Trades'}
+            return {
+                'primary_bias': max(biases, key=biases.get) if biases else 'None',
+                'discipline_score': merged.get('Clean Trades', 0),
+                'human_tax_estimate': overall['human_tax'],
+                'coaching_insight': ' '.join(p['evidence'] for p in periods if p['evidence'])
+            }
+
+    def _generate_text(self, prompt):
+        """Send a prompt through the SDK model and return its text; raises GeminiError after REQUEST_TIMEOUT"""
+        # The SDK version in requirements.txt takes no per-request timeout, so wait on the call instead
+        future = self._sdk_executor.submit(self.model.generate_content, prompt)
+        try:
+            return future.result(timeout=REQUEST_TIMEOUT).text
+        except FutureTimeoutError:
+            # Drops the call if it hasn't started; one already running is left to finish on its own
+            future.cancel()
+            raise GeminiError(f"Gemini did not answer within {REQUEST_TIMEOUT:g}s")
+
+    def _generate_json(self, prompt, max_output_tokens=2048):
+        """Send a prompt to the Gemini REST API and parse the JSON it answers with; raises GeminiError"""
+        import requests
+        
+        # Use gemini-2.0-flash (valid model, quota exceeded)
+        url = f"{self.api_base}/v1beta/models/gemini-2.0-flash:generateContent?key={self.api_key}"
+        
+        payload = {
+            "contents": [
+                {
+                    "parts": [
+                        {"text": prompt}
+                    ]
                 }
+            ],
+            "generationConfig": {
+                "temperature": 0.5, # Lower temperature for more deterministic JSON
+                "maxOutputTokens": max_output_tokens
             }
-            
-            response = requests.post(url, json=payload, timeout=120)  # Extended for thinking models
+        }
+        
+        try:
+            response = requests.post(url, json=payload, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            
-            result = response.json()
-            
-            # Extract text from response
-            try:
-                # Check if candidates exist
-                if "candidates" not in result or not result["candidates"]:
-                    print(f"❌ No candidates in response: {result}")
-                    return {"error": "No response candidates from Gemini"}
-                    
-                text = result["candidates"][0]["content"]["parts"][0]["text"].strip()
-                print(f"📄 Raw Gemini Response: {text[:500]}...") # Print first 500 chars for debug
-                
-                # Clean up markdown code blocks if present
-                if text.startswith('```json'):
-                    text = text[7:]
-                if text.startswith('```'):
-                    text = text[3:]
-                if text.endswith('```'):
-                    text = text[:-3]
-                
-                text = text.strip()
-                analysis = json.loads(text)
-                print("✅ Gemini analysis complete.")
-                return analysis
-            except Exception as parse_err:
-                print(f"❌ JSON Parse Error: {parse_err}")
-                print(f"❌ Problematic Text: {text}")
-                return {"error": f"Failed to parse Gemini response: {parse_err}"}
-            
         except requests.exceptions.HTTPError as e:
             error_msg = str(e)
             try:
@@ -241,7 +738,32 @@ class GeminiCoach:
             except:
                 pass
             print(f"❌ HTTP Error: {error_msg}")
-            return {"error": error_msg}
-        except Exception as e:
-            print(f"❌ Error analyzing trades with Gemini: {e}")
-            return {"error": str(e)}
+            raise GeminiError(error_msg)
+        
+        result = response.json()
+        
+        # Extract text from response
+        # Check if candidates exist
+        if "candidates" not in result or not result["candidates"]:
+            print(f"❌ No candidates in response: {result}")
+            raise GeminiError("No response candidates from Gemini")
+        
+        text = ""
+        try:
+            text = result["candidates"][0]["content"]["parts"][0]["text"].strip()
+            print(f"📄 Raw Gemini Response: {text[:500]}...") # Print first 500 chars for debug
+            
+            # Clean up markdown code blocks if present
+            if text.startswith('```json'):
+                text = text[7:]
+            if text.startswith('```'):
+                text = text[3:]
+            if text.endswith('```'):
+                text = text[:-3]
+            
+            text = text.strip()
+            return json.loads(text)
+        except Exception as parse_err:
+            print(f"❌ JSON Parse Error: {parse_err}")
+            print(f"❌ Problematic Text: {text}")
+            raise GeminiError(f"Failed to parse Gemini response: {parse_err}")
@@ -0,0 +1,193 @@
+"""
+Pre-generated intervention messages for the realtime path.
+
+Messages are indexed by (bias type, severity, asset class, time-of-day
+bucket) and looked up in constant time, so blocking a trade never waits on
+an LLM. Build a bank offline through GeminiCoach, then point
+INTERVENTION_BANK_PATH at it (default: intervention_bank.json):
+
+    python message_bank.py -o intervention_bank.json --variants 3
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from datetime import datetime
+
+# Severities /api/realtime assigns to each bias it can block on
+REALTIME_SEVERITIES = {
+    'Revenge Trading': (5, 8),
+    'Overtrading': (4, 6)
+}
+
+CRYPTO_ASSETS = {'BTC', 'ETH', 'SOL', 'XRP', 'DOGE', 'ADA', 'BNB', 'LTC', 'AVAX', 'DOT'}
+ASSET_CLASSES = ('crypto', 'equity')
+
+# Upper bound (exclusive hour) of each bucket
+TIME_BUCKETS = (('overnight', 6), ('morning', 12), ('afternoon', 17), ('evening', 24))
+
+# Representative trade attempt per asset class and time bucket, used when generating the bank
+SAMPLE_ASSETS = {'crypto': 'BTC', 'equity': 'AAPL'}
+SAMPLE_HOURS = {'overnight': 3, 'morning': 10, 'afternoon': 14, 'evening': 20}
+
+
+def asset_class(asset):
+    """'crypto' for known coins (also quoted as BTC/USD, BTC-USD or BTCUSDT), 'equity' otherwise."""
+    symbol = str(asset or '').upper()
+    base = symbol.replace('-', '/').split('/')[0]
+    if base in CRYPTO_ASSETS or base.endswith('USDT'):
+        return 'crypto'
+    return 'equity'
+
+
+def time_bucket(timestamp=None):
+    """
+    Time-of-day bucket of an ISO timestamp or datetime (default: now).
+
+    Timestamps with a UTC offset (the extension sends UTC 'Z' ones) are
+    converted to the server's local time first. The extension's backend runs
+    on the trader's own machine, so that is the trader's time of day. Naive
+    timestamps are taken as local time already.
+    """
+    if timestamp is None:
+        moment = datetime.now()
+    elif isinstance(timestamp, datetime):
+        moment = timestamp
+    else:
+        try:
+            moment = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+        except ValueError:
+            moment = datetime.now()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone()
+    for bucket, end_hour in TIME_BUCKETS:
+        if moment.hour < end_hour:
+            return bucket
+    return TIME_BUCKETS[-1][0]
+
+
+def bank_key(bias_type, severity, asset, timestamp=None):
+    """Bank index for a trade attempt, as stored in the bank file."""
+    return f"{bias_type}|{int(severity)}|{asset_class(asset)}|{time_bucket(timestamp)}"
+
+
+class MessageBank:
+    """
+    Intervention messages keyed by bank_key(), with several variants per key.
+
+    A lookup that misses the exact key falls back to any message for the
+    same bias type and severity, so a partially built bank still serves
+    every attempt it has a close match for.
+    """
+
+    def __init__(self, messages=None):
+        self.messages = {key: list(variants) for key, variants in (messages or {}).items() if variants}
+        self._by_bias = {}
+        for key, variants in self.messages.items():
+            bias_type, severity = key.split('|')[:2]
+            self._by_bias.setdefault((bias_type, severity), []).extend(variants)
+
+    def __len__(self):
+        return len(self.messages)
+
+    @classmethod
+    def load(cls, path):
+        """Load a bank written by save(); a missing file gives an empty bank."""
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            bank = cls(json.load(f).get('messages', {}))
+        print(f"📚 Loaded {sum(map(len, bank.messages.values()))} intervention messages from {path}")
+        return bank
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'generated': datetime.now().isoformat(timespec='seconds'), 'messages': self.messages},
+                      f, indent=2, sort_keys=True)
+
+    def add(self, key, message):
+        self.messages.setdefault(key, []).append(message)
+        bias_type, severity = key.split('|')[:2]
+        self._by_bias.setdefault((bias_type, severity), []).append(message)
+
+    def lookup(self, bias_type, severity, asset, timestamp=None):
+        """
+        A message for this trade attempt, or None if the bank has nothing close.
+
+        Returns:
+            str: One of the key's variants, picked at random
+        """
+        variants = self.messages.get(bank_key(bias_type, severity, asset, timestamp))
+        if not variants:
+            variants = self._by_bias.get((bias_type, str(int(severity))))
+        return random.choice(variants) if variants else None
+
+
+def build_bank(coach, variants=3, bank=None):
+    """
+    Generate messages for every (bias, severity, asset class, time bucket) key through Gemini.
+
+    Keys that already have `variants` messages are skipped, so an
+    interrupted build can be resumed from a saved bank.
+
+    Args:
+        coach (GeminiCoach): Configured coach with a model
+        variants (int): Messages to generate per key
+        bank (MessageBank): Bank to extend (default: a new one)
+
+    Returns:
+        MessageBank: The extended bank
+    """
+    if bank is None:
+        bank = MessageBank()
+    for bias_type, severities in REALTIME_SEVERITIES.items():
+        for severity in severities:
+            for klass in ASSET_CLASSES:
+                for bucket, hour in SAMPLE_HOURS.items():
+                    attempt_time = datetime.now().replace(hour=hour, minute=0, second=0, microsecond=0)
+                    key = bank_key(bias_type, severity, SAMPLE_ASSETS[klass], attempt_time)
+                    trade_data = {
+                        'action': 'buy',
+                        'asset': SAMPLE_ASSETS[klass],
+                        'asset_class': klass,
+                        'time_of_day': bucket,
+                        'timestamp': attempt_time.isoformat()
+                    }
+                    while len(bank.messages.get(key, [])) < variants:
+                        try:
+                            bank.add(key, coach.compose_intervention(bias_type, severity, trade_data))
+                        except Exception as e:
+                            print(f"❌ {key}: {e}", file=sys.stderr)
+                            break
+                    print(f"✅ {key}: {len(bank.messages.get(key, []))} messages", file=sys.stderr)
+    return bank
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-generate the realtime intervention message bank with Gemini.')
+    parser.add_argument('-o', '--output', default='intervention_bank.json', help='Bank file to write')
+    parser.add_argument('--variants', type=int, default=3, help='Messages per key')
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from gemini_coach import GeminiCoach
+    coach = GeminiCoach()
+    if not coach.model:
+        print("❌ GEMINI_API_KEY is not set", file=sys.stderr)
+        return 1
+
+    # Extend an existing bank instead of regenerating keys that are already complete,
+    # and keep whatever was generated if the run is interrupted
+    bank = MessageBank.load(args.output)
+    try:
+        build_bank(coach, args.variants, bank)
+    finally:
+        bank.save(args.output)
+    print(f"✅ Wrote {len(bank)} keys to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,67 +1,217 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import random
+
+BIAS_TYPES = ['overtrading', 'loss_aversion', 'revenge', 'normal']
+SEEDED_START_DATE = datetime(2024, 1, 1)
+
+
+def _choose(u, options, probabilities):
+    """Vectorized random.choice: map uniform draws onto `options` with the given probabilities."""
+    cumulative = np.cumsum(probabilities, dtype=np.float64)
+    cumulative /= cumulative[-1]
+    return np.asarray(options)[np.searchsorted(cumulative, u, side='right').clip(max=len(options) - 1)]
+
+
+def _uniform_int(u, low, high):
+    """Vectorized random.randint(low, high) from uniform draws."""
+    return (low + np.floor(u * (high - low + 1))).astype(np.int64)
+
+
+def _resolve_losses(revenge, loss_if_prev_loss, loss_otherwise, prev_loss):
+    """
+    Resolve which trades lose when revenge trades depend on the trade before them.
+
+    A revenge trade follows the `loss_if_prev_loss` outcome when the previous
+    trade lost and `loss_otherwise` when it didn't; every other trade follows
+    `loss_otherwise`. Each step is one of four maps on the previous outcome
+    (always win, always lose, copy, flip), so the chain is solved without a
+    loop: a trade's outcome is the last constant map's value, flipped once
+    per "flip" map since then.
+
+    Args:
+        prev_loss (bool): Whether the trade before the first one lost
+    """
+    n = len(revenge)
+    constant = ~revenge | (loss_if_prev_loss == loss_otherwise)
+    flip = revenge & ~loss_if_prev_loss & loss_otherwise
+    positions = np.arange(n)
+    last_constant = np.maximum.accumulate(np.where(constant, positions, -1))
+    flips = np.cumsum(flip)
+    base = np.where(last_constant >= 0, loss_otherwise[last_constant.clip(min=0)], prev_loss)
+    flips_since = flips - np.where(last_constant >= 0, flips[last_constant.clip(min=0)], 0)
+    return base ^ (flips_since % 2 == 1)
+
 
 class MockDataGenerator:
-    def __init__(self, num_trades=50, start_date=None):
+    def __init__(self, num_trades=50, start_date=None, seed=None, bias_mix=None, num_accounts=1):
+        """
+        Generate mock trading data with realistic bias patterns.
+
+        Args:
+            num_trades (int): Trades per account
+            start_date (datetime): Every account's start time (default: 30 days
+                                   ago, or SEEDED_START_DATE when seeded)
+            seed (int): Seed for fully reproducible output; None draws fresh entropy
+            bias_mix (dict): Relative weight of each bias pattern, keys from
+                             'overtrading', 'loss_aversion', 'revenge', 'normal'
+                             (default: equal weights)
+            num_accounts (int): Independent accounts; adds an Account column when > 1
+        """
         self.num_trades = num_trades
-        self.start_date = start_date or datetime.now() - timedelta(days=30)
+        if start_date is None:
+            # A seeded run must not depend on when it runs
+            start_date = SEEDED_START_DATE if seed is not None else datetime.now() - timedelta(days=30)
+        self.start_date = start_date
         self.assets = ['AAPL', 'TSLA', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'BTC', 'ETH']
-        
+        self.seed = seed
+        self.num_accounts = num_accounts
+
+        bias_mix = bias_mix or {bias: 1 for bias in BIAS_TYPES}
+        unknown = set(bias_mix) - set(BIAS_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown bias types in bias_mix: {sorted(unknown)}")
+        self.bias_weights = np.array([bias_mix.get(bias, 0) for bias in BIAS_TYPES], dtype=np.float64)
+        if (self.bias_weights < 0).any() or self.bias_weights.sum() <= 0:
+            raise ValueError("bias_mix weights must be non-negative and not all zero")
+
+    def _account_streams(self):
+        """One independent random stream per (account, column), so output doesn't depend on chunk size."""
+        accounts = np.random.SeedSequence(self.seed).spawn(self.num_accounts)
+        columns = ['bias', 'gap', 'action', 'asset', 'outcome', 'amount']
+        return [dict(zip(columns, map(np.random.default_rng, account.spawn(len(columns)))))
+                for account in accounts]
+
+    def _chunk(self, streams, size, state):
+        """Generate the next `size` trades of one account, continuing from `state`."""
+        bias = _choose(streams['bias'].random(size), BIAS_TYPES, self.bias_weights)
+        gap_u = streams['gap'].random(size)
+        outcome_u = streams['outcome'].random(size)
+        amount_u = streams['amount'].random(size)
+
+        is_revenge = bias == 'revenge'
+        loss_aversion = bias == 'loss_aversion'
+
+        # P/L without the revenge pattern
+        # Loss aversion: 60% win rate but small wins, larger losses; otherwise more balanced
+        la_win = outcome_u > 0.4
+        balanced_win = outcome_u > 0.45
+        pl_normal = np.where(
+            loss_aversion,
+            np.where(la_win, 10 + 40 * amount_u, -100 + 70 * amount_u),
+            np.where(balanced_win, 20 + 80 * amount_u, -60 + 50 * amount_u)
+        )
+        # Revenge trading: often loses more after a loss
+        pl_revenge = -80 + 100 * amount_u
+
+        is_loss = _resolve_losses(is_revenge, pl_revenge < 0, pl_normal < 0, state['prev_loss'])
+        prev_loss = np.concatenate(([state['prev_loss']], is_loss[:-1]))
+        revenge_active = is_revenge & prev_loss
+        pl = np.round(np.where(revenge_active, pl_revenge, pl_normal), 2)
+
+        # Revenge trading: trade quickly after loss; overtrading: frequent trades; normal: 1-4 hours
+        minutes_gap = np.where(revenge_active, _uniform_int(gap_u, 5, 30),
+                               np.where(bias == 'overtrading', _uniform_int(gap_u, 10, 60),
+                                        _uniform_int(gap_u, 60, 240)))
+        timestamps = state['time'] + np.cumsum(minutes_gap).astype('timedelta64[m]')
+
+        state['time'] = timestamps[-1]
+        state['prev_loss'] = bool(is_loss[-1])
+        return pd.DataFrame({
+            'Timestamp': timestamps,
+            'Buy/sell': pd.Categorical.from_codes((streams['action'].random(size) * 2).astype(np.int8),
+                                                  ['Buy', 'Sell']),
+            'Asset': pd.Categorical.from_codes((streams['asset'].random(size) * len(self.assets)).astype(np.int8),
+                                               self.assets),
+            'P/L': pl
+        })
+
+    def iter_chunks(self, chunksize=1000000):
+        """
+        Stream the trades in DataFrame chunks of at most `chunksize` rows.
+
+        Accounts are generated one after another. For a given seed the
+        concatenated chunks are identical whatever the chunk size.
+
+        Yields:
+            DataFrame: Timestamp (datetime64), Buy/sell and Asset (categorical),
+                       P/L (float64) and, with several accounts, Account
+        """
+        for account, streams in enumerate(self._account_streams()):
+            state = {'time': np.datetime64(self.start_date, 'us'), 'prev_loss': False}
+            remaining = self.num_trades
+            while remaining > 0:
+                size = min(chunksize, remaining)
+                chunk = self._chunk(streams, size, state)
+                if self.num_accounts > 1:
+                    chunk.insert(0, 'Account', f'ACC{account + 1:05d}')
+                yield chunk
+                remaining -= size
+
+    def generate_frame(self):
+        """Generate all trades as one column-oriented DataFrame."""
+        chunks = list(self.iter_chunks(chunksize=max(self.num_trades, 1)))
+        if not chunks:
+            # Same dtypes as a generated chunk, so callers can still use .dt and .cat
+            frame = pd.DataFrame({
+                'Timestamp': np.array([], dtype='datetime64[us]'),
+                'Buy/sell': pd.Categorical([], categories=['Buy', 'Sell']),
+                'Asset': pd.Categorical([], categories=self.assets),
+                'P/L': np.array([], dtype=np.float64)
+            })
+            if self.num_accounts > 1:
+                frame.insert(0, 'Account', pd.Categorical([]))
+            return frame
+        if len(chunks) == 1:
+            return chunks[0]
+        frame = pd.concat(chunks, ignore_index=True)
+        if self.num_accounts > 1:
+            frame['Account'] = frame['Account'].astype('category')
+        return frame
+
+    def generate_arrow(self):
+        """Generate all trades as a pyarrow Table. Requires pyarrow."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError('Arrow output requires pyarrow (pip install pyarrow)')
+        return pa.Table.from_pandas(self.generate_frame(), preserve_index=False)
+
+    def write(self, path, chunksize=1000000):
+        """
+        Write the trades to a .csv or .parquet file chunk by chunk, so sizes
+        larger than memory never have to be held at once.
+
+        Returns:
+            int: Rows written
+        """
+        rows = 0
+        if str(path).lower().endswith(('.parquet', '.pq')):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError('Parquet output requires pyarrow (pip install pyarrow)')
+            writer = None
+            try:
+                for chunk in self.iter_chunks(chunksize):
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+                    rows += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+        else:
+            with open(path, 'w', newline='') as f:
+                for chunk in self.iter_chunks(chunksize):
+                    chunk.to_csv(f, header=rows == 0, index=False)
+                    rows += len(chunk)
+        return rows
+
     def generate(self):
         """Generate mock trading data with realistic bias patterns"""
-        trades = []
-        current_time = self.start_date
-        previous_pl = 0
-        
-        for i in range(self.num_trades):
-            # Simulate different bias patterns
-            bias_type = random.choice(['overtrading', 'loss_aversion', 'revenge', 'normal'])
-            
-            # Determine time gap based on bias
-            if bias_type == 'revenge' and previous_pl < 0:
-                # Revenge trading: trade quickly after loss
-                minutes_gap = random.randint(5, 30)
-            elif bias_type == 'overtrading':
-                # Overtrading: frequent trades
-                minutes_gap = random.randint(10, 60)
-            else:
-                # Normal: 1-4 hours
-                minutes_gap = random.randint(60, 240)
-            
-            current_time += timedelta(minutes=minutes_gap)
-            
-            # Determine buy/sell
-            action = random.choice(['Buy', 'Sell'])
-            
-            # Determine asset
-            asset = random.choice(self.assets)
-            
-            # Determine P/L based on bias
-            if bias_type == 'loss_aversion':
-                # Loss aversion: small wins, large losses
-                if random.random() > 0.4:  # 60% win rate but small wins
-                    pl = random.uniform(10, 50)
-                else:
-                    pl = random.uniform(-100, -30)  # Larger losses
-            elif bias_type == 'revenge' and previous_pl < 0:
-                # Revenge trading: often loses more after a loss
-                pl = random.uniform(-80, 20)  # More likely to lose
-            else:
-                # Normal or overtrading: more balanced
-                if random.random() > 0.45:
-                    pl = random.uniform(20, 100)
-                else:
-                    pl = random.uniform(-60, -10)
-            
-            previous_pl = pl
-            
-            trades.append({
-                'Timestamp': current_time.isoformat(),
-                'Buy/sell': action,
-                'Asset': asset,
-                'P/L': round(pl, 2)
-            })
-        
-        return trades
+        frame = self.generate_frame()
+        frame['Timestamp'] = frame['Timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%S')
+        return frame.astype(object).to_dict('records')
@@ -0,0 +1,191 @@
+"""
+Mergeable quantile sketch for approximate order statistics over unbounded
+trade streams.
+
+QuantileSketch is a merging t-digest: values are grouped into centroids
+(mean, weight) that are small near the extremes and largest around the
+median, so memory stays bounded by the compression however many values are
+added. Sketches of different shards merge by pooling their centroids and
+re-compressing, giving the same accuracy as one sketch over all the values.
+
+Each centroid can also carry the sums of named aligned values (e.g. the gap
+to the next trade), so the sketch answers "mean of X over the values below
+this threshold" as well as quantiles.
+
+The size of a centroid bounds how far a quantile's rank can be off. With
+rank_error=0.01 no centroid ever holds more than 1% of the values, however
+the sketch was built or merged (max_rank_error() reports the actual
+largest share), and logs short enough that every centroid holds a single
+value are answered exactly.
+"""
+import math
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    t-digest with the arcsine (k1) scale function and optional aligned sums.
+
+    Values are added in batches with add(); quantile(), rank() and head()
+    follow the conventions of the exact sorted-array queries they replace.
+    """
+
+    def __init__(self, rank_error=0.01, aligned=()):
+        if not 0 < rank_error < 1:
+            raise ValueError("rank_error must be between 0 and 1")
+        self.rank_error = rank_error
+        # A centroid spans one unit of k; k1's unit is narrowest in q (pi / compression) at the median
+        self.compression = math.pi / rank_error
+        self.aligned = tuple(aligned)
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+        self.sums = {name: np.empty(0, dtype=np.float64) for name in self.aligned}
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def __len__(self):
+        return self.count
+
+    def add(self, values, *aligned):
+        """
+        Add a batch of values, with one array per aligned name.
+
+        Args:
+            values: Values to add
+            *aligned: Arrays aligned with `values`, in the order of self.aligned
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self._absorb(values, np.ones(len(values)),
+                     [np.asarray(values, dtype=np.float64) for values in aligned],
+                     len(values), values.min(), values.max())
+
+    def merge(self, other):
+        """Fold another sketch (e.g. another shard's) with the same aligned names into this one."""
+        if other.aligned != self.aligned:
+            raise ValueError("Cannot merge sketches with different aligned values")
+        if other.count == 0:
+            return
+        self._absorb(other.means, other.weights, [other.sums[name] for name in other.aligned],
+                     other.count, other.min, other.max)
+
+    def _absorb(self, means, weights, sums, count, low, high):
+        means = np.concatenate((self.means, means))
+        weights = np.concatenate((self.weights, weights))
+        sums = [np.concatenate((self.sums[name], new)) for name, new in zip(self.aligned, sums)]
+        self.count += int(count)
+        self.min = min(self.min, float(low))
+        self.max = max(self.max, float(high))
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        sums = [values[order] for values in sums]
+
+        # Group centroids lying wholly within the same unit of k1(q) = compression / 2pi * asin(2q - 1).
+        # One unit spans at most rank_error of the values, so no group can outgrow the bound; a
+        # centroid straddling a unit boundary stays on its own (by induction it is within the bound)
+        cumulative = np.cumsum(weights)
+        k_left = self._k((cumulative - weights) / cumulative[-1])
+        k_right = self._k(cumulative / cumulative[-1])
+        unit = np.floor(k_left)
+        straddles = np.ceil(k_right) - 1 > unit
+        starts = np.flatnonzero(np.concatenate(([True], (unit[1:] != unit[:-1]) | straddles[1:] | straddles[:-1])))
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+        # Singletons keep their exact value (no rounding through mean * weight / weight)
+        singleton = np.diff(np.append(starts, len(means))) == 1
+        self.means[singleton] = means[starts[singleton]]
+        self.sums = {name: np.add.reduceat(values, starts) for name, values in zip(self.aligned, sums)}
+
+    def _k(self, q):
+        return self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+
+    def max_rank_error(self):
+        """Largest share of the values held by one centroid, i.e. how far a quantile's rank can be off."""
+        if self.count == 0:
+            return 0.0
+        largest = self.weights.max()
+        return 0.0 if largest <= 1 else float(largest / self.count)
+
+    def quantile(self, q):
+        """Approximate Series.quantile(q) (linear interpolation between ranks); exact while centroids are singletons."""
+        if self.count == 0:
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xp, fp = centers, self.means
+        # The extremes are known exactly even when they share a centroid
+        if self.weights[0] > 1:
+            xp, fp = np.concatenate(([0.5], xp)), np.concatenate(([self.min], fp))
+        if self.weights[-1] > 1:
+            xp, fp = np.append(xp, self.count - 0.5), np.append(fp, self.max)
+        return np.float64(np.interp(q * (self.count - 1) + 0.5, xp, fp))
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def rank(self, x):
+        """
+        Approximate number of values <= x.
+
+        Singletons count as point masses and larger centroids as spread
+        evenly halfway to their neighbours, so the rank is exact while all
+        centroids are singletons.
+        """
+        if self.count == 0 or x < self.min:
+            return 0
+        if x >= self.max:
+            return self.count
+        spread = np.where(self.weights > 1, self.weights / 2, 0.0)
+        point = np.where(self.weights > 1, 0.0, self.weights)
+        # Nodes min, means..., max; segment i runs from node i to node i + 1
+        nodes = np.concatenate(([self.min], self.means, [self.max]))
+        segment_mass = np.concatenate(([spread[0]], spread[:-1] + spread[1:], [spread[-1]]))
+        node_mass = np.concatenate(([0.0], point, [0.0]))
+        # Mass up to and including each node
+        at_node = np.cumsum(node_mass) + np.concatenate(([0.0], np.cumsum(segment_mass)))
+        i = int(np.searchsorted(nodes, x, side='right')) - 1
+        width = nodes[i + 1] - nodes[i]
+        fraction = (x - nodes[i]) / width if width > 0 else 0.0
+        return min(self.count, float(at_node[i] + segment_mass[i] * fraction))
+
+    def _take(self, weights, rank):
+        """Share of each centroid among the lowest `rank` values, centroids taken in the given order."""
+        before = np.cumsum(weights) - weights
+        return np.clip((rank - before) / weights, 0, 1)
+
+    def head(self, rank):
+        """
+        Sums over the `rank` smallest values (rank may be fractional).
+
+        Returns:
+            tuple: (sum of the values, [sum of each aligned value])
+        """
+        share = self._take(self.weights, rank)
+        return (np.float64((share * self.weights * self.means).sum()),
+                [np.float64((share * self.sums[name]).sum()) for name in self.aligned])
+
+    def tail(self, rank):
+        """Sum of the `rank` largest values."""
+        share = self._take(self.weights[::-1], rank)
+        return np.float64((share * self.weights[::-1] * self.means[::-1]).sum())
+
+    def to_arrays(self):
+        """The sketch as named arrays, for np.savez; from_arrays() restores it."""
+        arrays = {'means': self.means, 'weights': self.weights,
+                  'bounds': np.array([self.count, self.min, self.max, self.rank_error])}
+        arrays.update({f'sum_{name}': self.sums[name] for name in self.aligned})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, aligned=()):
+        count, low, high, rank_error = arrays['bounds']
+        sketch = cls(float(rank_error), aligned)
+        sketch.means = arrays['means']
+        sketch.weights = arrays['weights']
+        sketch.sums = {name: arrays[f'sum_{name}'] for name in sketch.aligned}
+        sketch.count, sketch.min, sketch.max = int(count), float(low), float(high)
+        return sketch
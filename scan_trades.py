@@ -0,0 +1,166 @@
+"""
+Offline bias scan over a directory of broker exports.
+
+Runs every detector plus get_statistics() on each CSV/Parquet file in
+parallel and writes one consolidated report, one row per file:
+
+    python scan_trades.py exports/ -o report.parquet
+    python scan_trades.py "exports/2026-*/*.csv" -o report.csv --workers 8
+
+Finished rows are checkpointed to <report>.partial.ndjson as they complete,
+so an interrupted scan picks up where it stopped when re-run with the same
+output path. Files whose size or modification time changed are rescanned.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from batch_analysis import BATCH_WORKERS, iter_parallel
+from bias_detector import BiasDetector
+from trade_ingest import frame_from_file
+
+SCAN_EXTENSIONS = ('.csv', '.parquet', '.pq')
+BIASES = ('overtrading', 'loss_aversion', 'revenge_trading')
+
+
+def find_trade_files(patterns):
+    """Expand directories (recursively) and globs into a sorted list of export files."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(os.path.join(root, f) for f in files if f.lower().endswith(SCAN_EXTENSIONS))
+        else:
+            paths.update(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(SCAN_EXTENSIONS))
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def _file_version(path):
+    """(size, mtime_ns) of a file, or None if it is gone or can't be read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def scan_file(path):
+    """
+    Analyze one export file. Runs in a worker process, so only one file per worker is in memory.
+
+    Returns:
+        dict: Flat report row (file, size, mtime_ns, error, statistics and per-bias columns)
+    """
+    row = {'file': path, 'size': None, 'mtime_ns': None, 'error': None}
+    try:
+        # A file removed or made unreadable since discovery is reported like any other failure
+        stat = os.stat(path)
+        row['size'], row['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+        results = BiasDetector(frame_from_file(path)).analyze_all()
+    except Exception as e:
+        row['error'] = str(e)
+        return row
+
+    statistics = results['statistics']
+    for key, value in statistics.items():
+        if key == 'human_tax_by_rule':
+            for rule, tax in value.items():
+                row[f'human_tax_{rule}'] = float(tax['amount'])
+                row[f'human_tax_{rule}_count'] = int(tax['count'])
+        else:
+            row[key] = value.item() if hasattr(value, 'item') else value
+    for bias in BIASES:
+        row[f'{bias}_detected'] = bool(results[bias]['detected'])
+        row[f'{bias}_severity'] = results[bias]['severity']
+        row[f'{bias}_score'] = float(results[bias]['score'])
+    row['biases_detected'] = ';'.join(results['summary']['biases_detected'])
+    return row
+
+
+def _load_checkpoint(checkpoint_path):
+    if not os.path.exists(checkpoint_path):
+        return []
+    rows = []
+    with open(checkpoint_path) as checkpoint:
+        for line in checkpoint:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                # Partially written last line from an interrupted run
+                break
+    return rows
+
+
+def run_scan(paths, output, workers=None, resume=True):
+    """
+    Scan `paths` in parallel and write the consolidated report to `output` (.csv or .parquet).
+
+    Returns:
+        DataFrame: The report
+    """
+    checkpoint_path = output + '.partial.ndjson'
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    # Rows from an interrupted run count only if the file is still in the scan and unchanged since
+    current = {p: _file_version(p) for p in paths}
+    done = [row for row in _load_checkpoint(checkpoint_path)
+            if current.get(row['file']) == (row['size'], row['mtime_ns'])]
+    finished = {row['file'] for row in done}
+    todo = [p for p in paths if p not in finished]
+    if done:
+        print(f"♻️ Resuming: {len(done)} files already scanned, {len(todo)} remaining", file=sys.stderr)
+
+    rows = list(done)
+    start = time.time()
+    with open(checkpoint_path, 'w') as checkpoint:
+        # Rewrite the kept rows so a truncated last line never precedes new ones
+        for row in done:
+            checkpoint.write(json.dumps(row) + '\n')
+        for i, row in enumerate(iter_parallel(scan_file, todo, max_workers=workers), 1):
+            rows.append(row)
+            # Flush each row so an interrupted scan loses at most the files in flight
+            checkpoint.write(json.dumps(row) + '\n')
+            checkpoint.flush()
+            status = f"❌ {row['error']}" if row['error'] else '✅'
+            elapsed = time.time() - start
+            print(f"[{i}/{len(todo)}] {os.path.basename(row['file'])} {status} ({i / elapsed:.1f} files/s)", file=sys.stderr)
+
+    report = pd.DataFrame(rows)
+    if len(report):
+        report = report.sort_values('file', ignore_index=True)
+    if output.lower().endswith(('.parquet', '.pq')):
+        report.to_parquet(output, index=False)
+    else:
+        report.to_csv(output, index=False)
+    os.remove(checkpoint_path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan trade-log exports for behavioral biases.')
+    parser.add_argument('paths', nargs='+', help='Directories, files or glob patterns of .csv/.parquet exports')
+    parser.add_argument('-o', '--output', default='bias_report.csv', help='Report path (.csv or .parquet)')
+    parser.add_argument('-w', '--workers', type=int, default=BATCH_WORKERS, help='Worker processes (default: CPU count)')
+    parser.add_argument('--no-resume', action='store_true', help='Ignore a checkpoint left by an interrupted scan')
+    args = parser.parse_args(argv)
+
+    paths = find_trade_files(args.paths)
+    if not paths:
+        print("❌ No .csv or .parquet files found", file=sys.stderr)
+        return 1
+
+    print(f"🔍 Scanning {len(paths)} files with {args.workers} workers...", file=sys.stderr)
+    report = run_scan(paths, args.output, workers=args.workers, resume=not args.no_resume)
+    failed = int(report['error'].notna().sum()) if len(report) else 0
+    print(f"✅ Wrote {len(report)} rows to {args.output} ({failed} failed)", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
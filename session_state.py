@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class _SessionEntry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = None
+        # Threads holding or waiting for the lock; the entry is never evicted while any are
+        self.users = 0
+        self.last_used = time.monotonic()
+
+
+class SessionRegistry:
+    """
+    Per-session locks with optional in-process state (e.g. a realtime detector),
+    evicted once idle so a long-running server doesn't keep every session it
+    has ever seen.
+
+    Entries unused for `idle_ttl` seconds are dropped, and beyond
+    `max_sessions` the least recently used go first. State must be
+    rebuildable from the session store, since an evicted session starts
+    over with state None.
+    """
+
+    def __init__(self, max_sessions=10000, idle_ttl=3600.0):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @contextmanager
+    def hold(self, session_id):
+        """
+        Hold the session's lock.
+
+        Yields:
+            The session's entry; read and replace its `state` while holding it
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                entry = self._entries[session_id] = _SessionEntry()
+            self._entries.move_to_end(session_id)
+            entry.users += 1
+        try:
+            with entry.lock:
+                yield entry
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+                self._evict(entry.last_used)
+
+    def discard_state(self, session_id):
+        """Drop the session's state (e.g. after its history was replaced), keeping its lock."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                entry.state = None
+
+    def _evict(self, now):
+        # Least recently used first; entries in use were moved to the end when taken
+        evicted = []
+        remaining = len(self._entries)
+        for session_id, entry in self._entries.items():
+            if remaining <= self.max_sessions and now - entry.last_used < self.idle_ttl:
+                break
+            if entry.users == 0:
+                evicted.append(session_id)
+                remaining -= 1
+        for session_id in evicted:
+            del self._entries[session_id]
@@ -0,0 +1,111 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+TRADE_FIELDS = ['Timestamp', 'Buy/sell', 'Asset', 'P/L']
+
+
+def _normalize_trade(trade):
+    return {field: trade.get(field) for field in TRADE_FIELDS}
+
+
+class InMemorySessionStore:
+    """Append-only per-session trade history kept in process memory."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def append(self, session_id, trades):
+        """
+        Append trades to a session's history.
+
+        Returns:
+            int: Number of trades stored for the session after the append
+        """
+        with self._lock:
+            history = self._sessions.setdefault(session_id, [])
+            history.extend(_normalize_trade(trade) for trade in trades)
+            return len(history)
+
+    def get_trades(self, session_id, start=0):
+        """Return the session's trades from position `start` onwards, oldest first."""
+        with self._lock:
+            return list(self._sessions.get(session_id, [])[start:])
+
+    def count(self, session_id):
+        with self._lock:
+            return len(self._sessions.get(session_id, []))
+
+    def clear(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+class SQLiteSessionStore:
+    """Append-only per-session trade history persisted in a SQLite database."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS session_trades (
+                    session_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    timestamp TEXT,
+                    side TEXT,
+                    asset TEXT,
+                    pl REAL,
+                    PRIMARY KEY (session_id, seq)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the store safe to share across request threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, session_id, trades):
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE serializes concurrent appends to the same session
+            conn.execute("BEGIN IMMEDIATE")
+            start = conn.execute(
+                "SELECT COUNT(*) FROM session_trades WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            rows = [
+                (session_id, start + i, str(t['Timestamp']), t['Buy/sell'], t['Asset'], t['P/L'])
+                for i, t in enumerate(map(_normalize_trade, trades))
+            ]
+            conn.executemany("INSERT INTO session_trades VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return start + len(rows)
+
+    def get_trades(self, session_id, start=0):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT timestamp, side, asset, pl FROM session_trades "
+                "WHERE session_id = ? AND seq >= ? ORDER BY seq",
+                (session_id, start)
+            ).fetchall()
+        return [dict(zip(TRADE_FIELDS, row)) for row in rows]
+
+    def count(self, session_id):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM session_trades WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def clear(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM session_trades WHERE session_id = ?", (session_id,))
+
+
+def create_session_store(db_path=None):
+    """Use SQLite when a database path is configured, otherwise keep sessions in memory."""
+    if db_path:
+        return SQLiteSessionStore(db_path)
+    return InMemorySessionStore()
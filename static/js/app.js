@@ -1,8 +1,13 @@
 let tradingData = [];
 
+// Files above this size are streamed to the server instead of being parsed in the browser
+const SERVER_PARSE_THRESHOLD_BYTES = 5 * 1024 * 1024;
+
 document.getElementById('fileInput').addEventListener('change', function (e) {
     const file = e.target.files[0];
-    if (file) {
+    if (file && file.size > SERVER_PARSE_THRESHOLD_BYTES) {
+        uploadLargeCSV(file);
+    } else if (file) {
         const reader = new FileReader();
         reader.onload = function (event) {
             const csv = event.target.result;
@@ -59,6 +64,38 @@ async function loadMockData() {
     }
 }
 
+async function uploadLargeCSV(file) {
+    showLoading();
+    try {
+        const formData = new FormData();
+        formData.append('file', file);
+        const response = await fetch('/api/upload-csv', {
+            method: 'POST',
+            body: formData
+        });
+
+        const results = await response.json();
+
+        if (results.error) {
+            alert('Error: ' + results.error);
+            hideLoading();
+            return;
+        }
+        if (results.warnings) {
+            console.warn('Upload warnings:', results.warnings);
+        }
+
+        // The trades stay on the server, so the P/L timeline chart is left empty
+        tradingData = [];
+        displayResults(results);
+        hideLoading();
+    } catch (error) {
+        console.error('Error uploading CSV:', error);
+        alert('Error uploading CSV: ' + error.message);
+        hideLoading();
+    }
+}
+
 async function analyzeData() {
     showLoading();
     try {
@@ -67,7 +104,7 @@ async function analyzeData() {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ trades: tradingData })
+            body: JSON.stringify({ trades: tradingData, rolling: { window: '7D', step: '1D' } })
         });
 
         const results = await response.json();
@@ -111,6 +148,11 @@ function displaySummary(summary, stats) {
     // Check if new metrics exist (fallback to 0 if not yet implemented/returned)
     const humanTax = stats.human_tax !== undefined ? stats.human_tax : 0;
     const propsperityProj = stats.prosperity_projection !== undefined ? stats.prosperity_projection : 0;
+    const taxByRule = stats.human_tax_by_rule || {};
+    const taxBreakdown = Object.entries(taxByRule)
+        .filter(([, rule]) => rule.count > 0)
+        .map(([name, rule]) => `${name.replace(/_/g, ' ')}: $${rule.amount.toFixed(2)}`)
+        .join(' · ');
 
     const summaryHTML = `
         <div class="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6">
@@ -125,6 +167,7 @@ function displaySummary(summary, stats) {
              <div class="bg-gray-50 p-4 rounded-xl text-center hover:bg-gray-100 transition">
                 <div class="text-3xl font-bold text-danger">$${humanTax.toFixed(2)}</div>
                 <div class="text-gray-500 text-sm mt-1">Human Tax (Cost of Bias)</div>
+                ${taxBreakdown ? `<div class="text-gray-400 text-xs mt-1 capitalize">${taxBreakdown}</div>` : ''}
             </div>
             <div class="bg-gray-50 p-4 rounded-xl text-center hover:bg-gray-100 transition">
                 <div class="text-3xl font-bold text-success">$${propsperityProj.toFixed(2)}</div>
@@ -194,9 +237,13 @@ function displayBias(cardId, bias, title) {
         metricsHTML = '<ul class="mt-4 space-y-2">';
         for (const [key, value] of Object.entries(bias.metrics)) {
             const label = key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
+            // Nested metrics (e.g. streak histograms) are shown as "key: value" pairs
+            const displayValue = (value !== null && typeof value === 'object')
+                ? Object.entries(value).map(([k, v]) => `${k}: ${v}`).join(', ')
+                : value;
             metricsHTML += `<li class="flex justify-between text-sm py-1 border-b border-gray-100 last:border-0">
                 <span class="text-gray-600">${label}:</span> 
-                <strong class="text-gray-800">${value}</strong>
+                <strong class="text-gray-800">${displayValue}</strong>
             </li>`;
         }
         metricsHTML += '</ul>';
@@ -335,6 +382,8 @@ function displayCharts(results) {
 
     Plotly.newPlot('winLossChart', [winLossData], winLossLayout, { responsive: true });
 
+    displayTrend(results.rolling);
+
     container.innerHTML = `
         <div class="mb-8 p-4 bg-gray-50 rounded-xl" id="plChart"></div>
         <div class="grid grid-cols-1 md:grid-cols-2 gap-6">
@@ -344,6 +393,43 @@ function displayCharts(results) {
     `;
 }
 
+function displayTrend(rolling) {
+    const trendDiv = document.getElementById('trendChart');
+    // A single window has no trend to show
+    if (!rolling || rolling.length < 2) {
+        trendDiv.classList.add('hidden');
+        return;
+    }
+    trendDiv.classList.remove('hidden');
+
+    const x = rolling.map(w => w.end);
+    const scoreTrace = (name, key, color) => ({
+        x, y: rolling.map(w => w[key]), type: 'scatter', mode: 'lines', name, line: { color, width: 2 }
+    });
+    const traces = [
+        scoreTrace('Overtrading', 'overtrading', '#667eea'),
+        scoreTrace('Loss Aversion', 'loss_aversion', '#ffa502'),
+        scoreTrace('Revenge Trading', 'revenge_trading', '#ff4757'),
+        {
+            x, y: rolling.map(w => w.human_tax), type: 'bar', name: 'Human Tax ($)', yaxis: 'y2',
+            marker: { color: 'rgba(255, 71, 87, 0.25)' }
+        }
+    ];
+
+    const trendLayout = {
+        title: 'Bias Scores Over Time (7-day windows)',
+        xaxis: { title: 'Window End' },
+        yaxis: { title: 'Severity Score (0-100)', range: [0, 100] },
+        yaxis2: { title: 'Human Tax ($)', overlaying: 'y', side: 'right', showgrid: false },
+        legend: { orientation: 'h' },
+        plot_bgcolor: 'rgba(0,0,0,0)',
+        paper_bgcolor: 'rgba(0,0,0,0)',
+        font: { family: '-apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif' }
+    };
+
+    Plotly.newPlot('trendChart', traces, trendLayout, { responsive: true });
+}
+
 function showLoading() {
     document.getElementById('loading').classList.remove('hidden');
     document.getElementById('results').classList.add('hidden');
@@ -0,0 +1,550 @@
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+from bias_detector import (score_overtrading, score_loss_aversion, score_revenge_trading,
+                           build_recommendations, overtrading_description,
+                           loss_aversion_description, revenge_trading_description)
+
+NS_PER_MINUTE = 60 * 10**9
+NS_PER_DAY = 24 * 60 * NS_PER_MINUTE
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac).
+
+    Keeps five markers and adjusts them on every observation, so both memory
+    and update cost are constant. Exact for the first five observations.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self._heights, self._positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        """Current estimate, or None before the first observation."""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # Linear interpolation, same as pandas' Series.quantile
+            rank = self.p * (self.count - 1)
+            lower = int(math.floor(rank))
+            upper = min(lower + 1, self.count - 1)
+            return self._heights[lower] + (self._heights[upper] - self._heights[lower]) * (rank - lower)
+        return self._heights[2]
+
+
+def _timestamp_ns(value):
+    """
+    Parse one trade timestamp.
+
+    Returns:
+        tuple: (epoch nanoseconds, UTC if it carried a timezone; day number of
+               its wall-clock date, as BiasDetector.days), or (None, None)
+    """
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return None, None
+    if pd.isna(ts):
+        return None, None
+    wall_clock = ts
+    if ts.tzinfo is not None:
+        # Days follow the trader's local calendar, gaps the actual elapsed time
+        wall_clock = ts.tz_localize(None)
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return ts.as_unit('ns').value, wall_clock.as_unit('ns').value // NS_PER_DAY
+
+
+def _timestamps_ns(values):
+    """Vectorized _timestamp_ns(); unparseable values become (None, None)."""
+    ts = pd.to_datetime(pd.Series(values), errors='coerce')
+    wall_clock = ts
+    if ts.dt.tz is not None:
+        wall_clock = ts.dt.tz_localize(None)
+        ts = ts.dt.tz_convert('UTC').dt.tz_localize(None)
+    ns = ts.to_numpy('datetime64[ns]').view(np.int64)
+    days = wall_clock.to_numpy('datetime64[ns]').view(np.int64) // NS_PER_DAY
+    return [(None, None) if missing else (value, day)
+            for value, day, missing in zip(ns.tolist(), days.tolist(), ts.isna().tolist())]
+
+
+def _parse_pl(value):
+    try:
+        pl = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(pl) else pl
+
+
+class StreamingBiasDetector:
+    """
+    Incremental bias scoring for live trade streams and chunked uploads.
+
+    Keeps running counts, sums and streaming quantile estimates instead of
+    the trade log, so adding a trade or scoring a trade attempt takes
+    constant time and memory regardless of history length. Scores use the
+    same thresholds as BiasDetector, and analyze_all() returns the same
+    report sections.
+
+    Statistics that depend on the whole history are approximated: the
+    large-loss and small-move thresholds use the values known when each
+    trade arrived, and medians and the loss escalation factor come from
+    P-square quantile estimates. Results can therefore differ slightly from
+    a batch BiasDetector run over the same trades.
+
+    Trades must be added in chronological order; out-of-order trades are
+    counted in out_of_order_trades.
+    """
+
+    def __init__(self):
+        # Trades offered (including skipped invalid ones) vs. trades scored
+        self.history_length = 0
+        self.trade_count = 0
+        self.out_of_order_trades = 0
+        self.total_pl = 0.0
+        self.total_abs_pl = 0.0
+        self.max_pl = None
+        self.min_pl = None
+        self.assets = set()
+
+        # Last trade seen
+        self.last_timestamp = None
+        self.last_pl = None
+        self.last_asset = None
+
+        # Daily counters
+        self.current_day = None
+        self.trades_today = 0
+        self.trading_days = 0
+        self.max_trades_per_day = 0
+
+        # Gaps between consecutive trades (minutes)
+        self.positive_gap_sum = 0.0
+        self.positive_gap_count = 0
+        self.rapid_trades = 0
+        self.gap_after_small_move_sum = 0.0
+        self.trades_after_small_move = 0
+
+        # Wins and losses
+        self.win_count = 0
+        self.win_sum = 0.0
+        self.loss_count = 0
+        self.loss_sum = 0.0
+        self.median_win = P2Quantile(0.5)
+        self.median_loss = P2Quantile(0.5)
+        self.upper_loss_size = P2Quantile(5 / 6)
+        self.lower_loss_size = P2Quantile(1 / 6)
+
+        # Behaviour after losses and wins
+        self.trades_after_loss = 0
+        self.gap_after_loss_sum = 0.0
+        self.wins_after_loss = 0
+        self.emotional_cluster = 0
+        self.rapid_same_asset = 0
+        self.trades_after_win = 0
+        self.gap_after_win_sum = 0.0
+        self.trades_after_large_loss = 0
+        self.abs_pl_after_large_loss_sum = 0.0
+        self.large_loss_threshold = P2Quantile(0.2)
+
+        # Losing streaks
+        self.loss_streak = 0
+        self.longest_losing_streak = 0
+        self.completed_streaks = {}
+        self.trades_after_multiple_losses = 0
+        self.abs_pl_after_multiple_losses_sum = 0.0
+
+        # Human Tax, per rule as [amount, count]
+        self.human_tax = 0.0
+        self.human_tax_by_rule = {'overtrading': [0.0, 0], 'rapid_fire': [0.0, 0], 'revenge': [0.0, 0]}
+
+    def add_trade(self, trade):
+        """
+        Fold one trade into the running state.
+
+        Args:
+            trade (dict): Trade with Timestamp, Asset and P/L keys
+
+        Returns:
+            bool: False if the trade was skipped for invalid Timestamp or P/L
+        """
+        timestamp, day = _timestamp_ns(trade.get('Timestamp'))
+        return self._add(timestamp, day, trade.get('Asset'), _parse_pl(trade.get('P/L')))
+
+    def add_trades(self, trades):
+        """Fold a chronological sequence of trade dicts into the running state."""
+        for trade in trades:
+            self.add_trade(trade)
+
+    def add_columns(self, timestamps, assets, pls):
+        """
+        Fold a chronological block of trades given as columns, e.g. one CSV chunk.
+
+        Timestamps and P/L are parsed for the whole block at once.
+        """
+        pls = pd.to_numeric(pd.Series(pls), errors='coerce')
+        pls = [None if missing else value for value, missing in zip(pls.tolist(), pls.isna().tolist())]
+        for (timestamp, day), asset, pl in zip(_timestamps_ns(timestamps), list(assets), pls):
+            self._add(timestamp, day, asset, pl)
+
+    def _add(self, timestamp, day, asset, pl):
+        self.history_length += 1
+        if timestamp is None or pl is None:
+            return False
+        abs_pl = abs(pl)
+        gap = None
+
+        if self.last_timestamp is not None:
+            if timestamp < self.last_timestamp:
+                self.out_of_order_trades += 1
+            gap = (timestamp - self.last_timestamp) / NS_PER_MINUTE
+            prev_pl = self.last_pl
+
+            if gap > 0:
+                self.positive_gap_sum += gap
+                self.positive_gap_count += 1
+            if gap < 1:
+                self.rapid_trades += 1
+
+            small_move_threshold = (self.total_abs_pl / self.trade_count) * 0.02
+            if abs(prev_pl) <= small_move_threshold:
+                self.gap_after_small_move_sum += gap
+                self.trades_after_small_move += 1
+
+            if prev_pl < 0:
+                self.trades_after_loss += 1
+                self.gap_after_loss_sum += gap
+                if pl > 0:
+                    self.wins_after_loss += 1
+                if gap < 15:
+                    self.emotional_cluster += 1
+                if gap < 30 and asset == self.last_asset:
+                    self.rapid_same_asset += 1
+                if prev_pl <= self.large_loss_threshold.value():
+                    self.trades_after_large_loss += 1
+                    self.abs_pl_after_large_loss_sum += abs_pl
+            else:
+                self.trades_after_win += 1
+                self.gap_after_win_sum += gap
+
+        if day != self.current_day:
+            self.current_day = day
+            self.trading_days += 1
+            self.trades_today = 0
+        self.trades_today += 1
+        self.max_trades_per_day = max(self.max_trades_per_day, self.trades_today)
+
+        if pl < 0:
+            self.loss_count += 1
+            self.loss_sum += pl
+            self.median_loss.add(abs_pl)
+            self.upper_loss_size.add(abs_pl)
+            self.lower_loss_size.add(abs_pl)
+            self.large_loss_threshold.add(pl)
+            self.loss_streak += 1
+            self.longest_losing_streak = max(self.longest_losing_streak, self.loss_streak)
+            self._apply_human_tax(abs_pl, gap)
+        else:
+            if self.loss_streak > 0:
+                self.completed_streaks[self.loss_streak] = self.completed_streaks.get(self.loss_streak, 0) + 1
+            self.loss_streak = 0
+            if pl > 0:
+                self.win_count += 1
+                self.win_sum += pl
+                self.median_win.add(pl)
+        if self.loss_streak >= 2:
+            self.trades_after_multiple_losses += 1
+            self.abs_pl_after_multiple_losses_sum += abs_pl
+
+        self.trade_count += 1
+        self.total_pl += pl
+        self.total_abs_pl += abs_pl
+        self.max_pl = pl if self.max_pl is None else max(self.max_pl, pl)
+        self.min_pl = pl if self.min_pl is None else min(self.min_pl, pl)
+        self.assets.add(asset)
+        self.last_timestamp = timestamp
+        self.last_pl = pl
+        self.last_asset = asset
+        return True
+
+    def _apply_human_tax(self, abs_pl, gap):
+        """Same rules as BiasDetector.calculate_human_tax_breakdown(), applied to one losing trade."""
+        rules = {
+            'overtrading': self.trades_today > 8,
+            'rapid_fire': gap is not None and gap < 1.0,
+            'revenge': gap is not None and gap < 15.0 and self.last_pl < 0,
+        }
+        for rule, matched in rules.items():
+            if matched:
+                self.human_tax_by_rule[rule][0] += abs_pl
+                self.human_tax_by_rule[rule][1] += 1
+        if any(rules.values()):
+            self.human_tax += abs_pl
+
+    def score_attempt(self, timestamp, asset, action='buy'):
+        """
+        Score the history as if a new trade attempt were placed now.
+
+        The attempt is treated as an open position with zero P/L, like the
+        batch /api/realtime path. The detector's own state is left untouched.
+
+        Returns:
+            dict: overtrading and revenge_trading results
+        """
+        probe = copy.copy(self)
+        # A zero-P/L attempt never updates the quantile estimates or Human Tax, but it
+        # adds to the asset set and ends any losing streak, so those get their own copies
+        probe.assets = set(self.assets)
+        probe.completed_streaks = dict(self.completed_streaks)
+        probe.add_trade({'Timestamp': timestamp, 'Buy/sell': action, 'Asset': asset, 'P/L': 0})
+        return {
+            'overtrading': probe.detect_overtrading(),
+            'revenge_trading': probe.detect_revenge_trading()
+        }
+
+    def analyze_all(self):
+        """
+        Score the trades seen so far.
+
+        Returns:
+            dict: overtrading, loss_aversion, revenge_trading, summary,
+                  recommendations and statistics, as BiasDetector.analyze_all()
+        """
+        if self.trade_count == 0:
+            raise ValueError("No valid trading data found after processing")
+
+        overtrading = self.detect_overtrading()
+        loss_aversion = self.detect_loss_aversion()
+        revenge_trading = self.detect_revenge_trading()
+        biases_detected = [name for name, result in [('Overtrading', overtrading),
+                                                     ('Loss Aversion', loss_aversion),
+                                                     ('Revenge Trading', revenge_trading)]
+                           if result['detected']]
+
+        return {
+            'overtrading': overtrading,
+            'loss_aversion': loss_aversion,
+            'revenge_trading': revenge_trading,
+            'summary': {
+                'total_trades': self.trade_count,
+                'total_pnl': round(self.total_pl, 2),
+                'win_rate': round((self.win_count / self.trade_count) * 100, 1),
+                'biases_detected': biases_detected,
+                'bias_count': len(biases_detected)
+            },
+            'recommendations': build_recommendations({'overtrading': overtrading,
+                                                     'loss_aversion': loss_aversion,
+                                                     'revenge_trading': revenge_trading}),
+            'statistics': self.get_statistics()
+        }
+
+    def get_statistics(self):
+        return {
+            'total_trades': self.trade_count,
+            'winning_trades': self.win_count,
+            'losing_trades': self.loss_count,
+            'total_pnl': round(self.total_pl, 2),
+            'avg_pnl': round(self.total_pl / self.trade_count, 2),
+            'largest_win': round(self.max_pl, 2),
+            'largest_loss': round(self.min_pl, 2),
+            'win_rate': round((self.win_count / self.trade_count) * 100, 1),
+            'trading_days': self.trading_days,
+            'unique_assets': len(self.assets),
+            'human_tax': round(self.human_tax, 2),
+            'human_tax_by_rule': {
+                rule: {'amount': round(amount, 2), 'count': count}
+                for rule, (amount, count) in self.human_tax_by_rule.items()
+            },
+            'prosperity_projection': round(self.human_tax * ((1 + 0.07) ** 10), 2)
+        }
+
+    def detect_overtrading(self):
+        if self.trade_count == 0:
+            return {'detected': False, 'severity': 'Low', 'score': 0, 'metrics': {}}
+
+        avg_trades_per_day = self.trade_count / self.trading_days
+        rapid_trade_pct = (self.rapid_trades / self.trade_count) * 100
+        avg_time_between_trades = (self.positive_gap_sum / self.positive_gap_count
+                                   if self.positive_gap_count > 0 else float('nan'))
+
+        if self.trades_after_small_move > 0:
+            avg_time_after_small_move = self.gap_after_small_move_sum / self.trades_after_small_move
+            frequency_increase_ratio = avg_time_between_trades / avg_time_after_small_move if avg_time_after_small_move > 0 else 1
+        else:
+            frequency_increase_ratio = 1
+
+        total_estimated_costs = self.total_abs_pl * 0.001
+        cost_to_return_ratio = abs(total_estimated_costs / self.total_pl) if self.total_pl != 0 else 0
+
+        result = score_overtrading(avg_trades_per_day, self.max_trades_per_day, rapid_trade_pct,
+                                   frequency_increase_ratio, cost_to_return_ratio, self.total_pl)
+        return {
+            **result,
+            'metrics': {
+                'avg_trades_per_day': round(avg_trades_per_day, 2),
+                'max_trades_per_day': self.max_trades_per_day,
+                'trades_today': self.trades_today,
+                'rapid_trade_percentage': round(rapid_trade_pct, 1),
+                'avg_minutes_between_trades': round(avg_time_between_trades, 1) if not math.isnan(avg_time_between_trades) else 0,
+                'frequency_increase_after_small_moves': round(frequency_increase_ratio, 2),
+                'cost_to_return_ratio': round(cost_to_return_ratio * 100, 1) if cost_to_return_ratio > 0 else 0,
+                'total_estimated_costs': round(total_estimated_costs, 2),
+                'total_net_return': round(self.total_pl, 2)
+            },
+            'description': overtrading_description(result['severity'], avg_trades_per_day, rapid_trade_pct, cost_to_return_ratio)
+        }
+
+    def detect_loss_aversion(self):
+        if self.win_count == 0 or self.loss_count == 0:
+            return {
+                'detected': False,
+                'severity': 'Low',
+                'score': 0,
+                'metrics': {},
+                'description': 'Insufficient data to detect loss aversion patterns.'
+            }
+
+        avg_win = self.win_sum / self.win_count
+        avg_loss = abs(self.loss_sum / self.loss_count)
+        risk_reward_ratio = avg_win / avg_loss if avg_loss > 0 else 0
+
+        # Approximates mean(largest third) / mean(smallest third) of loss sizes by their middle quantiles
+        if self.loss_count > 1:
+            lower = self.lower_loss_size.value()
+            loss_escalation = self.upper_loss_size.value() / lower if lower > 0 else 1
+        else:
+            loss_escalation = 1
+
+        largest_win = self.max_pl
+        largest_loss = abs(self.min_pl)
+        loss_to_win_ratio = largest_loss / largest_win if largest_win > 0 else 0
+
+        median_win = self.median_win.value()
+        median_loss = self.median_loss.value()
+        win_rate = (self.win_count / self.trade_count) * 100
+        cutting_winners_pattern = win_rate > 55 and risk_reward_ratio < 1.2
+
+        result = score_loss_aversion(risk_reward_ratio, loss_escalation, loss_to_win_ratio,
+                                     cutting_winners_pattern, median_win, median_loss)
+        return {
+            **result,
+            'metrics': {
+                'risk_reward_ratio': round(risk_reward_ratio, 2),
+                'avg_win': round(avg_win, 2),
+                'avg_loss': round(avg_loss, 2),
+                'median_win': round(median_win, 2),
+                'median_loss': round(median_loss, 2),
+                'win_rate': round(win_rate, 1),
+                'largest_win': round(largest_win, 2),
+                'largest_loss': round(largest_loss, 2),
+                'loss_to_win_ratio': round(loss_to_win_ratio, 2),
+                'loss_escalation_factor': round(loss_escalation, 2)
+            },
+            'description': loss_aversion_description(result['severity'], risk_reward_ratio, loss_to_win_ratio, cutting_winners_pattern)
+        }
+
+    def detect_revenge_trading(self):
+        if self.trade_count < 2 or self.loss_count == 0 or self.trades_after_loss == 0:
+            return {
+                'detected': False,
+                'severity': 'Low',
+                'score': 0,
+                'metrics': {},
+                'description': 'Insufficient data to detect revenge trading patterns.'
+            }
+
+        avg_abs_pl_normal = self.total_abs_pl / self.trade_count
+        avg_abs_pl_after_large_loss = (self.abs_pl_after_large_loss_sum / self.trades_after_large_loss
+                                       if self.trades_after_large_loss > 0 else 0)
+        size_increase_ratio = avg_abs_pl_after_large_loss / avg_abs_pl_normal if avg_abs_pl_normal > 0 else 1
+
+        rapid_same_asset_pct = (self.rapid_same_asset / self.trades_after_loss) * 100
+        emotional_cluster_pct = (self.emotional_cluster / self.trades_after_loss) * 100
+
+        if self.trades_after_multiple_losses > 0:
+            avg_size_after_multiple = self.abs_pl_after_multiple_losses_sum / self.trades_after_multiple_losses
+            escalation_ratio = avg_size_after_multiple / avg_abs_pl_normal if avg_abs_pl_normal > 0 else 1
+        else:
+            escalation_ratio = 1
+
+        avg_time_after_loss = self.gap_after_loss_sum / self.trades_after_loss
+        avg_time_after_win = (self.gap_after_win_sum / self.trades_after_win
+                              if self.trades_after_win > 0 else avg_time_after_loss)
+        win_rate_after_loss = (self.wins_after_loss / self.trades_after_loss) * 100
+
+        # Include the streak still in progress, as the batch detector does
+        streaks = dict(self.completed_streaks)
+        if self.loss_streak > 0:
+            streaks[self.loss_streak] = streaks.get(self.loss_streak, 0) + 1
+
+        result = score_revenge_trading(size_increase_ratio, rapid_same_asset_pct, emotional_cluster_pct,
+                                       escalation_ratio, avg_time_after_loss, avg_time_after_win,
+                                       win_rate_after_loss)
+        return {
+            **result,
+            'metrics': {
+                'avg_minutes_after_loss': round(avg_time_after_loss, 1),
+                'avg_minutes_after_win': round(avg_time_after_win, 1),
+                'rapid_same_asset_pct': round(rapid_same_asset_pct, 1),
+                'emotional_cluster_pct': round(emotional_cluster_pct, 1),
+                'win_rate_after_loss': round(win_rate_after_loss, 1),
+                'size_increase_after_large_loss': round(size_increase_ratio, 2),
+                'risk_escalation_ratio': round(escalation_ratio, 2),
+                'trades_after_consecutive_losses': self.trades_after_multiple_losses,
+                'current_losing_streak': self.loss_streak,
+                'longest_losing_streak': self.longest_losing_streak,
+                'losing_streak_histogram': dict(sorted(streaks.items()))
+            },
+            'description': revenge_trading_description(result['severity'], emotional_cluster_pct, rapid_same_asset_pct, escalation_ratio)
+        }
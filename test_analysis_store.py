@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analysis_store import AnalysisSnapshot, InMemoryAnalysisStore, SQLiteAnalysisStore
+from bias_detector import BiasDetector
+from mock_data_generator import MockDataGenerator
+
+# A snapshot folded chunk by chunk (and saved and reloaded in between) must give
+# the same analyze_all() report as a full BiasDetector run over the whole log.
+
+
+def fold_in_chunks(df, cuts):
+    snapshot = AnalysisSnapshot()
+    for start, end in zip([0] + cuts, cuts + [len(df)]):
+        assert snapshot.fold(df.iloc[start:end])
+        snapshot = AnalysisSnapshot.from_bytes(snapshot.to_bytes())
+    return snapshot
+
+
+def test_snapshot_matches_full_analysis():
+    for seed, num_trades in enumerate([3, 20, 200, 2000, 10000]):
+        df = MockDataGenerator(num_trades=num_trades, seed=seed).generate_frame()
+        rng = np.random.default_rng(seed)
+        cuts = sorted(set(rng.integers(1, num_trades, size=4).tolist()))
+        assert fold_in_chunks(df, cuts).analyze_all() == BiasDetector(df).analyze_all()
+
+
+def test_snapshot_of_records_matches_full_analysis():
+    # String timestamps, as stored sessions hold them
+    df = pd.DataFrame(MockDataGenerator(num_trades=300, seed=11).generate())
+    assert fold_in_chunks(df, [64, 128, 250]).analyze_all() == BiasDetector(df).analyze_all()
+
+
+def test_out_of_order_fold_is_refused():
+    df = MockDataGenerator(num_trades=100, seed=1).generate_frame()
+    snapshot = AnalysisSnapshot()
+    assert snapshot.fold(df.iloc[50:])
+    assert not snapshot.fold(df.iloc[:50])
+    assert not AnalysisSnapshot().fold(df.iloc[::-1].reset_index(drop=True))
+
+
+def test_stores_round_trip():
+    df = MockDataGenerator(num_trades=500, seed=5).generate_frame()
+    snapshot = fold_in_chunks(df, [])
+    with tempfile.TemporaryDirectory() as directory:
+        for store in (InMemoryAnalysisStore(), SQLiteAnalysisStore(os.path.join(directory, 'analysis.db'))):
+            assert store.get('session') is None
+            store.put('session', snapshot)
+            assert store.get('session').analyze_all() == snapshot.analyze_all()
+            assert store.get('session').history_length == 500
+            store.clear('session')
+            assert store.get('session') is None
+
+
+def session_trades(num_trades, seed):
+    frame = MockDataGenerator(num_trades=num_trades, seed=seed).generate_frame()
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+def test_session_analysis_matches_full_analysis():
+    import app
+
+    client = app.app.test_client()
+    trades = session_trades(200, seed=3)
+    session_id = 'test-snapshot'
+    client.delete(f'/api/sessions/{session_id}')
+
+    def analyze(**body):
+        response = client.post('/api/analyze', json=body)
+        assert response.status_code == 200
+        return response.get_json()
+
+    # Appends are folded into the saved snapshot
+    client.post(f'/api/sessions/{session_id}/trades', json={'trades': trades[:120]})
+    assert analyze(session_id=session_id) == analyze(trades=trades[:120])
+    client.post(f'/api/sessions/{session_id}/trades', json={'trades': trades[120:]})
+    assert analyze(session_id=session_id) == analyze(trades=trades)
+    # Replacing the history starts a new snapshot
+    client.put(f'/api/sessions/{session_id}/trades', json={'trades': trades[:50]})
+    assert analyze(session_id=session_id) == analyze(trades=trades[:50])
+    # Out-of-order appends fall back to a full run
+    client.post(f'/api/sessions/{session_id}/trades', json={'trades': trades[10:20]})
+    assert analyze(session_id=session_id) == analyze(trades=trades[:50] + trades[10:20])
+    client.delete(f'/api/sessions/{session_id}')
+
+
+def test_concurrent_writes_and_analyses():
+    import app
+
+    trades = session_trades(400, seed=2)
+    other = session_trades(400, seed=9)
+    session_id = 'test-snapshot-race'
+    app.app.test_client().delete(f'/api/sessions/{session_id}')
+
+    def writer():
+        client = app.app.test_client()
+        rng = np.random.default_rng(0)
+        for i in range(15):
+            source = (trades, other)[i % 2]
+            client.put(f'/api/sessions/{session_id}/trades', json={'trades': source[:int(rng.integers(50, 200))]})
+            client.post(f'/api/sessions/{session_id}/trades',
+                        json={'trades': source[200:200 + int(rng.integers(1, 100))]})
+
+    def reader():
+        client = app.app.test_client()
+        for _ in range(20):
+            client.post('/api/analyze', json={'session_id': session_id})
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Whatever interleaving happened, the saved snapshot must describe the stored history
+    client = app.app.test_client()
+    from_snapshot = client.post('/api/analyze', json={'session_id': session_id}).get_json()
+    full = client.post('/api/analyze', json={'trades': app.session_store.get_trades(session_id)}).get_json()
+    assert from_snapshot == full
+    client.delete(f'/api/sessions/{session_id}')
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,59 @@
+import json
+
+from batch_analysis import _analyze_account_json, create_pool, iter_ndjson_batch_results
+from mock_data_generator import MockDataGenerator
+
+# Batch results must match a single-account run, and a malformed input line
+# must come back as an error record rather than cutting the stream short.
+
+
+def account(account_id, num_trades, seed):
+    frame = MockDataGenerator(num_trades=num_trades, seed=seed).generate_frame()
+    return {'account_id': account_id, 'trades': json.loads(frame.to_json(orient='records', date_format='iso'))}
+
+
+def test_ndjson_malformed_lines_become_errors():
+    lines = [json.dumps(account('a', 50, 1)), '{"account_id": "b", "trades": [', '', '[1, 2]',
+             json.dumps(account('c', 80, 2))]
+    results = [json.loads(line) for line in iter_ndjson_batch_results(lines, max_workers=2)]
+    assert sorted(result['account_id'] for result in results if 'account_id' in result) == ['a', 'c']
+    errors = sorted((result['line'], result['error'].split(':')[0]) for result in results if 'line' in result)
+    assert errors == [(2, 'Invalid JSON'), (4, 'Expected one account object per line')]
+
+
+def test_batch_endpoint_streams_errors():
+    import app
+
+    accounts = [account('a', 50, 1), account('c', 80, 2)]
+    body = '\n'.join([json.dumps(accounts[0]), 'not json', json.dumps(accounts[1])]) + '\n'
+    response = app.app.test_client().post('/api/analyze/batch', data=body,
+                                          content_type='application/x-ndjson')
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(results) == 3
+    errors = [result for result in results if 'line' in result]
+    assert [error['line'] for error in errors] == [2]
+    assert errors[0]['error'].startswith('Invalid JSON')
+    by_account = {result['account_id']: result for result in results if 'account_id' in result}
+    for expected in accounts:
+        assert by_account[expected['account_id']] == json.loads(_analyze_account_json(expected))
+
+
+def worker_detector_threads(_):
+    import detector_registry
+    return detector_registry.DETECTOR_WORKERS
+
+
+def test_workers_run_detectors_single_threaded():
+    pool = create_pool(2)
+    try:
+        assert list(pool.map(worker_detector_threads, range(4))) == [1, 1, 1, 1]
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
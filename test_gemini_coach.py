@@ -0,0 +1,120 @@
+import json
+import time
+
+import gemini_coach
+from gemini_coach import CircuitBreaker, GeminiCoach, GeminiError
+
+# The breaker opens on a high failure rate, lets one trial call through after
+# the cooldown, and ignores late outcomes of calls admitted before it opened.
+
+
+def test_breaker_opens_on_failures():
+    breaker = CircuitBreaker(window=10, min_calls=3, cooldown=60)
+    tickets = [breaker.allow() for _ in range(3)]
+    breaker.record(True, tickets[0])
+    breaker.record(False, tickets[1])
+    assert breaker.state == 'closed'
+    breaker.record(False, tickets[2])
+    assert breaker.state == 'open'
+    assert breaker.allow() is False
+
+
+def test_single_trial_after_cooldown():
+    breaker = CircuitBreaker(window=10, min_calls=3, cooldown=0.05)
+    for ticket in [breaker.allow() for _ in range(3)]:
+        breaker.record(False, ticket)
+    time.sleep(0.06)
+    assert breaker.state == 'half-open'
+    trial = breaker.allow()
+    assert trial and trial[1]
+    assert breaker.allow() is False
+    breaker.record(False, trial)
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    trial = breaker.allow()
+    breaker.record(True, trial)
+    assert breaker.state == 'closed'
+    assert breaker.allow()
+
+
+def test_late_outcomes_are_dropped():
+    breaker = CircuitBreaker(window=10, min_calls=3, cooldown=0.05)
+    tickets = [breaker.allow() for _ in range(5)]
+    for ticket in tickets[:3]:
+        breaker.record(False, ticket)
+    # A success admitted before the breaker opened must not close it
+    breaker.record(True, tickets[3])
+    assert breaker.state == 'open'
+    time.sleep(0.06)
+    # Nor may a late failure be taken for the trial's outcome
+    breaker.record(False, tickets[4])
+    assert breaker.state == 'half-open'
+    trial = breaker.allow()
+    breaker.record(True, trial)
+    assert breaker.state == 'closed'
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """GenerativeModel stand-in with the generate_content() signature of the pinned SDK."""
+
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.prompts = []
+
+    def generate_content(self, contents, *, generation_config=None, safety_settings=None, stream=False):
+        self.prompts.append(contents)
+        time.sleep(self.delay)
+        return StubResponse(self.text)
+
+
+def stub_coach(text, delay=0.0):
+    coach = GeminiCoach()
+    coach.model = StubModel(text, delay)
+    coach.cache.get = lambda key: None
+    return coach
+
+
+def test_sdk_recommendations():
+    recommendations = [{'bias': 'Overtrading', 'recommendation': 'Cap trades per day.', 'priority': 'High'}]
+    coach = stub_coach('```json\n' + json.dumps(recommendations) + '\n```')
+    analysis = {'summary': {'win_rate': 50, 'total_trades': 10, 'biases_detected': []},
+                'overtrading': {'detected': True, 'metrics': {'max_trades_per_day': 12}}}
+    job_id = coach.start_recommendations(analysis)
+    assert coach.wait(job_id, timeout=5) == ('done', recommendations)
+    assert coach.breaker.state == 'closed'
+
+
+def test_sdk_intervention():
+    coach = stub_coach('"Is this a strategy or a reaction?"')
+    message = coach.compose_intervention('Revenge Trading', 8, {'asset': 'BTC', 'action': 'Buy'})
+    assert message == 'Is this a strategy or a reaction?'
+    assert 'Revenge Trading' in coach.model.prompts[0]
+
+
+def test_sdk_call_times_out():
+    coach = stub_coach('too late', delay=0.5)
+    timeout = gemini_coach.REQUEST_TIMEOUT
+    gemini_coach.REQUEST_TIMEOUT = 0.05
+    try:
+        start = time.monotonic()
+        coach.compose_intervention('Overtrading', 5, {})
+    except GeminiError:
+        assert time.monotonic() - start < 0.4
+    else:
+        raise AssertionError("A hung SDK call was not given up on")
+    finally:
+        gemini_coach.REQUEST_TIMEOUT = timeout
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
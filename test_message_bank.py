@@ -0,0 +1,53 @@
+import os
+import time
+from datetime import datetime, timezone
+
+from message_bank import MessageBank, asset_class, bank_key, time_bucket
+
+# Messages are bucketed by the trader's local time of day, so UTC timestamps
+# from the extension must be converted before bucketing.
+
+
+def in_timezone(tz, fn):
+    previous = os.environ.get('TZ')
+    os.environ['TZ'] = tz
+    time.tzset()
+    try:
+        return fn()
+    finally:
+        if previous is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = previous
+        time.tzset()
+
+
+def test_utc_timestamps_use_local_time_of_day():
+    # 01:00 UTC is 10:00 in Tokyo and 20:00 the evening before in New York
+    assert in_timezone('Asia/Tokyo', lambda: time_bucket('2024-01-01T01:00:00.000Z')) == 'morning'
+    assert in_timezone('America/New_York', lambda: time_bucket('2024-01-01T01:00:00Z')) == 'evening'
+    moment = datetime(2024, 1, 1, 1, tzinfo=timezone.utc)
+    assert in_timezone('Asia/Tokyo', lambda: time_bucket(moment)) == 'morning'
+
+
+def test_naive_timestamps_are_local():
+    for tz in ('Asia/Tokyo', 'America/New_York'):
+        assert in_timezone(tz, lambda: time_bucket('2024-01-01T14:30:00')) == 'afternoon'
+    assert time_bucket('not a timestamp') in {'overnight', 'morning', 'afternoon', 'evening'}
+
+
+def test_lookup_falls_back_to_same_bias_and_severity():
+    assert asset_class('BTC/USD') == 'crypto' and asset_class('AAPL') == 'equity'
+    key = bank_key('Overtrading', 4, 'AAPL', '2024-01-01T10:00:00')
+    assert key == 'Overtrading|4|equity|morning'
+    bank = MessageBank({key: ['Slow down.']})
+    assert bank.lookup('Overtrading', 4, 'AAPL', '2024-01-01T10:00:00') == 'Slow down.'
+    assert bank.lookup('Overtrading', 4, 'BTC', '2024-01-01T22:00:00') == 'Slow down.'
+    assert bank.lookup('Revenge Trading', 8, 'AAPL') is None
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from mock_data_generator import MockDataGenerator, _resolve_losses
+
+# The vectorized generator must produce the same trades as the per-trade loop it
+# replaced, and a seeded run must not depend on how it is chunked.
+
+
+def resolve_losses_loop(revenge, loss_if_prev_loss, loss_otherwise, prev_loss):
+    out = []
+    for i in range(len(revenge)):
+        loss = bool(loss_if_prev_loss[i] if (revenge[i] and prev_loss) else loss_otherwise[i])
+        out.append(loss)
+        prev_loss = loss
+    return out
+
+
+def test_resolve_losses_matches_loop():
+    rng = np.random.default_rng(0)
+    for n in [1, 2, 7, 50, 1000]:
+        for revenge_rate in (0.1, 0.5, 0.9, 1.0):
+            revenge = rng.random(n) < revenge_rate
+            loss_if_prev_loss = rng.random(n) < 0.5
+            loss_otherwise = rng.random(n) < 0.5
+            for prev_loss in (False, True):
+                expected = resolve_losses_loop(revenge, loss_if_prev_loss, loss_otherwise, prev_loss)
+                actual = _resolve_losses(revenge, loss_if_prev_loss, loss_otherwise, prev_loss)
+                assert actual.tolist() == expected
+
+
+def test_seeded_output_is_reproducible():
+    first = MockDataGenerator(num_trades=500, seed=7).generate()
+    second = MockDataGenerator(num_trades=500, seed=7).generate()
+    assert first == second
+    assert MockDataGenerator(num_trades=500, seed=8).generate() != first
+
+
+def test_chunk_size_does_not_change_output():
+    generator = MockDataGenerator(num_trades=1000, seed=3, num_accounts=3)
+    whole = generator.generate_frame()
+    for chunksize in (7, 333, 1000):
+        chunked = pd.concat(generator.iter_chunks(chunksize), ignore_index=True)
+        chunked['Account'] = chunked['Account'].astype('category')
+        pd.testing.assert_frame_equal(chunked, whole)
+
+
+def test_generated_columns():
+    df = MockDataGenerator(num_trades=200, seed=1, num_accounts=2).generate_frame()
+    assert list(df.columns) == ['Account', 'Timestamp', 'Buy/sell', 'Asset', 'P/L']
+    assert len(df) == 400
+    for _, account in df.groupby('Account', observed=True):
+        assert account['Timestamp'].is_monotonic_increasing
+    records = MockDataGenerator(num_trades=3, seed=1).generate()
+    assert set(records[0]) == {'Timestamp', 'Buy/sell', 'Asset', 'P/L'}
+    assert isinstance(records[0]['Timestamp'], str)
+
+
+def test_empty_log():
+    for num_trades, num_accounts in ((0, 1), (0, 3), (5, 0)):
+        generator = MockDataGenerator(num_trades=num_trades, seed=1, num_accounts=num_accounts)
+        assert generator.generate() == []
+        frame = generator.generate_frame()
+        assert len(frame) == 0
+        full = MockDataGenerator(num_trades=2, seed=1, num_accounts=max(num_accounts, 1)).generate_frame()
+        if num_accounts > 1:
+            assert list(frame.columns) == list(full.columns)
+        assert frame['Timestamp'].dtype == full['Timestamp'].dtype
+        assert frame['P/L'].dtype == full['P/L'].dtype
+
+
+def test_bias_mix():
+    df = MockDataGenerator(num_trades=300, seed=2, bias_mix={'normal': 1}).generate_frame()
+    # Normal trades are 1-4 hours apart
+    gaps = df['Timestamp'].diff().dropna().dt.total_seconds() / 60
+    assert gaps.between(60, 240).all()
+    for bias_mix in ({'fomo': 1}, {'normal': 0}, {'normal': -1, 'revenge': 2}):
+        try:
+            MockDataGenerator(seed=2, bias_mix=bias_mix)
+        except ValueError:
+            continue
+        raise AssertionError(f"bias_mix {bias_mix} was accepted")
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
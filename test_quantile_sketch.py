@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from analysis_store import AnalysisSnapshot, report_deviation
+from mock_data_generator import MockDataGenerator
+from quantile_sketch import QuantileSketch
+
+# No centroid may hold more than rank_error of the values, however the sketch was
+# built or merged, and logs short enough for singleton centroids are answered exactly.
+
+
+def quantile_rank_errors(sketch, values):
+    ordered = np.sort(values)
+    n = len(values)
+    quantiles = np.linspace(0.01, 0.99, 99)
+    quantile_errors = [abs(np.searchsorted(ordered, sketch.quantile(q)) / n - q) for q in quantiles]
+    rank_errors = [abs(sketch.rank(ordered[int(q * n)]) - int(q * n)) / n for q in quantiles]
+    return max(quantile_errors), max(rank_errors)
+
+
+def test_short_logs_are_exact():
+    rng = np.random.default_rng(0)
+    for n in [1, 2, 5, 50, 100]:
+        values, aligned = rng.normal(size=n), rng.random(n)
+        sketch = QuantileSketch(0.01, ('gap',))
+        sketch.add(values, aligned)
+        ordered, order = np.sort(values), np.argsort(values)
+        assert sketch.max_rank_error() == 0
+        for q in [0, 0.2, 0.5, 0.9, 1]:
+            assert np.isclose(sketch.quantile(q), pd.Series(values).quantile(q))
+        for x in [ordered[0] - 1, ordered[0], np.median(values), ordered[-1], ordered[-1] + 1]:
+            assert sketch.rank(x) == (values <= x).sum()
+        k = max(1, n // 3)
+        total, (gap_total,) = sketch.head(k)
+        assert np.isclose(total, ordered[:k].sum())
+        assert np.isclose(gap_total, aligned[order][:k].sum())
+        assert np.isclose(sketch.tail(k), ordered[-k:].sum())
+
+
+def test_rank_error_bound_holds():
+    rng = np.random.default_rng(1)
+    values = rng.standard_t(3, size=200000)
+    for rank_error in (0.05, 0.01, 0.002):
+        for chunks in (1, 100, 2000):
+            sketch = QuantileSketch(rank_error)
+            for part in np.array_split(values, chunks):
+                sketch.add(part)
+            assert len(sketch) == len(values)
+            assert sketch.max_rank_error() <= rank_error
+            quantile_error, rank_error_seen = quantile_rank_errors(sketch, values)
+            assert quantile_error <= rank_error
+            assert rank_error_seen <= rank_error
+
+
+def test_merged_shards_stay_within_bound():
+    rng = np.random.default_rng(2)
+    shards = [rng.exponential(size=int(size)) for size in rng.integers(1, 20000, size=40)]
+    merged = QuantileSketch(0.01)
+    for shard in shards:
+        sketch = QuantileSketch(0.01)
+        sketch.add(shard)
+        merged.merge(sketch)
+    values = np.concatenate(shards)
+    assert len(merged) == len(values)
+    assert merged.min == values.min() and merged.max == values.max()
+    assert merged.max_rank_error() <= 0.01
+    assert max(quantile_rank_errors(merged, values)) <= 0.01
+    try:
+        merged.merge(QuantileSketch(0.01, ('gap',)))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Merged sketches with different aligned values")
+
+
+def test_arrays_round_trip():
+    sketch = QuantileSketch(0.01, ('gap',))
+    rng = np.random.default_rng(3)
+    sketch.add(rng.normal(size=5000), rng.random(5000))
+    restored = QuantileSketch.from_arrays(sketch.to_arrays(), ('gap',))
+    assert restored.count == sketch.count and restored.rank_error == sketch.rank_error
+    for q in (0.1, 0.5, 0.9):
+        assert restored.quantile(q) == sketch.quantile(q)
+    assert restored.head(1234.5) == sketch.head(1234.5)
+
+
+def test_approximate_snapshot_of_short_log_is_exact():
+    df = MockDataGenerator(num_trades=80, seed=4).generate_frame()
+    exact, approximate = AnalysisSnapshot(), AnalysisSnapshot(0.01)
+    for start in range(0, len(df), 16):
+        assert exact.fold(df.iloc[start:start + 16])
+        assert approximate.fold(df.iloc[start:start + 16])
+    approximate = AnalysisSnapshot.from_bytes(approximate.to_bytes())
+    deviation = report_deviation(approximate.analyze_all(), exact.analyze_all())
+    assert deviation['max_score_delta'] == 0
+    assert deviation['same_biases_detected']
+    for section in deviation['sections'].values():
+        assert section['metric_errors'] == {}
+
+
+def test_approximate_snapshot_stays_small():
+    df = MockDataGenerator(num_trades=50000, seed=5).generate_frame()
+    exact, approximate = AnalysisSnapshot(), AnalysisSnapshot(0.01)
+    for start in range(0, len(df), 5000):
+        exact.fold(df.iloc[start:start + 5000])
+        approximate.fold(df.iloc[start:start + 5000])
+    assert len(approximate.to_bytes()) < 100000 < len(exact.to_bytes())
+    deviation = report_deviation(approximate.analyze_all(), exact.analyze_all())
+    assert deviation['same_biases_detected']
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
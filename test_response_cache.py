@@ -0,0 +1,50 @@
+import os
+import tempfile
+import time
+
+from response_cache import ResponseCache, cache_key
+
+# Near-identical prompt inputs share a cache entry; entries expire after the TTL
+# and, with a database path, survive a restart.
+
+
+def test_cache_key_buckets_numbers():
+    assert cache_key('recommendations', {'a': 0.51234, 'b': [1, 2.0001]}) == \
+        cache_key('recommendations', {'b': [1, 2.0002], 'a': 0.5149})
+    # Counts are bucketed too
+    assert cache_key('recommendations', {'trades': 1234}) == cache_key('recommendations', {'trades': 1229})
+    assert cache_key('recommendations', {'a': 0.51}) != cache_key('recommendations', {'a': 0.56})
+    assert cache_key('recommendations', {'flag': True}) != cache_key('recommendations', {'flag': 1})
+    assert cache_key('recommendations', 1) != cache_key('intervention', 1)
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+
+def test_expiry_and_persistence():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.db')
+        cache = ResponseCache(maxsize=2, ttl=0.2, db_path=path)
+        cache.set('a', [1])
+        cache.set('b', 'x')
+        cache.set('c', {'k': 1})
+        # Evicted from memory but still on disk
+        assert cache.get('a') == [1]
+        assert ResponseCache(db_path=path).get('b') == 'x'
+        time.sleep(0.25)
+        assert cache.get('c') is None
+        assert ResponseCache(db_path=path).get('a') is None
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
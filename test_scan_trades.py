@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+import pandas as pd
+
+from mock_data_generator import MockDataGenerator
+from scan_trades import find_trade_files, run_scan
+
+# A file that disappears between discovery and its scan is reported as an error
+# row; the rest of the scan and its checkpoint carry on.
+
+
+def write_exports(directory, count):
+    for i in range(count):
+        MockDataGenerator(num_trades=60, seed=i).write(os.path.join(directory, f'account_{i}.csv'))
+    return find_trade_files([directory])
+
+
+def test_vanished_file_becomes_error_row():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_exports(directory, 3)
+        os.remove(paths[1])
+        report = run_scan(paths, os.path.join(directory, 'report.csv'), workers=2)
+        assert list(report['file']) == paths
+        errors = report.set_index('file')['error']
+        assert pd.isna(errors[paths[0]]) and pd.isna(errors[paths[2]])
+        assert 'No such file' in errors[paths[1]]
+        assert not os.path.exists(os.path.join(directory, 'report.csv.partial.ndjson'))
+
+
+def test_resume_skips_unchanged_and_vanished_files():
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_exports(directory, 3)
+        output = os.path.join(directory, 'report.csv')
+        first = run_scan(paths, output, workers=2)
+        # Leave a checkpoint behind as an interrupted run would, then lose one of its files
+        first.to_json(output + '.partial.ndjson', orient='records', lines=True)
+        os.remove(paths[0])
+        report = run_scan(paths, output, workers=2)
+        assert list(report['file']) == paths
+        assert 'No such file' in report.set_index('file')['error'][paths[0]]
+        assert report['total_trades'].iloc[1:].tolist() == first['total_trades'].iloc[1:].tolist()
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
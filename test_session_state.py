@@ -0,0 +1,129 @@
+import threading
+import time
+
+from session_state import SessionRegistry
+
+# Idle sessions are evicted, but never one whose lock is held or waited on,
+# so two threads can't end up holding different locks for the same session.
+
+
+def test_least_recently_used_are_evicted():
+    registry = SessionRegistry(max_sessions=3, idle_ttl=60)
+    for session_id in ['a', 'b', 'c']:
+        with registry.hold(session_id) as session:
+            session.state = session_id
+    with registry.hold('a'):
+        pass
+    with registry.hold('d'):
+        pass
+    assert len(registry) == 3
+    with registry.hold('b') as session:
+        assert session.state is None
+    with registry.hold('a') as session:
+        assert session.state == 'a'
+
+
+def test_idle_sessions_are_evicted():
+    registry = SessionRegistry(idle_ttl=0.05)
+    with registry.hold('idle') as session:
+        session.state = 'detector'
+    time.sleep(0.06)
+    with registry.hold('active'):
+        pass
+    assert len(registry) == 1
+    with registry.hold('idle') as session:
+        assert session.state is None
+
+
+def test_held_sessions_are_not_evicted():
+    registry = SessionRegistry(max_sessions=1, idle_ttl=0)
+    inside, release = threading.Event(), threading.Event()
+    entries = []
+
+    def hold():
+        with registry.hold('busy') as session:
+            entries.append(session)
+            inside.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    inside.wait(5)
+    for session_id in ['x', 'y', 'z']:
+        with registry.hold(session_id):
+            pass
+    waiter = threading.Thread(target=hold)
+    waiter.start()
+    time.sleep(0.05)
+    # The waiter is blocked on the holder's lock, not a fresh one
+    assert len(entries) == 1
+    release.set()
+    holder.join()
+    waiter.join()
+    assert entries[0] is entries[1]
+
+
+def test_discard_state_keeps_the_lock():
+    registry = SessionRegistry()
+    with registry.hold('s') as session:
+        session.state = 'detector'
+        registry.discard_state('s')
+        assert session.state is None
+    registry.discard_state('unknown')
+    assert len(registry) == 1
+
+
+def test_realtime_detector_is_rebuilt_after_eviction():
+    import json
+    import app
+    from mock_data_generator import MockDataGenerator
+
+    frame = MockDataGenerator(num_trades=100, seed=6, bias_mix={'revenge': 1}).generate_frame()
+    trades = json.loads(frame.to_json(orient='records', date_format='iso'))
+    client = app.app.test_client()
+    session_id = 'test-session-state'
+    client.put(f'/api/sessions/{session_id}/trades', json={'trades': trades})
+    attempt = {'action': 'buy', 'asset': 'BTC', 'timestamp': trades[-1]['Timestamp'], 'session_id': session_id}
+
+    def decision():
+        result = client.post('/api/realtime', json=attempt).get_json()
+        return {key: result.get(key) for key in ('bias_detected', 'bias_type', 'severity', 'human_tax_impact')}
+
+    warm = decision()
+    assert warm['bias_detected']
+    ttl = app.realtime_sessions.idle_ttl
+    app.realtime_sessions.idle_ttl = 0
+    try:
+        # Any session's release now evicts every idle one, including ours
+        with app.realtime_sessions.hold('other'):
+            pass
+    finally:
+        app.realtime_sessions.idle_ttl = ttl
+    assert decision() == warm
+    client.delete(f'/api/sessions/{session_id}')
+
+
+def test_append_with_stale_count_is_rejected():
+    import app
+
+    client = app.app.test_client()
+    session_id = 'test-expected-count'
+    trade = {'Timestamp': '2024-01-01T10:00:00', 'Buy/sell': 'Buy', 'Asset': 'BTC', 'P/L': 5.0}
+    url = f'/api/sessions/{session_id}/trades'
+    client.delete(f'/api/sessions/{session_id}')
+    assert client.post(url, json={'trades': [trade], 'expected_count': 0}).get_json()['trade_count'] == 1
+    # The client thinks more trades are stored than the server has (e.g. after a restart)
+    response = client.post(url, json={'trades': [trade], 'expected_count': 3})
+    assert response.status_code == 409
+    assert response.get_json()['trade_count'] == 1
+    assert app.session_store.count(session_id) == 1
+    assert client.post(url, json={'trades': [trade], 'expected_count': 'x'}).status_code == 400
+    assert client.post(url, json={'trades': [trade]}).get_json()['trade_count'] == 2
+    client.delete(f'/api/sessions/{session_id}')
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
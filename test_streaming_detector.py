@@ -0,0 +1,80 @@
+import pandas as pd
+
+from bias_detector import BiasDetector
+from mock_data_generator import MockDataGenerator
+from streaming_detector import StreamingBiasDetector, P2Quantile
+
+# StreamingBiasDetector must agree with a batch BiasDetector run on everything it
+# tracks exactly: statistics, overtrading metrics and the losing-streak histogram.
+# Only the quantile-based metrics (medians, large-loss threshold) are estimates.
+
+
+def mock_log(num_trades, seed, utc_offset=None):
+    df = MockDataGenerator(num_trades=num_trades, seed=seed).generate_frame()
+    if utc_offset:
+        df['Timestamp'] = pd.to_datetime(df['Timestamp']).dt.strftime(f'%Y-%m-%dT%H:%M:%S{utc_offset}')
+    return df
+
+
+def assert_matches_batch(df, streaming):
+    batch = BiasDetector(df).analyze_all()
+    report = streaming.analyze_all()
+    assert report['statistics'] == batch['statistics']
+    assert report['overtrading']['metrics'] == {**batch['overtrading']['metrics'],
+                                               'trades_today': report['overtrading']['metrics']['trades_today']}
+    assert report['overtrading']['detected'] == batch['overtrading']['detected']
+    streaks = 'losing_streak_histogram'
+    assert report['revenge_trading']['metrics'].get(streaks) == batch['revenge_trading']['metrics'].get(streaks)
+
+
+def test_streaming_matches_batch():
+    for seed, num_trades in enumerate([5, 60, 500, 3000]):
+        df = mock_log(num_trades, seed)
+        streaming = StreamingBiasDetector()
+        streaming.add_trades(df.to_dict('records'))
+        assert_matches_batch(df, streaming)
+
+
+def test_streaming_days_follow_wall_clock():
+    # Days are the timestamps' own calendar dates, as in BiasDetector, not UTC dates
+    for offset in ('+09:00', '-05:00'):
+        df = mock_log(3000, seed=4, utc_offset=offset)
+        streaming = StreamingBiasDetector()
+        streaming.add_trades(df.to_dict('records'))
+        assert_matches_batch(df, streaming)
+
+
+def test_columns_match_dicts():
+    df = mock_log(2000, seed=3)
+    from_dicts = StreamingBiasDetector()
+    from_dicts.add_trades(df.to_dict('records'))
+    from_columns = StreamingBiasDetector()
+    for start in range(0, len(df), 300):
+        chunk = df.iloc[start:start + 300]
+        from_columns.add_columns(chunk['Timestamp'], chunk['Asset'], chunk['P/L'])
+    assert from_columns.analyze_all() == from_dicts.analyze_all()
+
+
+def test_score_attempt_leaves_state_untouched():
+    df = mock_log(500, seed=1)
+    streaming = StreamingBiasDetector()
+    streaming.add_trades(df.to_dict('records'))
+    before = streaming.analyze_all()
+    streaming.score_attempt(df['Timestamp'].iloc[-1], 'BTC')
+    assert streaming.analyze_all() == before
+
+
+def test_p2_quantile():
+    values = [5.0, 1.0, 4.0, 2.0, 3.0]
+    quantile = P2Quantile(0.5)
+    for value in values:
+        quantile.add(value)
+    # Exact for the first five observations
+    assert quantile.value() == 3.0
+
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"✅ {name}")
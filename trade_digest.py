@@ -0,0 +1,133 @@
+"""
+Compact statistical digests of a trade history, for LLM analysis of logs too
+long to send trade by trade.
+
+The history is split into at most ANALYSIS_MAX_CHUNKS consecutive chunks.
+Each chunk is summarized locally: BiasDetector scores and metrics,
+per-asset aggregates, daily activity and time-of-day activity. A digest is a
+few hundred tokens however many trades it covers, so whole histories fit a
+fixed token budget.
+"""
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from bias_detector import BiasDetector
+from detector_registry import section_detectors
+from trade_ingest import REQUIRED_COLUMNS
+
+# Chunk size grows in powers of two from this, so appending trades rarely moves
+# earlier chunk boundaries (and their cached analyses stay valid)
+CHUNK_TRADES = 500
+MAX_CHUNKS = int(os.environ.get("ANALYSIS_MAX_CHUNKS", 8))
+
+TOP_ASSETS = 8
+RECENT_TRADES = 20
+
+
+def chunk_bounds(n, chunk_trades=CHUNK_TRADES, max_chunks=MAX_CHUNKS):
+    """(start, end) row ranges of at most `max_chunks` equal chunks of `chunk_trades` * 2**k trades."""
+    size = chunk_trades
+    while math.ceil(n / size) > max_chunks:
+        size *= 2
+    return [(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+def _bias_scores(detector):
+    results = detector.run_detectors(section_detectors())
+    return {name: {'score': result['score'], 'metrics': result['metrics']} for name, result in results.items()}
+
+
+def digest_frame(df):
+    """
+    Summarize one chunk of trades.
+
+    Args:
+        df: Trade frame (Timestamp, Buy/sell, Asset, P/L)
+
+    Returns:
+        dict: JSON-serializable digest
+
+    Raises:
+        ValueError: If the chunk has no trades
+    """
+    if len(df) == 0:
+        raise ValueError("No trading data provided")
+    detector = BiasDetector(df)
+    trades = detector.df
+    pl = trades['P/L']
+    stats = detector.get_statistics()
+
+    by_asset = pl.groupby(trades['Asset'], observed=True).agg(['size', 'sum', 'mean'])
+    by_asset['win_rate'] = (pl > 0).groupby(trades['Asset'], observed=True).mean() * 100
+    by_asset = by_asset.sort_values('size', ascending=False).head(TOP_ASSETS)
+
+    daily_pnl = pl.groupby(detector.days).sum()
+    hours = (detector.timestamps_ns // (3600 * 10**9)) % 24
+
+    return {
+        'start': trades['Timestamp'].iloc[0].isoformat(),
+        'end': trades['Timestamp'].iloc[-1].isoformat(),
+        'trades': stats['total_trades'],
+        'win_rate': stats['win_rate'],
+        'total_pnl': stats['total_pnl'],
+        'avg_pnl': stats['avg_pnl'],
+        'largest_win': stats['largest_win'],
+        'largest_loss': stats['largest_loss'],
+        'human_tax': stats['human_tax'],
+        'buy_pct': round(float((trades['Buy/sell'].astype(str).str.lower() == 'buy').mean() * 100), 1)
+                   if 'Buy/sell' in trades else None,
+        'assets': {
+            str(asset): {'trades': int(row['size']), 'pnl': round(float(row['sum']), 2),
+                         'avg_pnl': round(float(row['mean']), 2), 'win_rate': round(float(row['win_rate']), 1)}
+            for asset, row in by_asset.iterrows()
+        },
+        'unique_assets': stats['unique_assets'],
+        'days': {
+            'trading_days': stats['trading_days'],
+            'avg_trades': round(float(detector.trades_per_day.mean()), 1),
+            'max_trades': int(detector.trades_per_day.max()),
+            'losing_days_pct': round(float((daily_pnl < 0).mean() * 100), 1),
+            'best_day_pnl': round(float(daily_pnl.max()), 2),
+            'worst_day_pnl': round(float(daily_pnl.min()), 2)
+        },
+        'trades_by_hour': np.bincount(hours, minlength=24).tolist(),
+        'detectors': _bias_scores(detector)
+    }
+
+
+def build_digests(trades):
+    """
+    Digest a whole trade history in bounded size.
+
+    Args:
+        trades (list or DataFrame): Trade dictionaries, as accepted by /api/analyze, or a trade frame
+
+    Returns:
+        dict: {'overall': digest of everything, 'chunks': [digest per chunk],
+               'recent_trades': the last RECENT_TRADES trades as
+               [timestamp, side, asset, P/L] rows}
+
+    Raises:
+        ValueError: If there are no trades or required columns are missing
+    """
+    frame = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame(trades)
+    if len(frame) == 0:
+        raise ValueError("No trading data provided")
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in frame.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+    frame = BiasDetector(frame).df
+    chunks = [digest_frame(frame.iloc[start:end]) for start, end in chunk_bounds(len(frame))]
+    recent = frame.tail(RECENT_TRADES)
+    return {
+        'overall': digest_frame(frame),
+        'chunks': chunks,
+        'recent_trades': [
+            [ts.isoformat(), str(side), str(asset), round(float(pnl), 2)]
+            for ts, side, asset, pnl in zip(recent['Timestamp'], recent.get('Buy/sell', [''] * len(recent)),
+                                            recent['Asset'], recent['P/L'])
+        ]
+    }
@@ -0,0 +1,134 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['Timestamp', 'Buy/sell', 'Asset', 'P/L']
+
+ARROW_MIMETYPES = ('application/vnd.apache.arrow.stream', 'application/vnd.apache.arrow.file')
+NPZ_MIMETYPE = 'application/x-npz'
+
+# Header substrings accepted for each column, same as parseCSV in static/js/app.js
+CSV_COLUMN_ALIASES = {
+    'Timestamp': ('timestamp',),
+    'Buy/sell': ('buy', 'sell', 'action'),
+    'Asset': ('asset', 'symbol'),
+    'P/L': ('p/l', 'pnl', 'profit')
+}
+
+
+def _timestamps(values, unit):
+    """Convert epoch numbers (in `unit`), datetime64 or date strings to datetime64."""
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values
+    if values.dtype.kind in 'iuf':
+        return pd.to_datetime(values, unit=unit)
+    return pd.to_datetime(values)
+
+
+def frame_from_columns(columns, timestamp_unit='ms'):
+    """
+    Build a typed trade frame from column arrays without per-row Python objects.
+
+    Timestamps may be epoch numbers (milliseconds by default, as produced by
+    JavaScript's Date.getTime()), datetime64 arrays or date strings. Assets and
+    sides become categoricals and P/L float64, so BiasDetector shares the
+    arrays as they are and skips its own type inference.
+
+    Args:
+        columns (dict): Mapping of column name to list or array
+        timestamp_unit (str): Unit of numeric timestamps ('s', 'ms', 'us', 'ns')
+
+    Returns:
+        DataFrame: Trades with columns Timestamp, Buy/sell, Asset, P/L
+    """
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing_cols:
+        raise ValueError(f'Missing required columns: {missing_cols}')
+    if len({len(columns[col]) for col in REQUIRED_COLUMNS}) != 1:
+        raise ValueError('All columns must have the same length')
+
+    return pd.DataFrame({
+        'Timestamp': _timestamps(columns['Timestamp'], timestamp_unit),
+        'Buy/sell': pd.Categorical(columns['Buy/sell']),
+        'Asset': pd.Categorical(columns['Asset']),
+        'P/L': np.asarray(columns['P/L'], dtype=np.float64)
+    })
+
+
+def frame_from_npz(body, timestamp_unit='ms'):
+    """Build a trade frame from an uncompressed or compressed NumPy .npz archive."""
+    with np.load(io.BytesIO(body), allow_pickle=False) as archive:
+        columns = {name: archive[name] for name in archive.files}
+    return frame_from_columns(columns, timestamp_unit)
+
+
+def frame_from_arrow(body, timestamp_unit='ms'):
+    """Build a trade frame from an Arrow IPC stream or file. Requires pyarrow."""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError('Arrow uploads require pyarrow (pip install pyarrow)')
+
+    reader = pa.ipc.open_stream(body) if body[:6] != b'ARROW1' else pa.ipc.open_file(body)
+    table = reader.read_all()
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    return frame_from_columns(columns, timestamp_unit)
+
+
+def resolve_csv_columns(headers):
+    """
+    Map each required column to the first CSV header matching one of its aliases.
+
+    Returns:
+        dict: Required column name to CSV header
+    """
+    mapping = {}
+    for column, aliases in CSV_COLUMN_ALIASES.items():
+        match = next((h for h in headers if any(alias in str(h).strip().lower() for alias in aliases)), None)
+        if match is not None:
+            mapping[column] = match
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in mapping]
+    if missing_cols:
+        raise ValueError(f'Missing required columns: {missing_cols}')
+    return mapping
+
+
+def iter_csv_chunks(stream, chunksize=50000):
+    """
+    Read a trade CSV in bounded-memory chunks.
+
+    Args:
+        stream: Binary or text file-like object with the CSV contents
+        chunksize (int): Rows per chunk
+
+    Yields:
+        DataFrame: Chunk with the raw Timestamp, Buy/sell, Asset, P/L values as strings
+    """
+    mapping = None
+    for chunk in pd.read_csv(stream, chunksize=chunksize, dtype=str, skipinitialspace=True):
+        if mapping is None:
+            mapping = resolve_csv_columns(chunk.columns)
+        yield pd.DataFrame({column: chunk[header] for column, header in mapping.items()})
+
+
+def frame_from_file(path):
+    """
+    Load a broker export (.csv or .parquet) into a trade frame.
+
+    Column headers may use the same aliases as CSV uploads. Parquet files
+    require pyarrow.
+
+    Returns:
+        DataFrame: Trades with columns Timestamp, Buy/sell, Asset, P/L
+    """
+    if str(path).lower().endswith(('.parquet', '.pq')):
+        try:
+            df = pd.read_parquet(path)
+        except ImportError:
+            raise ValueError('Parquet files require pyarrow (pip install pyarrow)')
+    else:
+        df = pd.read_csv(path, skipinitialspace=True)
+    mapping = resolve_csv_columns(df.columns)
+    return pd.DataFrame({column: df[header] for column, header in mapping.items()})